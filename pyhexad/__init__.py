@@ -12,15 +12,29 @@
 from .config           import Limits, h5py_is_installed, h5py_version, \
 		              numpy_version
 from .h5appendRows     import h5appendRows
+from .h5cacheInfo      import h5cacheInfo
+from .h5closeFile      import h5closeFile
+from .h5exportDataset  import h5exportDataset
+from .h5findValues     import h5findValues
+from .h5flushFile      import h5flushFile
 from .h5getInfo        import h5getInfo
+from .h5lookupRows     import h5lookupRows
 from .h5newArray       import h5newArray
 from .h5newFile        import h5newFile
 from .h5newGroup       import h5newGroup
+from .h5newIndex       import h5newIndex
 from .h5newTable       import h5newTable
+from .h5newZoneMap     import h5newZoneMap
+from .h5previewArray   import h5previewArray
 from .h5readArray      import h5readArray
+from .h5readArrayPage  import h5readArrayPage
 from .h5readAttribute  import h5readAttribute
 from .h5readImage      import h5readImage
+from .h5readPoints     import h5readPoints
 from .h5readTable      import h5readTable
+from .h5readTablePage  import h5readTablePage
+from .h5reduceArray    import h5reduceArray
+from .h5setChunkCache  import h5setChunkCache
 from .h5showList       import h5showList
 from .h5showTree       import h5showTree
 from .h5writeAttribute import h5writeAttribute
@@ -0,0 +1,272 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import logging
+import threading
+
+import numpy as np
+import pyxll
+
+from file_helpers import _pool, file_key, pool_key
+from h5_helpers import absolute_path
+from index_helpers import invalidate_indexes
+from zone_helpers import invalidate_zones
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+class PendingWrite(object):
+    """
+    A deferred write of 'data' to the hyperslab 'slices' (a tuple of slices
+    with non-negative start, stop, and step) of an HDF5 dataset. 'fields' is
+    a (possibly empty) tuple of compound field names.
+    """
+
+    def __init__(self, slices, data, fields=()):
+        self.slices = tuple(slices)
+        self.data = data
+        self.fields = tuple(fields)
+
+    def selection(self):
+        return self.fields + self.slices
+
+    def merge(self, other):
+        """
+        Appends 'other' to this write, if the two hyperslabs are adjacent
+        in exactly one dimension and identical in all others. Returns True
+        if 'other' was merged.
+        """
+
+        rk = len(self.slices)
+        if other.fields != self.fields or len(other.slices) != rk or \
+           self.data.ndim != rk or other.data.ndim != rk or \
+           self.data.dtype != other.data.dtype:
+            return False
+
+        dim = None
+        for i in range(rk):
+            a, b = self.slices[i], other.slices[i]
+            if a == b:
+                continue
+            count = len(xrange(a.start, a.stop, a.step))
+            if dim is not None or a.step != b.step or \
+               b.start != a.start + count*a.step:
+                return False
+            dim = i
+
+        if dim is None:
+            return False
+
+        # the data must match the hyperslabs, or we leave it to h5py to fail
+        for w in (self, other):
+            counts = tuple([len(xrange(s.start, s.stop, s.step))
+                            for s in w.slices])
+            if w.data.shape != counts:
+                return False
+
+        a, b = self.slices[dim], other.slices[dim]
+        slices = list(self.slices)
+        slices[dim] = slice(a.start, b.stop, a.step)
+        self.slices = tuple(slices)
+        self.data = np.concatenate((self.data, other.data), axis=dim)
+        return True
+
+#==============================================================================
+
+
+class WriteBatch(object):
+    """
+    Collects the dataset writes issued during one Excel calculation cycle.
+
+    Writes are grouped by file and dataset, and adjacent hyperslabs of the
+    same dataset are merged. The batch is committed after the calculation
+    cycle with one flush per file. Pending writes of a file are also
+    committed before the file pool hands out the file for reading, and
+    before it flushes or closes the file.
+
+    The datasets of failed writes are remembered (per file) until the
+    next failure_note() for the file.
+    """
+
+    def __init__(self):
+        self.writes = 0
+        self.commits = 0
+        self.failures = 0
+        self._pending = {}
+        self._failed = {}
+        self._dirty = set()
+        self._scheduled = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            return sum([len(l) for d in self._pending.values()
+                        for l in d.values()])
+
+    def add(self, loc, path, slices, data, fields=()):
+        """
+        Queues a write of 'data' to the dataset at (loc, path).
+        """
+
+        key = pool_key(loc)
+        w = PendingWrite(slices, np.asarray(data), fields)
+
+        with self._lock:
+            self.writes += 1
+            datasets = self._pending.setdefault(key, OrderedDict())
+            writes = datasets.setdefault(absolute_path(loc, path), [])
+            if len(writes) == 0 or not writes[-1].merge(w):
+                writes.append(w)
+            self.touch(key)
+
+    def touch(self, key):
+        """
+        Marks the file 'key' as modified and schedules a commit.
+        """
+
+        with self._lock:
+            self._dirty.add(key)
+            if not self._scheduled:
+                self._scheduled = True
+                try:
+                    pyxll.async_call(commit_writes)
+                except Exception, e:
+                    logger.info(e)
+                    self._scheduled = False
+
+    def commit(self, key, handle):
+        """
+        Writes the pending writes for the file 'key' to 'handle' and returns
+        the number of (merged) writes performed.
+        """
+
+        with self._lock:
+            datasets = self._pending.pop(key, None)
+        if datasets is None:
+            return 0
+
+        count = 0
+        for path, writes in datasets.items():
+            try:
+                dset = handle[path]
+            except Exception, e:
+                logger.info(e)
+                self.fail(key, handle, path)
+                continue
+            for w in writes:
+                try:
+                    dset[w.selection()] = w.data
+                    count += 1
+                except Exception, e:
+                    logger.info("Write to '%s' failed: %s" % (path, e))
+                    self.fail(key, handle, path)
+
+        self.commits += count
+        return count
+
+    def fail(self, key, handle, path):
+        """
+        Records a failed write to the dataset at 'path' of the file 'key',
+        and marks the dataset's indexes and zone map (updated when the
+        write was queued) stale.
+        """
+
+        with self._lock:
+            self.failures += 1
+            failed = self._failed.setdefault(key, [])
+            if path not in failed:
+                failed.append(path)
+
+        try:
+            invalidate_indexes(handle, path)
+            invalidate_zones(handle, path)
+        except Exception, e:
+            logger.info(e)
+
+    def failure_note(self, filename=None):
+        """
+        Returns the note appended to the result message of a call for the
+        file 'filename' (or for all files, if None), if writes to it failed
+        since the last note, and forgets the failures.
+        """
+
+        with self._lock:
+            if filename is None:
+                paths = [p for l in self._failed.values() for p in l]
+                self._failed = {}
+            else:
+                paths = self._failed.pop(file_key(filename), [])
+
+        if len(paths) == 0:
+            return ''
+        return ' (Earlier writes to %s failed.)' % \
+            (', '.join(["'%s'" % (p) for p in paths]))
+
+    def commit_all(self):
+        """
+        Commits all pending writes and flushes the modified files.
+        """
+
+        with self._lock:
+            dirty = self._dirty
+            self._dirty = set()
+            self._scheduled = False
+
+        count = 0
+        for key in dirty:
+            # the file pool calls commit() on flush
+            count += _pool.flush(key)
+        return count
+
+    def info(self):
+        """
+        Returns a list of (key, value) pairs describing the batch.
+        """
+
+        return [('Pending writes:', len(self)),
+                ('Queued writes:', self.writes),
+                ('Committed writes:', self.commits),
+                ('Failed writes:', self.failures)]
+
+write_batch = WriteBatch()
+
+_pool.commit_hook = write_batch.commit
+
+#==============================================================================
+
+
+@contextmanager
+def batched_file(filename, swmr=False):
+    """
+    Like pooled_file(filename, 'a'), but the handle is not flushed on exit.
+    Writes queued with write_batch are committed after the calculation
+    cycle. If swmr is True, the file is opened as a SWMR writer.
+    """
+
+    f = _pool.acquire(filename, 'a', swmr=swmr)
+    try:
+        yield f
+    finally:
+        _pool.touch(filename)
+        write_batch.touch(file_key(filename))
+
+#==============================================================================
+
+
+def commit_writes():
+    """
+    Commits all pending writes and returns the number of files flushed.
+    """
+    return write_batch.commit_all()
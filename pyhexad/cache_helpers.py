@@ -0,0 +1,156 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+from collections import OrderedDict
+import threading
+
+#==============================================================================
+
+
+class LRUCache(object):
+    """
+    A dictionary with a maximum number of entries. When the cache is full,
+    the least recently used entry is evicted.
+
+    Lookups are counted as hits or misses.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """
+        Returns the value cached for key or None.
+        """
+
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries[key] = value
+            return value
+
+    def put(self, key, value):
+        """
+        Caches value under key. None values are not cached.
+        """
+
+        if value is None:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > max(self.max_entries, 0):
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        """
+        Removes key from the cache and returns its value (or None).
+        """
+
+        with self._lock:
+            return self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        """
+        Returns a list of (key, value) pairs describing the cache.
+        """
+
+        with self._lock:
+            return [('Entries:', len(self._entries)),
+                    ('Max. entries:', self.max_entries),
+                    ('Hits:', self.hits),
+                    ('Misses:', self.misses)]
+
+#==============================================================================
+
+
+class SizedLRUCache(LRUCache):
+    """
+    An LRUCache that also limits the total size of its values. 'sizeof'
+    returns the size (in bytes) of a value. Values larger than 'max_bytes'
+    are not cached.
+    """
+
+    def __init__(self, max_entries, max_bytes, sizeof):
+        LRUCache.__init__(self, max_entries)
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._sizeof = sizeof
+        self._sizes = {}
+
+    def put(self, key, value):
+        if value is None:
+            return
+
+        size = self._sizeof(value)
+        with self._lock:
+            self.pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            while len(self._entries) > max(self.max_entries, 0) or \
+                  self.nbytes > self.max_bytes:
+                old, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old)
+
+    def pop(self, key):
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self.nbytes -= self._sizes.pop(key)
+            return value
+
+    def discard(self, predicate):
+        """
+        Removes the entries whose key satisfies predicate and returns their
+        number.
+        """
+
+        with self._lock:
+            keys = [k for k in self._entries if predicate(k)]
+            for k in keys:
+                self.pop(k)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def info(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            rate = 100.0 * self.hits / lookups if lookups > 0 else 0.0
+            return LRUCache.info(self) + \
+                [('Hit rate (%):', round(rate, 1)),
+                 ('Bytes:', self.nbytes),
+                 ('Max. bytes:', self.max_bytes)]
@@ -0,0 +1,158 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+import numpy as np
+
+from cache_helpers import LRUCache
+from config import Tuning
+from file_helpers import chunk_cache_settings, pool_key
+from h5_helpers import is_swmr_reader, object_info, object_info_key
+from shape_helpers import Selection
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def next_prime(n):
+    """
+    Returns the smallest prime >= n.
+    """
+
+    n = max(int(n), 2)
+    while True:
+        if all([n % d for d in xrange(2, int(n**0.5) + 1)]):
+            return n
+        n += 1
+
+#==============================================================================
+
+
+def chunks_touched(chunks, shape, slices):
+    """
+    Returns the number of chunks a hyperslab selection intersects.
+
+    Parameters
+    ----------
+    chunks: tuple
+        The chunk dimensions of a dataset.
+    shape: tuple
+        The shape of the dataset.
+    slices: tuple of slices
+        The selection. Missing trailing dimensions are selected entirely.
+    """
+
+    full = []
+    for i in range(len(chunks)):
+        s = slices[i] if i < len(slices) else slice(None)
+        full.append(slice(*s.indices(shape[i])))
+    return Selection.from_slices(full).chunk_count(chunks)
+
+#==============================================================================
+
+
+def chunk_cache_for(info, slices, defaults):
+    """
+    Returns (rdcc_nbytes, rdcc_nslots, rdcc_w0) for reading a hyperslab of
+    the dataset described by the ObjectInfo 'info', or None, if 'defaults'
+    (the file's settings) will do.
+
+    The cache should hold all chunks the selection touches, so that no chunk
+    is decompressed twice when a selection is read again or page by page.
+    It won't grow beyond Tuning.MAX_RDCC_NBYTES, and it is never smaller
+    than the file's cache. Following the HDF5 guidance, the number of hash
+    table slots is a prime about 100 times the number of chunks in the
+    cache.
+    """
+
+    if info.chunks is None:  # contiguous or compact
+        return None
+
+    chunk_bytes = int(np.prod(info.chunks)) * info.dtype.itemsize
+    if chunk_bytes == 0:
+        return None
+
+    nbytes = chunks_touched(info.chunks, info.shape, slices) * chunk_bytes
+    nbytes = min(nbytes, Tuning.MAX_RDCC_NBYTES)
+    if nbytes <= defaults[0]:
+        return None
+
+    nslots = next_prime(max(100 * (nbytes / chunk_bytes), defaults[1]))
+    return (nbytes, nslots, defaults[2])
+
+#==============================================================================
+
+
+class OpenDataset(object):
+    """
+    A dataset handle kept open with its chunk cache settings.
+    """
+
+    def __init__(self, dset, rdcc):
+        self.dset = dset
+        self.rdcc = rdcc
+
+# open datasets keyed by (file number, absolute path)
+
+_open_datasets = LRUCache(Tuning.MAX_OPEN_DATASETS)
+
+#==============================================================================
+
+
+def open_dataset(loc, path, slices=()):
+    """
+    Returns an h5py.Dataset for (loc, path) whose chunk cache is big enough
+    for reading the hyperslab 'slices'.
+
+    The handle is kept open (and re-used), because the chunk cache lives
+    only as long as the dataset is open. (HDF5 shares one cache among all
+    handles of the same dataset, i.e., writes through other handles are
+    seen.) For SWMR readers, a re-used handle is refreshed, or it would
+    keep the extent and chunk index it had when it was opened.
+    """
+
+    info = object_info(loc, path)
+    if info is None or info.cls != h5py.Dataset:
+        raise KeyError("No HDF5 dataset at '%s'." % (path))
+
+    key = object_info_key(loc, path)
+    entry = _open_datasets.get(key)
+    if entry is not None and entry.dset.id.valid:
+        rdcc = chunk_cache_for(info, slices, entry.rdcc)
+        if rdcc is None:
+            if is_swmr_reader(loc):
+                entry.dset.refresh()
+            return entry.dset
+        # it's too small, close the dataset, or we won't get a new cache
+        _open_datasets.pop(key)
+        entry.dset.id.close()
+    else:
+        defaults = chunk_cache_settings(pool_key(loc))
+        rdcc = chunk_cache_for(info, slices, defaults) or defaults
+
+    dapl = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+    dapl.set_chunk_cache(rdcc[1], rdcc[0], rdcc[2])
+    dset = h5py.Dataset(h5py.h5d.open(loc.id, path, dapl=dapl))
+
+    _open_datasets.put(key, OpenDataset(dset, rdcc))
+    return dset
+
+#==============================================================================
+
+
+def open_dataset_stats():
+    """
+    Returns a list of (key, value) pairs describing the open datasets.
+    """
+    return _open_datasets.info()
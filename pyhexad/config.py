@@ -24,6 +24,68 @@ class Places(object):
     H52GIF = 'h52gifdll.exe'
 
 
+class Tuning(object):
+
+    # the maximum number of HDF5 file handles kept open by the file pool
+    MAX_OPEN_FILES = 16
+
+    # the maximum number of HDF5 objects whose metadata is cached
+    MAX_CACHED_OBJECTS = 4096
+
+    # the default growth increment (in bytes) of in-memory HDF5 files
+    CORE_INCREMENT = 1024 * 1024
+
+    # the default raw data chunk cache of HDF5 files: size in bytes, number
+    # of hash table slots, and preemption policy (see H5Pset_chunk_cache)
+    RDCC_NBYTES = 1024 * 1024
+    RDCC_NSLOTS = 521
+    RDCC_W0 = 0.75
+
+    # the largest chunk cache (in bytes) we pick for a single dataset
+    MAX_RDCC_NBYTES = 64 * 1024 * 1024
+
+    # the maximum number of datasets kept open (with their chunk caches)
+    MAX_OPEN_DATASETS = 64
+
+    # the maximum number of memory-mapped datasets
+    MAX_MEMMAPS = 16
+
+    # the maximum size (in bytes) of the blocks in which reductions read
+    REDUCE_BLOCK_BYTES = 8 * 1024 * 1024
+
+    # the maximum number and total size (in bytes) of the h5readArray and
+    # h5readTable results kept for recalculations
+    MAX_CACHED_RESULTS = 256
+    RESULT_CACHE_BYTES = 64 * 1024 * 1024
+
+    # the default size of array previews: points (1D), rows and columns (2D)
+    PREVIEW_POINTS = 1000
+    PREVIEW_COLS = 100
+
+    # the approximate size (in bytes) of the blocks of rows in which paged
+    # reads fetch (and prefetch) data, and the maximum number and total size
+    # (in bytes) of the blocks kept
+    PAGE_BLOCK_BYTES = 1024 * 1024
+    MAX_CACHED_BLOCKS = 1024
+    PAGE_CACHE_BYTES = 64 * 1024 * 1024
+
+    # the approximate size (in bytes) of the blocks in which wide integers
+    # are converted in place
+    CONVERT_BLOCK_BYTES = 1024 * 1024
+
+    # the approximate size (in bytes) of the buffer through which datasets
+    # are exported
+    EXPORT_BLOCK_BYTES = 4 * 1024 * 1024
+
+    # the approximate size (in bytes) of the blocks of rows in which filtered
+    # table reads evaluate their condition
+    FILTER_BLOCK_BYTES = 4 * 1024 * 1024
+
+    # the chunk size (in entries) of the datasets of table indexes; lookups
+    # search a chunk's worth of keys in memory
+    INDEX_CHUNK_ROWS = 4096
+
+
 #==============================================================================
 
 
@@ -0,0 +1,200 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+import logging
+import threading
+
+import numpy as np
+
+from config import Tuning
+from type_helpers import excel_dtype
+
+logger = logging.getLogger(__name__)
+
+# integer types whose values may not fit into an int32
+
+WIDE_INTS = (np.dtype(np.int64), np.dtype(np.uint32), np.dtype(np.uint64))
+
+INT32_MIN = np.iinfo(np.int32).min
+INT32_MAX = np.iinfo(np.int32).max
+
+# integers beyond +/- 2**53 may not have an exact float64 representation
+
+FLOAT64_EXACT = 2**53
+
+#==============================================================================
+
+
+def native_dtype(dty):
+    """
+    Returns the numeric type dty in native byte order.
+    """
+    if dty.kind in 'biuf' and not dty.isnative:
+        return dty.newbyteorder('=')
+    return dty
+
+#==============================================================================
+
+
+def convert_ints(x, in_place=False):
+    """
+    Converts the array of wide integers 'x' to int32, if all values fit,
+    or to float64 otherwise. Returns the converted array and the number of
+    values that may have been rounded.
+
+    If 'in_place' is True and the new type is as wide as x's type, x's
+    buffer is re-used, i.e., the caller must not use x afterwards. (The
+    values are converted a block at a time, there is no full-size copy.)
+    """
+
+    if x.size == 0:
+        return x.astype(np.int32), 0
+
+    x_shape = x.shape
+    lo = x.min()
+    hi = x.max()
+    if lo >= INT32_MIN and hi <= INT32_MAX:
+        y_type = np.dtype(np.int32)
+    else:
+        y_type = np.dtype(np.float64)
+
+    # (only 64-bit integers can be rounded; we compare in their type,
+    # since comparing a uint64 with a Python int converts it to float64)
+    t = x.dtype.type
+    signed = x.dtype.kind == 'i'
+    check = y_type == np.float64 and x.dtype.itemsize == 8 and \
+        (hi > t(FLOAT64_EXACT) or (signed and lo < t(-FLOAT64_EXACT)))
+
+    if in_place and y_type.itemsize == x.dtype.itemsize and \
+       x.flags.c_contiguous and x.flags.writeable:
+        y = x.view(y_type)
+    else:
+        y = np.empty(x.shape, dtype=y_type)
+
+    if x.ndim == 0:
+        x = x.reshape(1)
+        y = y.reshape(1)
+
+    row_bytes = (x.size // x.shape[0]) * x.dtype.itemsize
+    n = max(Tuning.CONVERT_BLOCK_BYTES // row_bytes, 1)
+    lossy = 0
+    for i in xrange(0, x.shape[0], n):
+        block = x[i:i+n]
+        if check:
+            big = block > t(FLOAT64_EXACT)
+            if signed:
+                big |= block < t(-FLOAT64_EXACT)
+            lossy += int(np.count_nonzero(big))
+        y[i:i+n] = block
+    return y.reshape(x_shape), lossy
+
+#==============================================================================
+
+
+class ConversionPlan(object):
+    """
+    How the elements of an HDF5 dataset of type 'file_type' are converted to
+    the types Excel understands (strings, int32, float64).
+
+    'read_type' is the type HDF5 converts to while reading. Values that
+    might not fit into an int32 are read at full width and converted a whole
+    block at a time by convert(): to int32 if they all fit, to float64
+    otherwise. 'checked' lists the fields (None for a scalar type) that
+    need this step.
+    """
+
+    def __init__(self, file_type):
+        self.file_type = file_type
+
+        if file_type.names is None:
+            t = native_dtype(file_type)
+            if t in WIDE_INTS:
+                self.read_type = t
+                self.checked = [None]
+            else:
+                self.read_type = excel_dtype(t)
+                self.checked = []
+            return
+
+        spec = []
+        self.checked = []
+        for n in file_type.names:
+            t = native_dtype(file_type.fields[n][0])
+            if t in WIDE_INTS:
+                spec.append((n, t))
+                self.checked.append(n)
+            elif t.char == 'S':
+                spec.append((n, t))
+            else:
+                spec.append((n, excel_dtype(t)))
+        self.read_type = np.dtype(spec)
+
+    def convert(self, x, in_place=False):
+        """
+        Converts the array 'x' (of read_type, or of a subset of its fields)
+        and returns it with the number of values that may have been rounded.
+        Arrays that need no conversion are returned as they are. If
+        'in_place' is True, x's buffer may be re-used (see convert_ints).
+        """
+
+        if x.dtype.names is None:
+            if self.checked:
+                return convert_ints(x, in_place)
+            return x, 0
+
+        checked = [n for n in self.checked if n in x.dtype.names]
+        if not checked:
+            return x, 0
+
+        lossy = 0
+        columns = {}
+        for n in checked:
+            columns[n], k = convert_ints(x[n])
+            lossy += k
+        spec = [(n, columns[n].dtype if n in columns else x.dtype[n])
+                for n in x.dtype.names]
+        y = np.empty(x.shape, dtype=spec)
+        for n in x.dtype.names:
+            y[n] = columns[n] if n in columns else x[n]
+        return y, lossy
+
+# conversion plans by file type (there are only a few distinct types)
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+#==============================================================================
+
+
+def conversion_plan(file_type):
+    """
+    Returns the (cached) ConversionPlan for file_type.
+    """
+
+    with _plans_lock:
+        plan = _plans.get(file_type)
+        if plan is None:
+            plan = ConversionPlan(file_type)
+            _plans[file_type] = plan
+        return plan
+
+#==============================================================================
+
+
+def rounding_note(lossy):
+    """
+    Returns the note appended to a result message if 'lossy' values may
+    have been rounded.
+    """
+    if lossy == 0:
+        return ''
+    return ' (%d integers beyond 2^53 may be rounded)' % (lossy)
@@ -0,0 +1,176 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+import csv
+import logging
+
+import numpy as np
+
+from config import Tuning
+from reduce_helpers import block_shape
+
+logger = logging.getLogger(__name__)
+
+# the supported export formats
+
+EXPORT_FORMATS = ('csv', 'npy', 'raw')
+
+#==============================================================================
+
+
+def export_format(outfile, fmt=None):
+    """
+    Returns the export format 'fmt' or, if it's None or empty, the one
+    implied by the extension of outfile ('raw' for unknown extensions).
+    """
+
+    if fmt is not None and fmt.strip() != '':
+        return fmt.strip().lower()
+    ext = outfile.rsplit('.', 1)[-1].lower() if '.' in outfile else ''
+    return ext if ext in EXPORT_FORMATS else 'raw'
+
+#==============================================================================
+
+
+def export_rows(dset):
+    """
+    Returns the number of rows (positions in the first dimension) of the
+    blocks in which the h5py dataset 'dset' is exported: whole chunks, and
+    about Tuning.EXPORT_BLOCK_BYTES per block.
+    """
+
+    shape = dset.shape
+    chunks = dset.chunks
+    c = 1 if chunks is None else chunks[0]
+    nbytes = Tuning.EXPORT_BLOCK_BYTES * 8 / max(dset.dtype.itemsize, 1)
+    return block_shape(shape, (c,) + shape[1:], nbytes)[0]
+
+#==============================================================================
+
+
+def iter_blocks(dset, rows):
+    """
+    Reads the h5py dataset 'dset' in blocks of 'rows' rows and yields each
+    block (a view of a single buffer, re-used for every block).
+
+    A yielded block is only valid until the next one is requested.
+    """
+
+    nrows = dset.shape[0]
+    buf = np.empty((min(rows, nrows),) + dset.shape[1:], dtype=dset.dtype)
+    for start in xrange(0, nrows, rows):
+        n = min(rows, nrows - start)
+        dset.read_direct(buf, source_sel=np.s_[start:start+n],
+                         dest_sel=np.s_[0:n])
+        yield buf[:n]
+
+#==============================================================================
+
+
+def plain_dtype(dty):
+    """
+    Returns dty without the metadata h5py attaches to (string) types, which
+    the .npy format can't represent.
+    """
+
+    if dty.names is not None:
+        return np.dtype({'names': dty.names,
+                         'formats': [plain_dtype(dty.fields[n][0])
+                                     for n in dty.names],
+                         'offsets': [dty.fields[n][1] for n in dty.names],
+                         'itemsize': dty.itemsize})
+    if dty.subdtype is not None:
+        return np.dtype((plain_dtype(dty.subdtype[0]), dty.subdtype[1]))
+    return np.dtype(dty.str)
+
+def utf8_rows(rows):
+    """
+    Returns the rows with unicode values encoded as UTF-8. (The csv module
+    only writes byte strings.)
+    """
+    return [[v.encode('utf-8') if isinstance(v, unicode) else v for v in r]
+            for r in rows]
+
+#==============================================================================
+
+
+def write_csv(blocks, f, names=None):
+    """
+    Writes the blocks of a one- or two-dimensional array, or of a table
+    with column names 'names', as comma-separated (UTF-8) values.
+    """
+
+    w = csv.writer(f, lineterminator='\n')
+    if names is not None:
+        w.writerow(names)
+    for x in blocks:
+        if x.ndim == 1 and names is None:
+            rows = [(v,) for v in x.tolist()]
+        else:
+            rows = x.tolist()
+        # (variable-length strings read as unicode, if they aren't ASCII)
+        if x.dtype.hasobject:
+            rows = utf8_rows(rows)
+        w.writerows(rows)
+
+#==============================================================================
+
+
+def write_npy(blocks, f, dtype, shape):
+    """
+    Writes the blocks of an array of type dtype and shape 'shape' as a
+    Numpy .npy file.
+    """
+
+    np.lib.format.write_array_header_1_0(
+        f, {'descr': np.lib.format.dtype_to_descr(plain_dtype(dtype)),
+            'fortran_order': False, 'shape': shape})
+    for x in blocks:
+        f.write(np.ascontiguousarray(x).tobytes())
+
+#==============================================================================
+
+
+def write_raw(blocks, f):
+    """
+    Writes the blocks of an array as raw (C order) binary data.
+    """
+    for x in blocks:
+        f.write(np.ascontiguousarray(x).tobytes())
+
+#==============================================================================
+
+
+def export_dataset(dset, outfile, fmt):
+    """
+    Exports the h5py dataset 'dset' to the file outfile in the format fmt
+    (one of EXPORT_FORMATS), and returns the number of rows written.
+
+    The dataset is streamed in chunk-aligned blocks through one buffer,
+    i.e., memory use doesn't depend on the dataset's size.
+    """
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError("Unknown export format '%s'." % (fmt))
+
+    blocks = iter_blocks(dset, export_rows(dset))
+    if fmt == 'csv':
+        with open(outfile, 'wb') as f:
+            write_csv(blocks, f, dset.dtype.names)
+    elif fmt == 'npy':
+        with open(outfile, 'wb') as f:
+            write_npy(blocks, f, dset.dtype, dset.shape)
+    else:
+        with open(outfile, 'wb') as f:
+            write_raw(blocks, f)
+
+    return dset.shape[0]
@@ -9,20 +9,545 @@
 # request a copy from help@hdfgroup.org.                                     #
 ##############################################################################
 
+from collections import OrderedDict
+from contextlib import contextmanager
+import logging
+import os
+import sys
+import threading
+
 import h5py
 
+from cache_helpers import LRUCache
+from config import Tuning
+
+logger = logging.getLogger(__name__)
+
+# the prefix of pseudo file names of in-memory (core driver) HDF5 files
+
+MEMORY_FILE_PREFIX = 'mem://'
+
+# chunk cache settings (rdcc_nbytes, rdcc_nslots, rdcc_w0) keyed by file
+# key; the None entry holds the defaults
+
+_chunk_cache_settings = {None: (Tuning.RDCC_NBYTES, Tuning.RDCC_NSLOTS,
+                                Tuning.RDCC_W0)}
+
+#==============================================================================
+
 
 def file_exists(filename):
     """
     Check if filename refers to an HDF5 file
+
+    The answer is memoized for the file's (path, size, mtime, inode), i.e.,
+    we look at the file again only if it changed. Files the pool has open
+    are known to be HDF5 files. In-memory files exist while they are open.
     """
 
     if not isinstance(filename, str):
         raise TypeError('String expected.')
 
-    result = False
-    try:
-        result = h5py.h5f.is_hdf5(filename)
-    except Exception:
-        pass
+    if is_memory_file(filename):
+        return _pool.is_open(filename, None)
+
+    stamp = file_stamp(filename)
+    if stamp is None:
+        return False
+
+    key = (file_key(filename), stamp)
+    result = _signature_cache.get(key)
+    if result is not None:
+        return result
+
+    result = _pool.is_open(filename, stamp)
+    if not result:
+        try:
+            result = bool(h5py.h5f.is_hdf5(filename))
+        except Exception:
+            result = False
+
+    _signature_cache.put(key, result)
     return result
+
+#==============================================================================
+
+
+def file_key(filename):
+    """
+    Returns the key under which a file is known to the file pool.
+    """
+
+    if not isinstance(filename, str):
+        raise TypeError('String expected.')
+
+    if is_memory_file(filename):
+        return filename
+
+    return os.path.normcase(os.path.abspath(filename))
+
+#==============================================================================
+
+
+def chunk_cache_settings(filename=None):
+    """
+    Returns the (rdcc_nbytes, rdcc_nslots, rdcc_w0) tuple used when opening
+    filename, or the defaults, if filename is None.
+    """
+
+    key = None if filename is None else file_key(filename)
+    return _chunk_cache_settings.get(key, _chunk_cache_settings[None])
+
+#==============================================================================
+
+
+def set_chunk_cache_settings(nbytes, nslots, w0, filename=None):
+    """
+    Sets the chunk cache for filename, or the defaults, if filename is None.
+    Pooled handles opened with different settings are closed, i.e., the new
+    settings take effect when the file is opened next. (In-memory files
+    keep their settings.) Returns the number of handles closed.
+    """
+
+    if nbytes < 0 or nslots < 1 or not 0.0 <= w0 <= 1.0:
+        raise ValueError('Invalid chunk cache settings.')
+
+    key = None if filename is None else file_key(filename)
+    _chunk_cache_settings[key] = (int(nbytes), int(nslots), float(w0))
+
+    return _pool.reconfigure()
+
+#==============================================================================
+
+
+def is_memory_file(filename):
+    """
+    Returns True if filename is the pseudo file name of an in-memory file.
+    """
+    return isinstance(filename, str) and \
+        filename.startswith(MEMORY_FILE_PREFIX)
+
+#==============================================================================
+
+
+def file_stamp(filename):
+    """
+    Returns a (size, mtime, inode) tuple for filename or None, if the file
+    cannot be stat'ed.
+    """
+
+    try:
+        st = os.stat(filename)
+        return (st.st_size, st.st_mtime, st.st_ino)
+    except OSError:
+        return None
+
+#==============================================================================
+
+
+class PoolEntry(object):
+    """
+    An open HDF5 file handle and what we knew about the file when we last
+    touched it. 'swmr' is True, if the handle is a SWMR writer or reader.
+    'rdcc' are the chunk cache settings the file was opened with.
+    """
+
+    def __init__(self, handle, writable, stamp, swmr=False, rdcc=None):
+        self.handle = handle
+        self.writable = writable
+        self.stamp = stamp
+        self.swmr = swmr
+        self.rdcc = rdcc
+
+#==============================================================================
+
+
+class FilePool(object):
+    """
+    A process-wide pool of open HDF5 file handles shared by all worksheet
+    functions.
+
+    Handles are evicted in LRU order once more than 'max_files' are open.
+    A read-only handle is upgraded (closed and re-opened) when a caller asks
+    for write access. A handle is re-opened when the size or the modification
+    time of the file changed behind our back, unless it is a SWMR handle.
+    (SWMR readers see new data via refresh, not by re-opening the file.)
+
+    In-memory files are created with mode 'w-' and live in the pool until
+    they are closed. They are never evicted and don't count against
+    'max_files'.
+
+    If set, 'commit_hook(key, handle)' is called before a handle is read
+    from, flushed, or closed, to write out any deferred writes for the file.
+    The functions in 'write_hooks' are called (with the key) whenever a file
+    is acquired for writing, to drop anything derived from its contents.
+    """
+
+    def __init__(self, max_files):
+        self.max_files = max_files
+        self.hits = 0
+        self.misses = 0
+        self.commit_hook = None
+        self.write_hooks = []
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def acquire(self, filename, mode='r', stamp=None, swmr=False, **kwargs):
+        """
+        Returns an open h5py.File for filename.
+
+        Parameters
+        ----------
+        filename: str
+            The name of an HDF5 file.
+        mode: str
+            'r' (read-only), 'a' (read/write, create if necessary), or
+            'w-' (create, fail if the file exists).
+        stamp: tuple
+            The file_stamp() of filename, if the caller has it already.
+        swmr: bool
+            If True and mode is 'a', the file is opened as a SWMR writer.
+            A read-only open falls back to a SWMR reader, if a SWMR writer
+            holds the file.
+        kwargs: dict
+            Extra arguments for h5py.File, used only if the file is opened.
+            For in-memory files, 'backing_file' is the name of the disk
+            file the core driver writes to, if 'backing_store' is True.
+        """
+
+        if mode not in ('r', 'a', 'w-'):
+            raise ValueError("Unsupported file mode '%s'." % (mode))
+
+        key = file_key(filename)
+        if mode != 'r':
+            for hook in self.write_hooks:
+                try:
+                    hook(key)
+                except Exception, e:
+                    logger.info(e)
+
+        with self._lock:
+
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                if mode == 'w-':
+                    self._entries[key] = entry
+                    raise IOError("File '%s' exists." % (filename))
+                if not self._is_current(entry, key, stamp) or \
+                   (mode == 'a' and not entry.writable) or \
+                   (mode == 'a' and swmr and not entry.swmr):
+                    self._commit(key, entry)
+                    self._close_entry(entry)
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+                entry = self._open(filename, mode, stamp, swmr, kwargs)
+            else:
+                self.hits += 1
+                if mode == 'r':
+                    self._commit(key, entry)
+
+            # (re-)insert as the most recently used entry
+            self._entries[key] = entry
+            self._evict()
+
+            return entry.handle
+
+    def flush(self, filename=None):
+        """
+        Flushes one or all writable pooled handles and returns the number
+        of handles flushed.
+        """
+
+        count = 0
+        with self._lock:
+            for key, entry in self._select(filename):
+                if entry.writable and entry.handle.id.valid:
+                    self._commit(key, entry)
+                    entry.handle.flush()
+                    entry.stamp = file_stamp(key)
+                    count += 1
+        return count
+
+    def close(self, filename=None):
+        """
+        Closes one or all pooled handles and returns the number of handles
+        closed.
+        """
+
+        count = 0
+        with self._lock:
+            for key, entry in self._select(filename):
+                del self._entries[key]
+                self._commit(key, entry)
+                self._close_entry(entry)
+                count += 1
+        return count
+
+    def reconfigure(self):
+        """
+        Closes the (on-disk) handles whose chunk cache settings are out of
+        date and returns the number of handles closed.
+        """
+
+        count = 0
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if not is_memory_file(key) and \
+                   entry.rdcc != chunk_cache_settings(key):
+                    del self._entries[key]
+                    self._commit(key, entry)
+                    self._close_entry(entry)
+                    count += 1
+        return count
+
+    def touch(self, filename):
+        """
+        Records the current file stamp of a writable pooled handle. (We
+        don't want to re-open a file because of our own writes.)
+        """
+
+        with self._lock:
+            entry = self._entries.get(file_key(filename))
+            if entry is not None and entry.writable:
+                entry.stamp = file_stamp(filename)
+
+    def is_open(self, filename, stamp):
+        """
+        Returns True if the pool has a current handle for filename.
+        """
+
+        with self._lock:
+            entry = self._entries.get(file_key(filename))
+            return entry is not None and entry.handle.id.valid and \
+                entry.stamp == stamp
+
+    def key_of(self, loc):
+        """
+        Returns the key of the pooled handle loc belongs to, or None.
+        """
+
+        fileno = loc.id.fileno
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.handle.id.valid and \
+                   entry.handle.id.fileno == fileno:
+                    return key
+        return None
+
+    def info(self):
+        """
+        Returns a list of (key, value) pairs describing the pool.
+        """
+
+        with self._lock:
+            memory = len([k for k in self._entries if is_memory_file(k)])
+            return [('Open files:', len(self._entries)),
+                    ('In-memory files:', memory),
+                    ('Max. open files:', self.max_files),
+                    ('Hits:', self.hits),
+                    ('Misses:', self.misses)]
+
+    def _select(self, filename):
+        if filename is None:
+            return list(self._entries.items())
+        key = file_key(filename)
+        if key in self._entries:
+            return [(key, self._entries[key])]
+        return []
+
+    def _open(self, filename, mode, stamp, swmr, kwargs):
+        name = filename
+        if is_memory_file(filename):
+            if mode != 'w-':
+                raise IOError("In-memory file '%s' not found." % (filename))
+            kwargs = dict(kwargs, driver='core')
+            name = kwargs.pop('backing_file', None) or filename
+
+        rdcc = chunk_cache_settings(filename)
+        kwargs = dict(kwargs, rdcc_nbytes=rdcc[0], rdcc_nslots=rdcc[1],
+                      rdcc_w0=rdcc[2])
+
+        swmr = swmr and mode == 'a'
+        if swmr:
+            kwargs['libver'] = 'latest'
+        try:
+            handle = h5py.File(name, mode, **kwargs)
+        except IOError:
+            if mode != 'r':
+                raise
+            # a SWMR writer has the file open (and locked)
+            kwargs.update(libver='latest', swmr=True)
+            handle = h5py.File(filename, 'r', **kwargs)
+        if swmr:
+            try:
+                handle.swmr_mode = True
+            except ValueError, e:  # the file format is too old
+                logger.info(e)
+                handle.close()
+                raise IOError("File '%s' doesn't support SWMR." % (filename))
+        if mode != 'r' or stamp is None:
+            stamp = file_stamp(filename)
+        return PoolEntry(handle, mode != 'r', stamp,
+                         getattr(handle, 'swmr_mode', False), rdcc)
+
+    def _is_current(self, entry, key, stamp):
+        if not entry.handle.id.valid:  # somebody closed it
+            return False
+        if entry.swmr or is_memory_file(key):
+            return True
+        if stamp is None:
+            stamp = file_stamp(key)
+        return entry.stamp is not None and entry.stamp == stamp
+
+    def _commit(self, key, entry):
+        if self.commit_hook is not None and entry.handle.id.valid:
+            try:
+                self.commit_hook(key, entry.handle)
+            except Exception, e:
+                logger.info(e)
+
+    def _close_entry(self, entry):
+        try:
+            if entry.handle.id.valid:
+                entry.handle.close()
+        except Exception, e:
+            logger.info(e)
+
+    def _evict(self):
+        keys = [k for k in self._entries if not is_memory_file(k)]
+        while len(keys) > max(self.max_files, 1):
+            key = keys.pop(0)
+            entry = self._entries.pop(key)
+            self._commit(key, entry)
+            self._close_entry(entry)
+
+_pool = FilePool(Tuning.MAX_OPEN_FILES)
+
+# memoized file_exists() answers keyed by (file key, file stamp)
+
+_signature_cache = LRUCache(Tuning.MAX_OPEN_FILES * 16)
+
+#==============================================================================
+
+
+@contextmanager
+def pooled_file(filename, mode='r', **kwargs):
+    """
+    A replacement for 'with h5py.File(filename, mode) as f:' that takes the
+    handle from the file pool and leaves it open on exit. Writable handles
+    are flushed on exit.
+    """
+
+    f = _pool.acquire(filename, mode, **kwargs)
+    try:
+        yield f
+    finally:
+        if mode != 'r':
+            _pool.flush(filename)
+
+#==============================================================================
+
+
+@contextmanager
+def validated_file(filename, mode='r'):
+    """
+    Like pooled_file(), but yields None instead of raising an error, if
+    filename is not an HDF5 file.
+
+    This is file_exists() and pooled_file() rolled into one: the file is
+    stat'ed once, and opening it is the signature check.
+    """
+
+    if not isinstance(filename, str):
+        raise TypeError('String expected.')
+
+    stamp = file_stamp(filename)
+    key = (file_key(filename), stamp)
+
+    f = None
+    if is_memory_file(filename):
+        if _pool.is_open(filename, None):
+            f = _pool.acquire(filename, mode)
+    elif stamp is not None and _signature_cache.get(key) is not False:
+        try:
+            f = _pool.acquire(filename, mode, stamp)
+        except IOError:
+            pass
+        if mode == 'r':
+            _signature_cache.put(key, f is not None)
+
+    try:
+        yield f
+    finally:
+        if f is not None and mode != 'r':
+            _pool.flush(filename)
+
+#==============================================================================
+
+
+def new_memory_file(filename, increment=None, backing_file=''):
+    """
+    Creates an in-memory HDF5 file known as filename ('mem://...').
+
+    The core driver grows the file in steps of 'increment' bytes. If
+    'backing_file' is not empty, the file's contents are written to that
+    disk file when it is flushed or closed.
+    """
+
+    if not is_memory_file(filename):
+        raise ValueError("In-memory file name expected.")
+
+    if increment is None:
+        increment = Tuning.CORE_INCREMENT
+
+    return _pool.acquire(filename, 'w-', libver='latest',
+                         block_size=int(increment),
+                         backing_store=(backing_file != ''),
+                         backing_file=backing_file)
+
+#==============================================================================
+
+
+def pool_key(loc):
+    """
+    Returns the file pool key of the file loc belongs to.
+    """
+
+    key = _pool.key_of(loc)
+    if key is None:
+        filename = loc.file.filename
+        if isinstance(filename, unicode):
+            filename = filename.encode(sys.getfilesystemencoding())
+        key = file_key(filename)
+    return key
+
+#==============================================================================
+
+
+def flush_files(filename=None):
+    """
+    Flushes the pooled handle of filename, or all pooled handles,
+    if filename is None.
+    """
+    return _pool.flush(filename)
+
+#==============================================================================
+
+
+def close_files(filename=None):
+    """
+    Closes the pooled handle of filename, or all pooled handles,
+    if filename is None.
+    """
+    return _pool.close(filename)
+
+#==============================================================================
+
+
+def pool_info():
+    """
+    Returns a list of (key, value) pairs describing the file pool.
+    """
+    return _pool.info()
@@ -0,0 +1,415 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+import operator
+import re
+
+import numpy as np
+
+from config import Tuning
+from read_helpers import field_subset, read_hyperslab
+
+logger = logging.getLogger(__name__)
+
+# the tokens of a filter expression: numbers, 'strings' ('' is a quote),
+# "column names" (for names that aren't identifiers), identifiers (column
+# names or keywords), and operators
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?) |
+    '(?P<string>(?:[^']|'')*)' |
+    "(?P<name>[^"]+)" |
+    (?P<ident>[A-Za-z_][A-Za-z0-9_.]*) |
+    (?P<op><=|>=|<>|!=|==|=|<|>|\(|\)|,)
+    )""", re.VERBOSE)
+
+_KEYWORDS = ('AND', 'OR', 'NOT', 'IN', 'STARTSWITH')
+
+# (the operators, unlike the ufuncs, also compare string arrays)
+
+_COMPARISONS = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne, '<>': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge
+}
+
+#==============================================================================
+
+
+def tokenize(s):
+    """
+    Splits the filter expression 's' into a list of (kind, value) tokens,
+    where kind is one of 'number', 'string', 'name', 'keyword', or 'op'.
+    """
+
+    tokens = []
+    pos = 0
+    s = s.rstrip()
+    while pos < len(s):
+        m = _TOKEN.match(s, pos)
+        if m is None or m.end() == pos:
+            raise ValueError("Invalid filter near '%s'." % (s[pos:].strip()))
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == 'number':
+            value = float(value) if re.search('[.eE]', value) else int(value)
+        elif kind == 'string':
+            value = value.replace("''", "'")
+        elif kind == 'ident':
+            if value.upper() in _KEYWORDS:
+                kind, value = 'keyword', value.upper()
+            else:
+                kind = 'name'
+        tokens.append((kind, value))
+    return tokens
+
+#==============================================================================
+
+
+class Filter(object):
+    """
+    A parsed filter expression over the columns of a table.
+
+    'columns' lists the columns the expression refers to (in order of
+    appearance). Calling the filter with a record array (which must have
+    at least these fields) returns the boolean mask of the matching records.
+
+    Grammar (keywords are case-insensitive):
+
+      expr       := term {OR term}
+      term       := factor {AND factor}
+      factor     := NOT factor | '(' expr ')' | condition
+      condition  := column op value
+                  | column IN '(' value {',' value} ')'
+                  | column STARTSWITH string
+      op         := = | == | != | <> | < | <= | > | >=
+    """
+
+    def __init__(self, s, dtype):
+        self.text = s
+        self.dtype = dtype
+        self.columns = []
+        self.tokens = tokenize(s)
+        if len(self.tokens) == 0:
+            raise ValueError('Empty filter.')
+        self.pos = 0
+        self.tree = self.parse_expr()
+        if self.pos < len(self.tokens):
+            raise ValueError("Unexpected '%s' in filter." %
+                             (self.tokens[self.pos][1]))
+        del self.tokens
+
+    # parsing
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def take(self, kind=None, value=None):
+        k, v = self.peek()
+        if k is None:
+            raise ValueError('Incomplete filter.')
+        if (kind is not None and k != kind) or \
+           (value is not None and v != value):
+            raise ValueError("Unexpected '%s' in filter." % (v))
+        self.pos += 1
+        return v
+
+    def parse_expr(self):
+        node = self.parse_term()
+        while self.peek() == ('keyword', 'OR'):
+            self.pos += 1
+            node = ('or', node, self.parse_term())
+        return node
+
+    def parse_term(self):
+        node = self.parse_factor()
+        while self.peek() == ('keyword', 'AND'):
+            self.pos += 1
+            node = ('and', node, self.parse_factor())
+        return node
+
+    def parse_factor(self):
+        if self.peek() == ('keyword', 'NOT'):
+            self.pos += 1
+            return ('not', self.parse_factor())
+        if self.peek() == ('op', '('):
+            self.pos += 1
+            node = self.parse_expr()
+            self.take('op', ')')
+            return node
+        return self.parse_condition()
+
+    def parse_condition(self):
+        col = self.take('name')
+        if self.dtype.names is None or col not in self.dtype.names:
+            raise ValueError("Unknown column '%s'." % (col))
+        if col not in self.columns:
+            self.columns.append(col)
+
+        kind, op = self.peek()
+        self.take()
+        if kind == 'op' and op in _COMPARISONS:
+            return ('cmp', op, col, self.parse_value(col))
+        if (kind, op) == ('keyword', 'IN'):
+            self.take('op', '(')
+            values = [self.parse_value(col)]
+            while self.peek() == ('op', ','):
+                self.pos += 1
+                values.append(self.parse_value(col))
+            self.take('op', ')')
+            return ('in', col, values)
+        if (kind, op) == ('keyword', 'STARTSWITH'):
+            if not is_string_column(self.dtype[col]):
+                raise ValueError("Column '%s' is not a string column." %
+                                 (col))
+            return ('prefix', col, self.take('string'))
+        raise ValueError("Unexpected '%s' in filter." % (op))
+
+    def parse_value(self, col):
+        kind, value = self.peek()
+        if kind is None:
+            raise ValueError('Incomplete filter.')
+        if is_string_column(self.dtype[col]):
+            if kind != 'string':
+                raise ValueError("A string is expected for column '%s'." %
+                                 (col))
+        elif kind != 'number':
+            raise ValueError("A number is expected for column '%s'." % (col))
+        self.pos += 1
+        return value
+
+    # evaluation
+
+    def __call__(self, x):
+        return evaluate(self.tree, x)
+
+    def chunks(self, zones):
+        """
+        Returns a boolean per chunk of the table's zone map 'zones', which
+        is False if none of the chunk's records can match.
+        """
+        return evaluate_zones(self.tree, zones)[0]
+
+#==============================================================================
+
+
+def is_string_column(dty):
+    """
+    Returns True if the field type 'dty' is a (fixed- or variable-length)
+    string type.
+    """
+    return dty.char in ('S', 'U', 'O')
+
+#==============================================================================
+
+
+def evaluate(node, x):
+    """
+    Evaluates the parsed expression 'node' on all records of the record
+    array 'x' at once, and returns a boolean mask.
+    """
+
+    op = node[0]
+    if op == 'and':
+        return evaluate(node[1], x) & evaluate(node[2], x)
+    if op == 'or':
+        return evaluate(node[1], x) | evaluate(node[2], x)
+    if op == 'not':
+        return ~evaluate(node[1], x)
+
+    col = x[node[2] if op == 'cmp' else node[1]]
+    if op == 'cmp':
+        return np.asarray(_COMPARISONS[node[1]](col, node[3]), dtype=bool)
+    if op == 'in':
+        return np.in1d(col, node[2])
+    if op == 'prefix':
+        if col.dtype.char == 'O':
+            col = col.astype(str)
+        return np.char.startswith(col, node[2])
+    raise ValueError("Unknown filter node '%s'." % (op))
+
+#==============================================================================
+
+
+def evaluate_zones(node, z):
+    """
+    Evaluates the parsed expression 'node' on the chunk summaries of the
+    zone map 'z' and returns two boolean arrays: whether some records of a
+    chunk may match, and whether all of them do (as far as we can tell).
+    Columns without summaries (strings) may always match.
+    """
+
+    op = node[0]
+    if op in ('and', 'or'):
+        may1, every1 = evaluate_zones(node[1], z)
+        may2, every2 = evaluate_zones(node[2], z)
+        if op == 'and':
+            return may1 & may2, every1 & every2
+        return may1 | may2, every1 | every2
+    if op == 'not':
+        may, every = evaluate_zones(node[1], z)
+        return ~every, ~may
+
+    col = node[2] if op == 'cmp' else node[1]
+    if z.dtype.names is None or col not in z.dtype.names:
+        return np.ones(z.shape, dtype=bool), np.zeros(z.shape, dtype=bool)
+
+    # (NaNs are compared as not equal to anything)
+    lo = z[col]['min']
+    hi = z[col]['max']
+    clean = z[col]['nans'] == 0
+    if op == 'in':
+        may = np.zeros(z.shape, dtype=bool)
+        for v in node[2]:
+            may |= (lo <= v) & (v <= hi)
+        return may, np.zeros(z.shape, dtype=bool)
+    if op == 'prefix':
+        return np.ones(z.shape, dtype=bool), np.zeros(z.shape, dtype=bool)
+
+    v = node[3]
+    cmp = node[1]
+    if cmp in ('=', '=='):
+        return (lo <= v) & (v <= hi), (lo == v) & (hi == v) & clean
+    if cmp in ('!=', '<>'):
+        return ~((lo == v) & (hi == v) & clean), (v < lo) | (v > hi)
+    if cmp == '<':
+        return lo < v, (hi < v) & clean
+    if cmp == '<=':
+        return lo <= v, (hi <= v) & clean
+    if cmp == '>':
+        return hi > v, (lo > v) & clean
+    return hi >= v, (lo >= v) & clean
+
+#==============================================================================
+
+
+def parse_filter(s, dtype):
+    """
+    Parses the filter expression 's' over the columns of the compound type
+    'dtype'. Returns a Filter, or raises a ValueError with a message
+    that can be shown to the user.
+    """
+    return Filter(s, dtype)
+
+#==============================================================================
+
+
+def filter_rows(dset):
+    """
+    Returns the number of rows of the blocks in which a filter is evaluated
+    on the table 'dset': about Tuning.FILTER_BLOCK_BYTES (in the file),
+    and a multiple of the chunk's rows.
+    """
+
+    rows = max(Tuning.FILTER_BLOCK_BYTES / max(dset.dtype.itemsize, 1), 1)
+    if dset.chunks is not None:
+        c = dset.chunks[0]
+        rows = max(rows / c, 1) * c
+    return rows
+
+#==============================================================================
+
+
+def clip_rows(start, stop, step, lo, hi):
+    """
+    Returns the slice of the rows of the selection start:stop:step in
+    [lo, hi), or None, if there are none.
+    """
+
+    hi = min(hi, stop)
+    first = start + -(-(max(lo, start) - start) / step) * step
+    if first < hi:
+        return slice(first, hi, step)
+    return None
+
+#==============================================================================
+
+
+def iter_row_blocks(slc, nrows, rows, chunk=None, may=None):
+    """
+    Splits the row selection 'slc' of a table with nrows rows along the
+    boundaries of blocks of 'rows' rows. Yields a slice per block that
+    holds selected rows.
+
+    If 'may' is given (a boolean per chunk of 'chunk' rows), only the rows
+    of the chunks for which it's True are yielded, a run of adjacent chunks
+    at a time.
+    """
+
+    start, stop, step = slc.indices(nrows)
+    if start >= stop:
+        return
+    for lo in xrange(start / rows * rows, stop, rows):
+        hi = lo + rows
+        if may is None:
+            s = clip_rows(start, stop, step, lo, hi)
+            if s is not None:
+                yield s
+            continue
+        # the runs of candidate chunks in [lo, hi)
+        k = lo / chunk
+        while k * chunk < min(hi, stop):
+            if not may[k]:
+                k += 1
+                continue
+            j = k
+            while j * chunk < min(hi, stop) and may[j]:
+                j += 1
+            s = clip_rows(start, stop, step, k * chunk, j * chunk)
+            if s is not None:
+                yield s
+            k = j
+
+#==============================================================================
+
+
+def read_filtered(dset, slc, filt, mem_type, max_rows, names=None,
+                  may=None):
+    """
+    Reads the records of the table 'dset' in the row selection 'slc' that
+    match the Filter 'filt', as type 'mem_type', which must contain the
+    filter's columns. If 'names' is given, only these fields of the matching
+    records are kept. If 'may' is given (see Filter.chunks()), the chunks
+    that can't hold matching records are skipped.
+
+    The table is read and the filter evaluated a block of rows at a time,
+    and only the matching records are kept. Returns None if more than
+    max_rows records match.
+    """
+
+    out_type = mem_type if names is None else field_subset(mem_type, names)
+    rows = filter_rows(dset)
+    chunk = None if dset.chunks is None else dset.chunks[0]
+    pieces = []
+    count = 0
+    for s in iter_row_blocks(slc, dset.shape[0], rows, chunk, may):
+        x = read_hyperslab(dset, (s,), mem_type)
+        mask = filt(x)
+        k = int(np.count_nonzero(mask))
+        if k == 0:
+            continue
+        count += k
+        if count > max_rows:
+            return None
+        x = x[mask]
+        if out_type != mem_type:
+            y = np.empty(x.shape, dtype=out_type)
+            for n in names:
+                y[n] = x[n]
+            x = y
+        pieces.append(x)
+
+    if len(pieces) == 0:
+        return np.empty((0,), dtype=out_type)
+    return np.concatenate(pieces)
@@ -9,8 +9,17 @@
 # request a copy from help@hdfgroup.org.                                     #
 ##############################################################################
 
+import logging
+import posixpath
+
 import h5py
 
+from cache_helpers import LRUCache
+from config import Tuning
+from file_helpers import pooled_file
+
+logger = logging.getLogger(__name__)
+
 #==============================================================================
 
 
@@ -25,6 +34,281 @@ def is_h5_location_handle(loc):
 #==============================================================================
 
 
+# h5py classes for the HDF5 object types reported by H5Oget_info
+
+_obj_classes = {
+    h5py.h5o.TYPE_GROUP: h5py.Group,
+    h5py.h5o.TYPE_DATASET: h5py.Dataset,
+    h5py.h5o.TYPE_NAMED_DATATYPE: h5py.Datatype
+}
+
+
+class PathSegment(object):
+    """
+    One resolved segment of an HDF5 path: the (absolute) path up to and
+    including the segment, the link type and link, the class of the object
+    the link resolves to (None for dangling or unknown links), and the
+    object's address in the file.
+    """
+
+    def __init__(self, path, link_type, link, cls, token):
+        self.path = path
+        self.link_type = link_type
+        self.link = link
+        self.cls = cls
+        self.token = token
+
+#==============================================================================
+
+
+def path_names(loc, path):
+    """
+    Returns the list of link names along the absolute HDF5 path of
+    (loc, path).
+    """
+
+    if path.startswith('/') or isinstance(loc, h5py.File):
+        abspath = path
+    else:
+        abspath = posixpath.join(loc.name, path)
+    return [n for n in abspath.split('/') if n not in ('', '.')]
+
+#==============================================================================
+
+
+def absolute_path(loc, path):
+    """
+    Returns the (normalized) absolute HDF5 path of (loc, path).
+    """
+    return '/' + '/'.join(path_names(loc, path))
+
+#==============================================================================
+
+
+def resolve_path(loc, path):
+    """
+    Walks 'path' once, starting at 'loc', and returns a list of PathSegment
+    instances, one for the root group and one for each path segment that
+    exists.
+
+    The walk stops at the first missing link, or at the first link that
+    does not resolve to a group. (The caller can tell from the length of the
+    list how far we got.) Each segment costs a constant number of H5L/H5O
+    calls, so the whole walk is O(depth).
+    """
+
+    if not (is_h5_location_handle(loc) and isinstance(path, str)):
+        return []
+
+    names = path_names(loc, path)
+
+    cur = loc.id
+    if not isinstance(loc, h5py.File):
+        cur = h5py.h5g.open(loc.id, '/')
+
+    root = h5py.h5o.get_info(cur)
+    result = [PathSegment('/', None, None, h5py.Group, root.addr)]
+
+    ppath = ''
+    for i in range(len(names)):
+
+        name = names[i]
+        ppath += '/' + name
+
+        if not cur.links.exists(name):
+            break
+
+        # h5py has no link classes for user-defined links
+        linfo = cur.links.get_info(name)
+        link_type = linfo.type
+        if link_type == h5py.h5l.TYPE_HARD:
+            link = h5py.HardLink()
+        elif link_type == h5py.h5l.TYPE_SOFT:
+            link = h5py.SoftLink(cur.links.get_val(name))
+        elif link_type == h5py.h5l.TYPE_EXTERNAL:
+            link = h5py.ExternalLink(*cur.links.get_val(name))
+        else:
+            link = None
+
+        cls = None
+        token = None
+        if link is not None:
+            try:
+                oinfo = h5py.h5o.get_info(cur, name)
+                cls = _obj_classes.get(oinfo.type)
+                token = oinfo.addr
+            except (KeyError, RuntimeError):  # dangling link
+                pass
+
+        result.append(PathSegment(ppath, link_type, link, cls, token))
+
+        if cls != h5py.Group or i == len(names)-1:
+            break
+
+        cur = h5py.h5o.open(cur, name)
+
+    return result
+
+#==============================================================================
+
+
+class ObjectInfo(object):
+    """
+    What we know about the object behind an HDF5 path: the link type, the
+    object class and, for datasets, the shape, maximum shape, element type,
+    chunk dimensions, and filter pipeline.
+    """
+
+    def __init__(self):
+        self.known_link_type = True
+        self.link = None
+        self.cls = None
+        self.shape = None
+        self.maxshape = None
+        self.dtype = None
+        self.chunks = None
+        self.filters = None
+
+# cache of ObjectInfo instances keyed by (file number, absolute path)
+
+_object_info_cache = LRUCache(Tuning.MAX_CACHED_OBJECTS)
+
+#==============================================================================
+
+
+def object_info_key(loc, path):
+    """
+    Returns the metadata cache key for (loc, path).
+
+    HDF5 assigns a new file number each time a file is opened, i.e., entries
+    become unreachable once the file is closed.
+    """
+    return (loc.id.fileno, absolute_path(loc, path))
+
+#==============================================================================
+
+
+def segment_info(loc, seg):
+    """
+    Returns an ObjectInfo instance for a resolved path segment.
+    """
+
+    info = ObjectInfo()
+    info.link = seg.link
+    info.known_link_type = seg.link_type is None or seg.link is not None
+    info.cls = seg.cls
+
+    if info.cls == h5py.Dataset:
+        dset = loc[seg.path]
+        info.shape = dset.shape
+        info.maxshape = dset.maxshape
+        info.dtype = dset.dtype
+        info.chunks = dset.chunks
+        dcpl = dset.id.get_create_plist()
+        info.filters = tuple([dcpl.get_filter(i)[0]
+                              for i in range(dcpl.get_nfilters())])
+
+    return info
+
+#==============================================================================
+
+
+def object_info(loc, path):
+    """
+    Returns an ObjectInfo instance for the object at (loc, path) or None,
+    if there is no such path.
+
+    The results are cached, and writers must call invalidate_object_info()
+    after modifying an object. A cache miss resolves the path in a single
+    pass and caches what we learned about all its prefixes.
+    """
+
+    if not (is_h5_location_handle(loc) and isinstance(path, str)):
+        return None
+    if path == '':
+        return None
+
+    key = object_info_key(loc, path)
+    info = _object_info_cache.get(key)
+    if info is not None:
+        return info
+
+    segments = resolve_path(loc, path)
+    fileno = key[0]
+    for seg in segments:
+        info = segment_info(loc, seg)
+        _object_info_cache.put((fileno, seg.path), info)
+
+    # we don't cache what's not there
+    if len(segments) != len(path_names(loc, path)) + 1:
+        return None
+
+    return info
+
+#==============================================================================
+
+
+def invalidate_object_info(loc, path):
+    """
+    Drops (loc, path) from the metadata cache.
+    """
+
+    if is_h5_location_handle(loc) and isinstance(path, str):
+        _object_info_cache.pop(object_info_key(loc, path))
+
+#==============================================================================
+
+
+def is_swmr_reader(loc):
+    """
+    Returns True if loc belongs to a file opened as a SWMR reader.
+    """
+
+    # (File.swmr_mode is not reliable, it is not set on loc.file)
+    swmr_read = getattr(h5py.h5f, 'ACC_SWMR_READ', 0)
+    return is_h5_location_handle(loc) and \
+        bool(loc.file.id.get_intent() & swmr_read)
+
+#==============================================================================
+
+
+def refresh_dataset(loc, path):
+    """
+    If loc belongs to a SWMR reader, refreshes the dataset at (loc, path) and
+    drops it from the metadata cache. (The writer may have extended it.)
+    Returns True if the dataset was refreshed.
+
+    Handles kept open elsewhere (see chunk_helpers.open_dataset) must be
+    refreshed separately, each handle has its own view of the metadata.
+    """
+
+    if not is_swmr_reader(loc):
+        return False
+
+    try:
+        dset = loc[path]
+        if not isinstance(dset, h5py.Dataset):
+            return False
+        dset.refresh()
+    except Exception, e:
+        logger.info(e)
+        return False
+
+    invalidate_object_info(loc, path)
+    return True
+
+#==============================================================================
+
+
+def object_info_stats():
+    """
+    Returns a list of (key, value) pairs describing the metadata cache.
+    """
+    return _object_info_cache.info()
+
+#==============================================================================
+
+
 def resolvable(loc, path):
     """
     Returns if (loc, path) can be resolved to an HDF5 object.
@@ -33,12 +317,8 @@ def resolvable(loc, path):
     if not isinstance(path, str):
         raise TypeError("'path' must be a string.")
 
-    if is_h5_location_handle(loc) and (path in loc):
-        try:
-            obj = loc.get(path, getclass=True)
-            return True
-        except KeyError:
-            return False
+    info = object_info(loc, path)
+    return info is not None and info.cls is not None
 
 #==============================================================================
 
@@ -55,29 +335,13 @@ def path_is_valid_wrt_loc(loc, path):
 
     """
 
-    if is_h5_location_handle(loc) and isinstance(path, str) and (path in loc):
-        if path != '/':
-            try:
-
-                # h5py throws an error when it encounters an unknown link type,
-                # e.g., user-defined links
-
-                link_type = loc.get(path, getlink=True)
-                known_link_type = True
-
-            except:  #FIXME: what kind of error is raised by h5py?
-
-                known_link_type = False
-                link_type = None
-                pass
-
-            return (known_link_type, link_type)
-        else:
-            # '/' is always valid with respect to a valid location
-            return (True, None)
-    else:
+    info = object_info(loc, path)
+    if info is None:
         return (False, None)
 
+    # '/' is always valid with respect to a valid location
+    return (info.known_link_type, info.link)
+
 #==============================================================================
 
 
@@ -110,48 +374,41 @@ def path_is_available_for_obj(loc, path, obj_type):
     if path == '/' and obj_type != h5py.Group:  # can't have that
         return False
 
-    is_absolute = False
-    if path[0] == '/':  # get rid of a leading slash (trouble when splitting)
-        is_absolute = True
-        path = path[1:]
+    a = [n for n in path.split('/') if n not in ('', '.')]
 
-    a = path.split('/')
-    ppath = ''  # keep track of the current path
-    if is_absolute:
-        ppath = '/'
+    # resolve the path in one go and see what we've got
+    # (skip the root group and the segments leading to loc)
 
-    # traverse the path segments and see what we've got
+    base = len(path_names(loc, path)) - len(a) + 1
+    segments = resolve_path(loc, path)[base:]
 
     for i in range(len(a)):
-        ppath += a[i]
 
-        if ppath not in loc:  # unused -> all set
+        if i >= len(segments):  # unused -> all set
             return True
-        else:  # path is in use
 
-            if len(a) == 1 or i == len(a)-1:  # this is the final leg
+        cur_type = segments[i].cls
 
-                if resolvable(loc, ppath):
+        if i == len(a)-1:  # this is the final leg
 
-                    cur_type = loc.get(ppath, getclass=True)
-                    if cur_type != obj_type:
-                        return False
-                    if obj_type == h5py.Group:  # group exists
-                        return True
-                    else:  # path in use and not a group. can't overwrite.
-                        return False
+            if cur_type is not None:
 
-                else:  # cannot be resolved (dangling link)
+                if cur_type != obj_type:
                     return False
-
-            else:  # this is not the final leg -> must be group to continue
-                if resolvable(loc, ppath):
-                    if loc.get(ppath, getclass=True) != h5py.Group:
-                        return False
-                else:  # cannot be resolved (dangling link)
+                if obj_type == h5py.Group:  # group exists
+                    return True
+                else:  # path in use and not a group. can't overwrite.
                     return False
 
-        ppath += '/'
+            else:  # cannot be resolved (dangling link)
+                return False
+
+        else:  # this is not the final leg -> must be group to continue
+            if cur_type is not None:
+                if cur_type != h5py.Group:
+                    return False
+            else:  # cannot be resolved (dangling link)
+                return False
 
 #=============================================================================
 
@@ -165,10 +422,10 @@ def is_object(filename, path):
 
     ret = False
     try:
-        with h5py.File(filename, 'r') as f:
+        with pooled_file(filename) as f:
             # is dataset or group
-            cls = f.get(path, getclass=True)
-            ret = (cls == h5py.Dataset) or (cls == h5py.Group)
+            info = object_info(f, path)
+            ret = info is not None and info.cls in (h5py.Dataset, h5py.Group)
     except Exception:
         pass
     return ret
@@ -186,8 +443,9 @@ def object_has_attribute(filename, path, attr):
 
     ret = False
     try:
-        with h5py.File(filename, 'r') as f:
-            ret = attr in f[path].attrs
+        with pooled_file(filename) as f:
+            if resolvable(f, path):
+                ret = attr in f[path].attrs
     except Exception:
         pass
     return ret
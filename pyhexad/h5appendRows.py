@@ -15,14 +15,18 @@ import h5py
 import numpy as np
 from pyxll import xl_func
 
-from h5_helpers import is_h5_location_handle, resolvable
+from batch_helpers import batched_file, write_batch
+from h5_helpers import invalidate_object_info, is_h5_location_handle, \
+    object_info, resolvable
+from index_helpers import invalidate_indexes, update_indexes
+from zone_helpers import invalidate_zones, update_zones
 
 logger = logging.getLogger(__name__)
 
 #=============================================================================
 
 
-def append_rows(loc, path, rows):
+def append_rows(loc, path, rows, batch=None):
     """
     Append rows to an existing table and returns the number of appended rows. 
 
@@ -34,7 +38,8 @@ def append_rows(loc, path, rows):
         The path of the HDF5 table.
     rows: var[]
         The rows to be appended.
-
+    batch: WriteBatch
+        If not None, the write is queued with this batch (optional).
     """
 
     ret = path
@@ -51,11 +56,12 @@ def append_rows(loc, path, rows):
     # is the location valid?
     if not resolvable(loc, path):
         return "HDF5 table at '%s' not found." % (path)
-    if loc.get(path, getclass=True) != h5py.Dataset:
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
         return "The object at '%s' is not an HDF5 table." % (path)
     
     dset = loc[path]
-    file_type = dset.dtype
+    file_type = info.dtype
 
     # try to convert the ROWS list-of-lists into a Numpy array
     
@@ -77,17 +83,34 @@ def append_rows(loc, path, rows):
     
     try:
 
-        curr_rows = dset.shape[0]
+        curr_rows = info.shape[0]
         new_rows = len(rows)
 
         dset.resize((curr_rows + new_rows,))
-        dset[curr_rows:] = a
+        invalidate_object_info(loc, path)
+        slc = slice(curr_rows, curr_rows + new_rows, 1)
+
+        # keep the column indexes and the zone map (if any) up to date,
+        # before the rows are written or queued
+        update_indexes(loc, path, curr_rows, curr_rows, a)
+        update_zones(loc, path, (curr_rows,), (slc,), a)
+
+        if batch is None:
+            dset[curr_rows:] = a
+        else:
+            batch.add(loc, path, (slc,), a)
 
         ret = "%d rows appended." % (new_rows)
 
     except Exception, e:
         print e
         logger.info(e)
+        # the indexes and the zone map may describe rows never written
+        try:
+            invalidate_indexes(loc, path)
+            invalidate_zones(loc, path)
+        except Exception, e:
+            logger.info(e)
         ret = 'Write failed.'
 
     return ret
@@ -95,17 +118,18 @@ def append_rows(loc, path, rows):
 #=============================================================================
 
 
-@xl_func("string filename, string tablename, var[] rows: var",
+@xl_func("string filename, string tablename, var[] rows, var swmr: var",
          category="HDF5",
          thread_safe=False,
          disable_function_wizard_calc=True)
-def h5appendRows(filename, tablename, rows):
+def h5appendRows(filename, tablename, rows, swmr):
     """
     Appends rows to an exisiting HDF5 table.
 
     :param filename: the name of an HDF5 file
     :param tablename: the path name of an HDF5 table
     :param rows: an Excel range of rows
+    :param swmr: if TRUE, append as a SWMR writer (optional)
     :returns: A string, the number of rows appended
     """
 
@@ -119,35 +143,43 @@ def h5appendRows(filename, tablename, rows):
     if not isinstance(tablename, str):
         raise TypeError("'tablename' must be a string.")
 
+    if swmr is not None and not isinstance(swmr, (bool, float)):
+        raise TypeError("'swmr' must be a boolean.")
+    swmr = bool(swmr)
+
     try:
 
-        with h5py.File(filename, 'a') as f:
+        with batched_file(filename, swmr) as f:
 
             # does the table exist?
             if not resolvable(f, tablename):
                 return 'Table not found.'
             
             # is it a dataset?
-            if f.get(tablename, getclass=True) != h5py.Dataset:
+            info = object_info(f, tablename)
+            if info.cls != h5py.Dataset:
                 return "The object at '%s' is not an HDF5 table." % \
                     (tablename)
 
             # is it a table shape?
-            dset = f[tablename]
-            if len(dset.shape) != 1 or dset.maxshape != (None,):
+            if len(info.shape) != 1 or info.maxshape != (None,):
                 return "The object at '%s' is not an HDF5 table." % \
                     (tablename)
 
             # is it a table type?
-            if dset.dtype.names is None:
+            if info.dtype.names is None:
                 return "The object at '%s' is not an HDF5 table." % \
                     (tablename)
 
-            ret = append_rows(f, tablename, rows)
+            ret = append_rows(f, tablename, rows, batch=write_batch)
+            ret += write_batch.failure_note(filename)
 
     except IOError, e:
         logger.info(e)
-        ret = "Can't open/create file '%s'." % (filename)
+        if swmr:
+            ret = "Can't open file '%s' as a SWMR writer." % (filename)
+        else:
+            ret = "Can't open/create file '%s'." % (filename)
     except Exception, e:
         logger.info(e)
         return 'Internal error.'
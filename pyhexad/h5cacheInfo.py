@@ -0,0 +1,99 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+import numpy as np
+from pyxll import xl_func
+
+from batch_helpers import write_batch
+from chunk_helpers import open_dataset_stats
+from file_helpers import chunk_cache_settings, pool_info
+from h5_helpers import object_info_stats
+from mmap_helpers import memmap_stats
+from paging_helpers import page_cache_info
+import renderer
+from result_helpers import result_cache_info
+from zone_helpers import zone_map_stats
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def render_cache_info():
+    """
+    Returns a list of key/value pairs describing PyHexad's caches.
+    """
+
+    result = []
+
+    result.append(('File handles', '\0'))
+    result.extend(pool_info())
+
+    result.append(('Object metadata', '\0'))
+    result.extend(object_info_stats())
+
+    result.append(('Open datasets', '\0'))
+    result.extend(open_dataset_stats())
+
+    result.append(('Memory-mapped datasets', '\0'))
+    result.extend(memmap_stats())
+
+    result.append(('Chunk cache', '\0'))
+    nbytes, nslots, w0 = chunk_cache_settings()
+    result.extend([('Bytes:', nbytes), ('Slots:', nslots), ('w0:', w0)])
+
+    result.append(('Results', '\0'))
+    result.extend(result_cache_info())
+
+    result.append(('Pages', '\0'))
+    result.extend(page_cache_info())
+
+    result.append(('Zone maps', '\0'))
+    result.extend(zone_map_stats())
+
+    result.append(('Write batch', '\0'))
+    result.extend(write_batch.info())
+
+    return result
+
+#==============================================================================
+
+
+@xl_func(": string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5cacheInfo():
+    """
+    Display the sizes and hit counts of PyHexad's caches.
+
+    :returns: A string
+    """
+
+#==============================================================================
+
+    lines = render_cache_info()
+
+    dty = h5py.special_dtype(vlen=str)
+    a = np.empty((len(lines), 2), dtype=dty)
+
+    row = 0
+    for l in lines:
+        a[row] = (l[0], str(l[1]))
+        row += 1
+
+    renderer.draw(a)
+
+    return 'PyHexad caches'
@@ -0,0 +1,55 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+from pyxll import xl_func
+
+from batch_helpers import write_batch
+from file_helpers import close_files
+from mmap_helpers import release_memmaps
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+@xl_func("string filename: string",
+         category="HDF5",
+         thread_safe=False,
+         disable_function_wizard_calc=True)
+def h5closeFile(filename):
+    """
+    Closes the handle PyHexad keeps open for an HDF5 file. If no file name
+    is specified, all open handles will be closed.
+
+    :param filename: the name of an HDF5 file (optional)
+    :returns: A string
+    """
+
+#==============================================================================
+
+    if filename is None:
+        filename = ''
+
+    if not isinstance(filename, str):
+        raise TypeError("'filename' must be a string.")
+
+    name = filename if filename.strip() != '' else None
+    try:
+        release_memmaps()
+        count = close_files(name)
+    except Exception, e:
+        logger.info(e)
+        return 'Internal error.'
+
+    # (pending writes are committed first, and may have failed)
+    return '%d files closed.' % (count) + write_batch.failure_note(name)
@@ -0,0 +1,113 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+import logging
+
+import h5py
+from pyxll import xl_func
+
+from chunk_helpers import open_dataset
+from export_helpers import EXPORT_FORMATS, export_dataset, export_format
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def export(loc, path, outfile, fmt):
+    """
+    Exports an HDF5 dataset to the file outfile in the format fmt and returns
+    an error message.
+    """
+
+    # Is this a valid location?
+    is_valid, species = path_is_valid_wrt_loc(loc, path)
+    if not is_valid:
+        return 'Invalid location specified.'
+
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
+    # Do we have a dataset?
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return "Can't open HDF5 dataset '%s'." % (path)
+
+    if fmt not in EXPORT_FORMATS:
+        return "Unknown export format '%s'." % (fmt)
+
+    # Does it have the right shape and type?
+    dsp = info.shape
+    if len(dsp) < 1:
+        return 'Scalar datasets cannot be exported.'
+    if fmt == 'csv':
+        if len(dsp) > 2 or (info.dtype.names is not None and len(dsp) > 1):
+            return 'Only arrays of rank 1 or 2 and tables can be exported ' \
+                'to CSV.'
+    elif info.dtype.hasobject:
+        return 'Variable-length data can only be exported to CSV.'
+
+    try:
+        n = export_dataset(open_dataset(loc, path), outfile, fmt)
+    except IOError, e:
+        logger.info(e)
+        return "Can't write file '%s'." % (outfile)
+    except ValueError, e:  # (including UnicodeError)
+        logger.info(e)
+        return "Can't convert the data of '%s' for export." % (path)
+
+    return "%d rows exported to '%s'." % (n, outfile)
+
+#==============================================================================
+
+
+@xl_func("string filename, string dsetname, string outfile, string format : string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5exportDataset(filename, dsetname, outfile, format):
+    """
+    Exports an HDF5 array or table to a CSV, Numpy (.npy), or raw binary
+    file, without the worksheet size limits.
+
+    :param filename: the name of an HDF5 file
+    :param dsetname: the name of an HDF5 array or table
+    :param outfile: the name of the file to be written
+    :param format: 'csv', 'npy', or 'raw' (optional, default: by extension)
+    :returns: A string
+    """
+
+#==============================================================================
+
+    # sanity check
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+    if not isinstance(dsetname, str):
+        return "'dsetname' must be a string."
+    if not isinstance(outfile, str) or outfile.strip() == '':
+        return "'outfile' must be a non-empty string."
+
+    fmt = export_format(outfile, format)
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        ret = export(f, dsetname, outfile, fmt)
+
+    return ret
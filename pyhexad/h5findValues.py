@@ -0,0 +1,163 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+import numpy as np
+from pyxll import xl_func
+
+from chunk_helpers import open_dataset
+from config import Limits, Tuning
+from convert_helpers import convert_ints, native_dtype
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from read_helpers import read_hyperslab
+from reduce_helpers import block_shape, iter_blocks
+import renderer
+from zone_helpers import note_query, read_zones, skipped_note
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def find_values(loc, path, low, high=None):
+    """
+    Returns a tuple with the (1-based) positions (an n x rank array) of the
+    elements of an HDF5 array between low and high (inclusive), or equal to
+    low, if high is None, and an error message.
+
+    If the array has a zone map, only the chunks whose range overlaps
+    [low, high] are read.
+    """
+
+    # Is this a valid location?
+    is_valid, species = path_is_valid_wrt_loc(loc, path)
+    if not is_valid:
+        return (None, 'Invalid location specified.')
+
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
+    # Do we have a dataset?
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return (None, "Can't open HDF5 array '%s'." % (path))
+
+    # Does it have the right shape?
+    dsp = info.shape
+    rk = len(dsp)
+    if rk < 1 or rk > 2:
+        return (None, 'Unsupported dataset shape.')
+
+    # Does it have the right type?
+    if info.dtype.kind not in 'biuf':
+        return (None, 'Value searches require a numeric HDF5 array.')
+
+    if high is None:
+        high = low
+
+    dset = open_dataset(loc, path)
+    chunks = dset.chunks
+    zones = None if chunks is None else read_zones(loc, path)
+
+    # with a zone map, read chunk by chunk, otherwise in larger blocks
+    if zones is not None:
+        block = chunks
+    else:
+        block = block_shape(dsp, chunks or (1,) * rk,
+                            Tuning.REDUCE_BLOCK_BYTES)
+
+    # compare at full precision
+    mem_type = native_dtype(info.dtype)
+
+    found = []
+    count = 0
+    touched = 0
+    skipped = 0
+    for bs, offsets in iter_blocks(tuple([slice(0, n) for n in dsp]), dsp,
+                                   block):
+        if zones is not None:
+            touched += 1
+            z = zones[tuple([s.start / c for s, c in zip(bs, chunks)])]
+            # (a chunk of NaNs has no range)
+            if not (z['max'] >= low and z['min'] <= high):
+                skipped += 1
+                continue
+
+        x = read_hyperslab(dset, bs, mem_type)
+        hits = np.argwhere((x >= low) & (x <= high))
+        count += len(hits)
+        if count >= Limits.EXCEL_MAX_ROWS:
+            return (None, 'The number of values found exceeds the maximum '
+                    'number of rows Excel can display.')
+        if len(hits) > 0:
+            found.append(hits + [s.start + 1 for s in bs])
+
+    if len(found) > 0:
+        positions = convert_ints(np.concatenate(found))[0]
+    else:
+        positions = np.empty((0, rk), dtype=np.int32)
+
+    msg = '%d values' % (len(positions))
+    if zones is not None:
+        note_query(touched, skipped)
+        msg += skipped_note(touched, skipped)
+
+    return (positions, msg)
+
+#==============================================================================
+
+
+@xl_func("string filename, string arrayname, var low, var high : string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5findValues(filename, arrayname, low, high):
+    """
+    Finds the elements of a numeric HDF5 array that equal a value or lie in
+    a range of values, and returns their positions (one per row), e.g., for
+    h5readPoints.
+
+    :param filename: the name of an HDF5 file
+    :param arrayname: the name of an HDF5 array
+    :param low: the value or the lower bound of the range
+    :param high: the upper bound of the range (optional)
+    :returns: A string
+    """
+
+#==============================================================================
+
+    # sanity check
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+    if not isinstance(arrayname, str):
+        return "'arrayname' must be a string."
+    if not isinstance(low, float):
+        return "'low' must be a number."
+    if high is not None and not isinstance(high, float):
+        return "'high' must be a number."
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        x, ret = find_values(f, arrayname, low, high)
+
+        if x is not None and len(x) > 0:
+            renderer.draw(x)
+
+    return ret
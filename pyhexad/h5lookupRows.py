@@ -0,0 +1,179 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+from pyxll import xl_func
+
+from chunk_helpers import open_dataset
+from convert_helpers import conversion_plan, rounding_note
+from config import Limits
+from file_helpers import validated_file
+from filter_helpers import is_string_column
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from index_helpers import index_is_current, index_path, lookup
+from read_helpers import field_subset, read_points
+from renderer import draw_table
+from result_helpers import cache_result, cached_result, result_key
+from table_helpers import ExcelTable
+from type_helpers import is_supported_h5table_type
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def get_rows(loc, path, column, low, high=None, columns=None):
+    """
+    Returns a tuple of an ExcelTable (header + the rows whose 'column' value
+    is between low and high, or equals low) and an error message.
+
+    The rows are found with the column's index, in key order.
+    """
+
+    # Is this a valid location?
+    is_valid, species = path_is_valid_wrt_loc(loc, path)
+    if not is_valid:
+        return (None, 'Invalid location specified.')
+
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
+    # Do we have a table?
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return (None, "Can't open HDF5 table '%s'." % (path))
+    if len(info.shape) != 1:
+        return (None, 'This is not an HDF5 table.')
+    file_type = info.dtype
+    if not is_supported_h5table_type(file_type):
+        return (None, 'Unsupported HDF5 table type.')
+
+    # Is there an index?
+    if column not in file_type.names:
+        return (None, "Unknown column '%s'." % (column))
+    if index_path(path, column) not in loc:
+        return (None, "Column '%s' has no index." % (column))
+    if not index_is_current(loc, path, column):
+        return (None, "The index of column '%s' is out of date." % (column))
+
+    # Are the keys of the right kind?
+    for v in (low, high):
+        if v is None:
+            continue
+        if is_string_column(file_type[column]):
+            if not isinstance(v, str):
+                return (None, "Column '%s' has string keys." % (column))
+        elif not isinstance(v, (int, long, float)):
+            return (None, "Column '%s' has numeric keys." % (column))
+
+    # Is the column selection meaningful?
+    if columns is not None:
+        flattened = [c for cl in columns for c in cl]
+        for c in flattened:
+            if c not in file_type.names:
+                return (None, "Unknown column '%s'." % (c))
+        col_names = tuple(flattened)
+    else:
+        col_names = tuple(file_type.names)
+
+    if len(col_names) < 1:
+        return (None, 'Invalid column specification.')
+
+    rows = lookup(loc, path, column, low, high)
+    if len(rows) >= Limits.EXCEL_MAX_ROWS:
+        return (None, 'The requested number of rows exceeds the maximum '
+                'number of rows Excel can display.')
+
+    # only the rows found (and the selected columns) are read
+    plan = conversion_plan(field_subset(file_type, col_names))
+    dset = open_dataset(loc, path)
+    x = read_points(dset, rows.reshape((-1, 1)), plan.read_type)
+    x, lossy = plan.convert(x)
+
+    return (ExcelTable(col_names, x), '%d rows' % (len(x)) +
+            rounding_note(lossy))
+
+#==============================================================================
+
+
+@xl_func("string filename, string tablename, string column, var low, var high, var columns : string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5lookupRows(filename, tablename, column, low, high, columns):
+    """
+    Reads the rows of an HDF5 table whose value in an indexed column
+    (see h5newIndex) equals a key or lies in a range of keys.
+
+    :param filename: the name of an HDF5 file
+    :param tablename: the name of an HDF5 table
+    :param column: the name of an indexed column
+    :param low: the key or the lower bound of the key range
+    :param high: the upper bound of the key range (optional)
+    :param columns: a list of column names to be read (optional)
+    :returns: A string
+    """
+
+#==============================================================================
+
+    # sanity check
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+    if not isinstance(tablename, str):
+        return "'tablename' must be a string."
+    if not isinstance(column, str):
+        return "'column' must be a string."
+
+    if low is None:
+        return "'low' must be a number or a string."
+    for v in (low, high):
+        if v is not None and not isinstance(v, (float, basestring)):
+            return "'low' and 'high' must be numbers or strings."
+    if isinstance(low, unicode):
+        low = low.encode('utf-8')
+    if isinstance(high, unicode):
+        high = high.encode('utf-8')
+
+    if columns is not None:
+        if not isinstance(columns, list):
+            return "'columns' must be a string array."
+        else:
+            for s in columns:
+                if not isinstance(s[0], basestring):
+                    return "'columns' must be a string array."
+
+    # a recalculation with the same arguments and an unchanged file?
+    key = result_key(filename, 'h5lookupRows', tablename, column, low, high,
+                     columns)
+    result = cached_result(key)
+    if result is not None:
+        draw_table(result[0])
+        return result[1]
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        x, ret = get_rows(f, tablename, column, low, high, columns)
+
+        if x is None:
+            return ret
+
+        cache_result(key, f, x, ret)
+        draw_table(x)
+
+    return ret
@@ -15,7 +15,9 @@ import h5py
 import numpy as np
 from pyxll import xl_func
 
-from h5_helpers import is_h5_location_handle, path_is_available_for_obj
+from file_helpers import pooled_file
+from h5_helpers import invalidate_object_info, is_h5_location_handle, \
+    path_is_available_for_obj
 from shape_helpers import get_chunk_dimensions, get_dimensions
 from type_helpers import parse_dtype
 
@@ -130,6 +132,7 @@ def new_array(loc, path, size, plist=''):
 
         # showtime!
         loc.create_dataset(path, **kwargs)
+        invalidate_object_info(loc, path)
 
     except Exception, e:
         logger.info(e)
@@ -174,7 +177,7 @@ def h5newArray(filename, arrayname, size, properties):
         return 'Missing file name.'
 
     try:
-        with h5py.File(filename, 'a') as f:
+        with pooled_file(filename, 'a') as f:
             ret = new_array(f, arrayname, size, properties)
 
     except IOError, e:
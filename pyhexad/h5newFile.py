@@ -10,28 +10,36 @@
 ##############################################################################
 
 import logging
+import os
 import tempfile
 
-import h5py
 from pyxll import xl_func
 
+from file_helpers import MEMORY_FILE_PREFIX, is_memory_file, \
+    new_memory_file, pooled_file
+
 logger = logging.getLogger(__name__)
 
 #==============================================================================
 
 
-@xl_func("string filename: string",
+@xl_func("string filename, var increment, string backingstore: string",
          category="HDF5",
          thread_safe=False,
          disable_function_wizard_calc=False)
-def h5newFile(filename):
+def h5newFile(filename, increment, backingstore):
     """
     Creates a new HDF5 file. If no file name is specified a temporary file
     name will be generated at random.
 
     Existing files will not be overwritten.
 
+    A file name starting with 'mem://' creates an in-memory file, which
+    lives until it is closed.
+
     :param filename: the name of the HDF5 file to be created (optional)
+    :param increment: the growth increment (in bytes) of an in-memory file (optional)
+    :param backingstore: the name of a file to which an in-memory file is written on flush/close (optional)
     :returns: A string
     """
 
@@ -40,14 +48,27 @@ def h5newFile(filename):
     if not isinstance(filename, str):
         raise TypeError("'filename' must be a string.")
 
+    if increment is not None:
+        if not isinstance(increment, float) or increment < 1:
+            return "'increment' must be a positive integer."
+
+    if not isinstance(backingstore, str):
+        raise TypeError("'backingstore' must be a string.")
+
     ret = '\0'
 
     if filename == '':
         filename = tempfile.mktemp('.h5')
+    elif filename == MEMORY_FILE_PREFIX:
+        filename += os.path.basename(tempfile.mktemp('.h5'))
 
     try:
-        with h5py.File(filename, 'w-', libver='latest') as f:
+        if is_memory_file(filename):
+            new_memory_file(filename, increment, backingstore)
             ret = filename
+        else:
+            with pooled_file(filename, 'w-', libver='latest') as f:
+                ret = filename
 
     except IOError, e:
         ret = "Can't create file '%s'." % (filename)
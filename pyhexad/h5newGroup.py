@@ -14,6 +14,7 @@ import logging
 import h5py
 from pyxll import xl_func
 
+from file_helpers import pooled_file
 from h5_helpers import is_h5_location_handle, path_is_available_for_obj
 
 logger = logging.getLogger(__name__)
@@ -82,7 +83,7 @@ def h5newGroup(filename, groupname):
         return 'Missing file name.'
 
     try:
-        with h5py.File(filename, 'a') as f:
+        with pooled_file(filename, 'a') as f:
             ret = new_group(f, groupname)
 
     except IOError, e:
@@ -0,0 +1,112 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+from pyxll import xl_func
+
+from file_helpers import pooled_file
+from h5_helpers import is_h5_location_handle, object_info, resolvable
+from index_helpers import INDEX_SUFFIX, build_index
+from type_helpers import is_supported_h5table_type
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def new_index(loc, path, column):
+    """
+    Creates (or rebuilds) the index of a column of an HDF5 table and returns
+    a message (string)
+
+    Parameters
+    ----------
+    loc: h5py.File or h5py.Group
+        An open file handle where to start.
+    path: str
+        The path of the HDF5 table.
+    column: str
+        The name of the column to be indexed.
+    """
+
+    if not is_h5_location_handle(loc):
+        raise TypeError('Location handle expected.')
+
+    # is it a table?
+    if not resolvable(loc, path):
+        return "HDF5 table at '%s' not found." % (path)
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset or len(info.shape) != 1 or \
+       not is_supported_h5table_type(info.dtype):
+        return "The object at '%s' is not an HDF5 table." % (path)
+
+    if column not in info.dtype.names:
+        return "Unknown column '%s'." % (column)
+    if '/' in column or column in ('.', '..'):
+        return "Can't index column '%s'." % (column)
+
+    # the index group goes next to the table
+    igroup = path.rstrip('/') + INDEX_SUFFIX
+    if igroup in loc and not isinstance(loc[igroup], h5py.Group):
+        return "Can't create index at '%s'." % (igroup)
+
+    try:
+        n = build_index(loc, path, column)
+    except Exception, e:
+        logger.info(e)
+        return 'Internal error.'
+
+    return '%d rows indexed.' % (n)
+
+#==============================================================================
+
+
+@xl_func("string filename, string tablename, string column : string",
+         category="HDF5",
+         thread_safe=False,
+         disable_function_wizard_calc=True)
+def h5newIndex(filename, tablename, column):
+    """
+    Creates a sorted index of a column of an HDF5 table for fast lookups
+    with h5lookupRows. h5appendRows and h5writeTable keep it up to date.
+
+    :param filename: the name of an HDF5 file
+    :param tablename: the name of an HDF5 table
+    :param column: the name of the column to be indexed
+    :returns: A string
+    """
+#===============================================================================
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+
+    if not isinstance(tablename, str):
+        return "'tablename' must be a string."
+
+    if not isinstance(column, str) or column.strip() == '':
+        return "'column' must be a non-empty string."
+
+    ret = '\0'
+
+    try:
+        with pooled_file(filename, 'a') as f:
+            ret = new_index(f, tablename, column)
+
+    except IOError, e:
+        logger.info(e)
+        ret = "Can't open file '%s'." % (filename)
+    except Exception, e:
+        logger.info(e)
+        return 'Internal error.'
+
+    return ret
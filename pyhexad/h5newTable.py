@@ -14,6 +14,7 @@ import logging
 import h5py
 from pyxll import xl_func
 
+from file_helpers import pooled_file
 from h5_helpers import is_h5_location_handle, path_is_available_for_obj
 from shape_helpers import get_chunk_dimensions
 from table_helpers import dtype_from_heading
@@ -148,7 +149,7 @@ def h5newTable(filename, tablename, heading, properties):
         return 'Missing file name.'
 
     try:
-        with h5py.File(filename, 'a') as f:
+        with pooled_file(filename, 'a') as f:
             ret = new_table(f, tablename, heading, properties)
 
     except IOError, e:
@@ -0,0 +1,103 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+from pyxll import xl_func
+
+from file_helpers import pooled_file
+from h5_helpers import is_h5_location_handle, object_info, resolvable
+from zone_helpers import build_zone_map, zone_dtype, zone_path
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def new_zone_map(loc, path):
+    """
+    Creates (or rebuilds) the zone map of a chunked HDF5 array or table and
+    returns a message (string)
+
+    Parameters
+    ----------
+    loc: h5py.File or h5py.Group
+        An open file handle where to start.
+    path: str
+        The path of the HDF5 array or table.
+    """
+
+    if not is_h5_location_handle(loc):
+        raise TypeError('Location handle expected.')
+
+    # is it a chunked dataset?
+    if not resolvable(loc, path):
+        return "HDF5 dataset at '%s' not found." % (path)
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return "The object at '%s' is not an HDF5 dataset." % (path)
+    if info.chunks is None:
+        return "The dataset at '%s' is not chunked." % (path)
+    if zone_dtype(info.dtype) is None:
+        return "The dataset at '%s' has no numeric values." % (path)
+
+    zpath = zone_path(path)
+    if zpath in loc and not isinstance(loc[zpath], h5py.Group):
+        return "Can't create zone map at '%s'." % (zpath)
+
+    try:
+        n = build_zone_map(loc, path)
+    except Exception, e:
+        logger.info(e)
+        return 'Internal error.'
+
+    return '%d chunks summarized.' % (n)
+
+#==============================================================================
+
+
+@xl_func("string filename, string dsetname : string",
+         category="HDF5",
+         thread_safe=False,
+         disable_function_wizard_calc=True)
+def h5newZoneMap(filename, dsetname):
+    """
+    Creates a zone map (the minimum and maximum of each chunk) of a chunked
+    HDF5 array or table, which lets filtered reads and value searches skip
+    chunks. Writes with PyHexad keep it up to date.
+
+    :param filename: the name of an HDF5 file
+    :param dsetname: the name of an HDF5 array or table
+    :returns: A string
+    """
+#===============================================================================
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+
+    if not isinstance(dsetname, str):
+        return "'dsetname' must be a string."
+
+    ret = '\0'
+
+    try:
+        with pooled_file(filename, 'a') as f:
+            ret = new_zone_map(f, dsetname)
+
+    except IOError, e:
+        logger.info(e)
+        ret = "Can't open file '%s'." % (filename)
+    except Exception, e:
+        logger.info(e)
+        return 'Internal error.'
+
+    return ret
@@ -0,0 +1,180 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+import numpy as np
+from pyxll import xl_func
+
+from chunk_helpers import open_dataset
+from config import Limits, Tuning
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from preview_helpers import DECIMATIONS, lttb_1d, minmax_1d, minmax_2d
+from read_helpers import read_hyperslab
+import renderer
+from shape_helpers import Selection, as_int_tuple
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def get_preview(loc, path, size=None, method='minmax', first=None,
+                last=None):
+    """
+    Returns a tuple with the Numpy ndarray of a decimated preview of an HDF5
+    array and an error message.
+
+    For 1D arrays, the preview has two columns, the (1-based) positions of
+    the samples kept and their values. For 2D arrays, each pair of rows
+    holds the minima and maxima of the tiles of a band of rows.
+    """
+
+    # Is this a valid location?
+    is_valid, species = path_is_valid_wrt_loc(loc, path)
+    if not is_valid:
+        return (None, 'Invalid location specified.')
+
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
+    # Do we have a dataset?
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return (None, "Can't open HDF5 array '%s'." % (path))
+
+    # Does it have the right shape?
+    dsp = info.shape
+    rk = len(dsp)
+    if rk < 1 or rk > 2:
+        return (None, 'Unsupported dataset shape.')
+
+    # Does it have the right type?
+    if info.dtype.kind not in 'biuf':
+        return (None, 'Previews require a numeric HDF5 array.')
+
+    if method not in DECIMATIONS:
+        return (None, "Unknown decimation method '%s'." % (method))
+    if method == 'lttb' and rk != 1:
+        return (None, 'LTTB requires a one-dimensional HDF5 array.')
+
+    # the preview size in each dimension
+    if size is None:
+        size = (Tuning.PREVIEW_POINTS, Tuning.PREVIEW_COLS)[:rk]
+    elif len(size) == 1:
+        size = (size[0],) * rk
+    size = tuple([int(k) for k in size])
+    if len(size) != rk or min(size) < 2:
+        return (None, 'Invalid preview size.')
+    if size[0] >= Limits.EXCEL_MAX_ROWS or \
+       (rk == 2 and size[1] > Limits.EXCEL_MAX_COLS):
+        return (None, 'The preview size exceeds the maximum number of rows '
+                'or columns Excel can display.')
+
+    # Is the hyperslab selection meaningful?
+    try:
+        sel = Selection(dsp, first, last)
+    except ValueError, e:
+        return (None, str(e))
+    slc = sel.slices
+
+    n = sel.count
+    if min(n) <= 0:
+        return (None, 'Empty hyperslab selection.')
+
+    dst = open_dataset(loc, path)
+
+    if rk == 1:
+        if n[0] <= size[0]:  # nothing to decimate
+            pos = np.arange(n[0])
+            val = read_hyperslab(dst, slc, np.float64)
+        elif method == 'lttb':
+            pos, val = lttb_1d(dst, slc, size[0])
+        else:
+            pos, val = minmax_1d(dst, slc, size[0])
+        x = np.column_stack((slc[0].start + 1 + pos, val))
+        return (x, '%d x 2' % len(x))
+
+    else:
+        if n[0] <= size[0] and n[1] <= size[1]:
+            x = read_hyperslab(dst, slc, np.float64)
+        else:
+            x = minmax_2d(dst, slc, size)
+        return (x, '%d x %d' % x.shape)
+
+#==============================================================================
+
+
+@xl_func("string filename, string arrayname, var size, string method, var first, var last : string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5previewArray(filename, arrayname, size, method, first, last):
+    """
+    Reads a decimated preview of an HDF5 array that keeps the peaks of the
+    data. Specify a rectilinear subregion via 'first' and 'last'.
+
+    :param filename: the name of an HDF5 file
+    :param arrayname: the name of an HDF5 array
+    :param size: the number of points (1D), or rows and columns (2D) (optional)
+    :param method: 'minmax' (default) or 'lttb' (optional)
+    :param first: the (1-based) index of the first element to be read (optional)
+    :param last: the (1-based) index of the last element to be read (optional)
+    :returns: A string
+    """
+
+#==============================================================================
+
+    # sanity check
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+    if not isinstance(arrayname, str):
+        return "'arrayname' must be a string."
+
+    if method is None or method.strip() == '':
+        method = 'minmax'
+
+    if size is not None:
+        if isinstance(size, (int, float)):
+            size = [[size]]
+        if not isinstance(size, list):
+            return "'size' must be an integer or an integer array."
+        try:
+            size = as_int_tuple(size)
+        except ValueError, e:
+            return str(e)
+
+    # the hyperslab arguments (Excel ranges) go to Selection as they are,
+    # which converts and validates them once
+
+    if first is not None and not isinstance(first, list):
+        return "'first' must be an integer array."
+
+    if last is not None and not isinstance(last, list):
+        return "'last' must be an integer array."
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        x, ret = get_preview(f, arrayname, size, method.strip().lower(),
+                             first, last)
+
+        if x is not None:
+            renderer.draw(x)
+
+    return ret
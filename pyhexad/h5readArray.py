@@ -15,20 +15,29 @@ import h5py
 import numpy as np
 from pyxll import xl_func
 
-from file_helpers import file_exists
-from h5_helpers import path_is_valid_wrt_loc
+from chunk_helpers import open_dataset
+from convert_helpers import conversion_plan, rounding_note
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from mmap_helpers import read_mapped
+from read_helpers import read_blocks, read_hyperslab
 import renderer
-from shape_helpers import is_valid_hyperslab_spec, lol_2_ndarray
-from type_helpers import excel_dtype, is_supported_h5array_type
+from result_helpers import cache_result, cached_result, result_key
+from shape_helpers import Selection
+from type_helpers import is_supported_h5array_type
 
 logger = logging.getLogger(__name__)
 
 #==============================================================================
 
 
-def get_ndarray(loc, path, first=None, last=None, step=None):
+def get_ndarray(loc, path, first=None, last=None, step=None, block=None):
     """
     Returns a tuple with the Numpy ndarray and an error message.
+
+    If 'block' is given, blocks of that many elements (in each dimension)
+    are read, the first at 'first', and the following 'step' elements
+    apart, as long as they fit before 'last'.
     """
 
     # Is this a valid location?
@@ -36,85 +45,81 @@ def get_ndarray(loc, path, first=None, last=None, step=None):
     if not is_valid:
         return (None, 'Invalid location specified.')
 
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
     # Do we have a dataset?
-    if (loc.get(path) is None) or \
-       (loc.get(path, getclass=True) != h5py.Dataset):
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
         return (None, "Can't open HDF5 array '%s'." % (path))
 
-    dst = loc[path]
-
     # Does it have the right shape?
     # TODO: how does h5py represent NULL dataspaces?
-    dsp = dst.shape
+    dsp = info.shape
     if len(dsp) > 2:
         return (None, 'Unsupported dataset shape.')
 
     # Does it have the right type?
-    file_type = dst.dtype
+    file_type = info.dtype
     if not is_supported_h5array_type(file_type):
         return None, 'Unsupported dataset element type.'
 
-    # upgrade everything to string, int32, or float64
-    mem_type = excel_dtype(file_type)
+    # upgrade everything to string, int32, or float64 (wide integers are
+    # read as they are and narrowed afterwards)
+    plan = conversion_plan(file_type)
+    mem_type = plan.read_type
 
     rk = len(dsp)
 
-    # Is the hyperslab selection meaningful?
-    if rk != 0:
-        if not is_valid_hyperslab_spec(np.asarray(dsp), first, last, step):
-            return (None, 'Invalid hyperslab specification.')
-
-    # The hyperslab selection is 1-based => Convert it to 0-based notation.
     if rk == 0:
-        x = np.asarray([dst[()]])
-        return(x, '1 x 1')
-
-    elif rk == 1:
-
-        start = 0 if first is None else first[0]-1
-        stop = dsp[0] if last is None else last[0]
-        stride = 1 if step is None else step[0]
-
-        slc = slice(start, stop, stride)
-
-        with dst.astype(mem_type):
-            x = dst[slc]
-            return (x, '%d x 1' % x.size)
-
-    elif rk == 2:
-
-        start = [0, 0] if first is None else [first[0]-1, first[1]-1]
-        stop = [dsp[0], dsp[1]] if last is None else [last[0], last[1]]
-        stride = [1, 1] if step is None else [step[0], step[1]]
+        dst = open_dataset(loc, path)
+        x, lossy = plan.convert(np.asarray([dst[()]]))
+        return(x, '1 x 1' + rounding_note(lossy))
 
-        slc0 = slice(start[0], stop[0], stride[0])
-        slc1 = slice(start[1], stop[1], stride[1])
+    # Is the hyperslab selection meaningful?
+    try:
+        sel = Selection(dsp, first, last, step, block)
+    except ValueError, e:
+        return (None, str(e))
 
-        with dst.astype(mem_type):
-            x = dst[slc0, slc1]
-            return (x, '%d x %d' % (x.shape[0], x.shape[1]))
+    if block is not None:
+        dst = open_dataset(loc, path)
+        x = read_blocks(dst, sel.start, sel.step, sel.count, sel.block,
+                        mem_type)
 
     else:
-        return (None, 'Unsupported HDF5 array rank.')
+        # contiguous and uncompressed? => map it
+        x = read_mapped(loc, path, sel.slices, mem_type)
+        if x is None:
+            dst = open_dataset(loc, path, sel.slices)
+            x = read_hyperslab(dst, sel.slices, mem_type)
+
+    # (x is ours, the conversion may re-use its buffer)
+    x, lossy = plan.convert(x, True)
+    if rk == 1:
+        return (x, '%d x 1' % x.size + rounding_note(lossy))
+    return (x, '%d x %d' % (x.shape[0], x.shape[1]) + rounding_note(lossy))
 
 #==============================================================================
 
 
-@xl_func("string filename, string arrayname, var first, var last, var step : string",
+@xl_func("string filename, string arrayname, var first, var last, var step, var block : string",
          category="HDF5",
          thread_safe=False,
          macro=True,
          disable_function_wizard_calc=True)
-def h5readArray(filename, arrayname, first, last, step):
+def h5readArray(filename, arrayname, first, last, step, block):
     """
     Reads elements of an HDF5 array. Specify a rectilinear (strided) subregion
-    via 'first' and 'last' ('stride').
+    via 'first' and 'last' ('stride'), and a block size to read a regular
+    pattern of blocks.
 
     :param filename: the name of an HDF5 file
     :param arrayname: the name of an HDF5 array
     :param first: the (1-based) index of the first element to be read (optional)
     :param last: the (1-based) index of the last element to be read (optional)
     :param stride: the read stride in each dimension
+    :param block: the block size in each dimension (optional)
     :returns: A string
     """
 
@@ -124,48 +129,42 @@ def h5readArray(filename, arrayname, first, last, step):
 
     if not isinstance(filename, str):
         return "'filename' must be a string."
-    if not file_exists(filename):
-        return "Can't open file '%s' or the file is not an HDF5 file." %  \
-            (filename)
-
     if not isinstance(arrayname, str):
         return "'arrayname' must be a string."
 
-    # we get the hyperslab spec. arguments as list of lists
-    # => for simplicity, convert to Numpy arrays
-
-    ndfirst = None
-    if first is not None:
-        if not isinstance(first, list):
-            return "'first' must be an integer array."
-        else:
-            ndfirst, ret = lol_2_ndarray(first)
-            if ndfirst is None:
-                return ret
-
-    ndlast = None
-    if last is not None:
-        if not isinstance(last, list):
-            return "'last' must be an integer array."
-        else:
-            ndlast, ret = lol_2_ndarray(last)
-            if ndlast is None:
-                return ret
-
-    ndstep = None
-    if step is not None:
-        if not isinstance(step, list):
-            return "'step' must be an integer array."
-        else:
-            ndstep, ret = lol_2_ndarray(step)
-            if ndstep is None:
-                return ret
-
-    with h5py.File(filename, 'r') as f:
-
-        x, ret = get_ndarray(f, arrayname, ndfirst, ndlast, ndstep)
+    # the hyperslab arguments (Excel ranges) go to Selection as they are,
+    # which converts and validates them once
+
+    if first is not None and not isinstance(first, list):
+        return "'first' must be an integer array."
+
+    if last is not None and not isinstance(last, list):
+        return "'last' must be an integer array."
+
+    if step is not None and not isinstance(step, list):
+        return "'step' must be an integer array."
+
+    if block is not None and not isinstance(block, list):
+        return "'block' must be an integer array."
+
+    # a recalculation with the same arguments and an unchanged file?
+    key = result_key(filename, 'h5readArray', arrayname, first, last,
+                     step, block)
+    result = cached_result(key)
+    if result is not None:
+        renderer.draw(result[0])
+        return result[1]
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        x, ret = get_ndarray(f, arrayname, first, last, step, block)
 
         if x is not None:
+            cache_result(key, f, x, ret)
             renderer.draw(x)
 
     return ret
@@ -0,0 +1,126 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+import logging
+
+import h5py
+from pyxll import xl_func
+
+from chunk_helpers import open_dataset
+from convert_helpers import conversion_plan, rounding_note
+from config import Limits
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from paging_helpers import dataset_key, read_page
+import renderer
+from type_helpers import is_supported_h5array_type
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def get_array_page(loc, path, page, page_size):
+    """
+    Returns a tuple with the Numpy ndarray of the rows of a (1-based) page
+    of an HDF5 array and an error message.
+
+    The rows of the pages before and after it are read in the background.
+    """
+
+    # Is this a valid location?
+    is_valid, species = path_is_valid_wrt_loc(loc, path)
+    if not is_valid:
+        return (None, 'Invalid location specified.')
+
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
+    # Do we have a dataset?
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return (None, "Can't open HDF5 array '%s'." % (path))
+
+    # Does it have the right shape?
+    dsp = info.shape
+    if len(dsp) < 1 or len(dsp) > 2:
+        return (None, 'Unsupported dataset shape.')
+
+    # Does it have the right type?
+    file_type = info.dtype
+    if not is_supported_h5array_type(file_type):
+        return (None, 'Unsupported dataset element type.')
+
+    # upgrade everything to string, int32, or float64 (wide integers are
+    # read as they are and narrowed afterwards)
+    plan = conversion_plan(file_type)
+    mem_type = plan.read_type
+
+    if page_size < 1 or page_size >= Limits.EXCEL_MAX_ROWS:
+        return (None, 'Invalid page size.')
+
+    pages = max((dsp[0] + page_size - 1) / page_size, 1)
+    if page < 1 or page > pages:
+        return (None, 'Page %d does not exist.' % (page))
+
+    dst = open_dataset(loc, path)
+    x = read_page(dst, dataset_key(dst, mem_type), page-1, page_size,
+                  mem_type)
+    x, lossy = plan.convert(x)
+
+    return (x, 'Page %d of %d' % (page, pages) + rounding_note(lossy))
+
+#==============================================================================
+
+
+@xl_func("string filename, string arrayname, int page, int pagesize : string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5readArrayPage(filename, arrayname, page, pagesize):
+    """
+    Reads a page of rows of a one- or two-dimensional HDF5 array. The
+    neighboring pages are read in the background.
+
+    :param filename: the name of an HDF5 file
+    :param arrayname: the name of an HDF5 array
+    :param page: the (1-based) number of the page to be read
+    :param pagesize: the number of rows per page
+    :returns: A string
+    """
+
+#==============================================================================
+
+    # sanity check
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+    if not isinstance(arrayname, str):
+        return "'arrayname' must be a string."
+    if not isinstance(page, int) or page < 1:
+        return "'page' must be a positive integer."
+    if not isinstance(pagesize, int) or pagesize < 1:
+        return "'pagesize' must be a positive integer."
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        x, ret = get_array_page(f, arrayname, page, pagesize)
+
+        if x is not None:
+            renderer.draw(x)
+
+    return ret
@@ -12,7 +12,7 @@
 import h5py
 from pyxll import xl_func
 
-from file_helpers import file_exists
+from file_helpers import validated_file
 from h5_helpers import path_is_valid_wrt_loc
 
 #==============================================================================
@@ -38,11 +38,12 @@ def h5readAttribute(filename, location, attr):
         raise TypeError('String expected.')
     if not isinstance(attr, str):
         raise TypeError('String expected.')
-    if not file_exists(filename):
-        return "Can't open file '%s' or the file is not an HDF5 file." %  \
-            (filename)
 
-    with h5py.File(filename, 'r') as f:
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
 
         path = location
         if path != '':
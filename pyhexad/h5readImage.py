@@ -18,8 +18,8 @@ from pyxll import xl_func
 
 from renderer import xl_app
 from config import Places
-from file_helpers import file_exists
-from h5_helpers import path_is_valid_wrt_loc
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +38,7 @@ def get_image(loc, image_path, palette_path=None):
         return (None, 'Invalid image path specified.')
 
     # Do we have datasets?
-    if (loc.get(image_path) is None) or \
-       (loc.get(image_path, getclass=True) != h5py.Dataset):
+    if object_info(loc, image_path).cls != h5py.Dataset:
         return (None, "Can't open HDF5 image '%s'." % (image_path))
 
     #if palette_path is not None and palette_path != '':
@@ -94,10 +93,6 @@ def h5readImage(filename, imagename, palettename=None):
 
     if not isinstance(filename, str):
         return "'filename' must be a string."
-    if not file_exists(filename):
-        return "Can't open file '%s' or the file is not an HDF5 file." %  \
-            (filename)
-
     if not isinstance(imagename, str):
         return "'imagename' must be a string."
 
@@ -106,7 +101,11 @@ def h5readImage(filename, imagename, palettename=None):
             return "'palettename' must be a string."
 
     try:
-        with h5py.File(filename) as f:
+        with validated_file(filename) as f:
+
+            if f is None:
+                return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                    (filename)
 
             img, ret = get_image(f, imagename, palettename)
 
@@ -0,0 +1,136 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+import logging
+
+import h5py
+import numpy as np
+from pyxll import xl_func
+
+from chunk_helpers import open_dataset
+from convert_helpers import conversion_plan, rounding_note
+from config import Limits
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from read_helpers import read_points
+import renderer
+from type_helpers import is_supported_h5array_type
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def get_points(loc, path, points):
+    """
+    Returns a tuple with a Numpy ndarray of the elements of an HDF5 array at
+    the (1-based) positions 'points' (an n x rank array) and an error message.
+    """
+
+    # Is this a valid location?
+    is_valid, species = path_is_valid_wrt_loc(loc, path)
+    if not is_valid:
+        return (None, 'Invalid location specified.')
+
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
+    # Do we have a dataset?
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return (None, "Can't open HDF5 array '%s'." % (path))
+
+    # Does it have the right shape?
+    dsp = info.shape
+    rk = len(dsp)
+    if rk < 1 or rk > 2:
+        return (None, 'Unsupported dataset shape.')
+
+    # Does it have the right type?
+    file_type = info.dtype
+    if not is_supported_h5array_type(file_type):
+        return (None, 'Unsupported dataset element type.')
+
+    # upgrade everything to string, int32, or float64 (wide integers are
+    # read as they are and narrowed afterwards)
+    plan = conversion_plan(file_type)
+    mem_type = plan.read_type
+
+    # one position per row (a single row or column in the 1D case)
+    points = np.asarray(points)
+    if rk == 1:
+        points = points.reshape((-1, 1))
+    if points.ndim != 2 or points.shape[1] != rk or len(points) < 1:
+        return (None, 'The positions must be an n x %d array.' % (rk))
+    if len(points) >= Limits.EXCEL_MAX_ROWS:
+        return (None, 'The requested number of rows exceeds the maximum '
+                'number of rows Excel can display.')
+    if np.less(points, 1).any() or np.greater(points, dsp).any():
+        return (None, 'Position out of range.')
+
+    # The positions are 1-based => Convert them to 0-based notation.
+    dst = open_dataset(loc, path)
+    x, lossy = plan.convert(read_points(dst, points - 1, mem_type))
+
+    return (x, '%d x 1' % x.size + rounding_note(lossy))
+
+#==============================================================================
+
+
+@xl_func("string filename, string arrayname, var points : string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5readPoints(filename, arrayname, points):
+    """
+    Reads scattered elements of an HDF5 array. Only the elements at the given
+    positions are read.
+
+    :param filename: the name of an HDF5 file
+    :param arrayname: the name of an HDF5 array
+    :param points: the (1-based) positions of the elements, one per row
+    :returns: A string
+    """
+
+#==============================================================================
+
+    # sanity check
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+    if not isinstance(arrayname, str):
+        return "'arrayname' must be a string."
+
+    if isinstance(points, (int, float)):
+        points = [[points]]
+    if not isinstance(points, list):
+        return "'points' must be an integer array."
+
+    # keep the rows: one position per row
+    try:
+        ndpoints = np.asarray(points, dtype=np.int64)
+    except:
+        return "'points' must be an integer array."
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        x, ret = get_points(f, arrayname, ndpoints)
+
+        if x is not None:
+            renderer.draw(x)
+
+    return ret
@@ -12,22 +12,35 @@
 import logging
 
 import h5py
+import numpy as np
 from pyxll import xl_func
 
+from chunk_helpers import open_dataset
+from convert_helpers import conversion_plan, rounding_note
 from config import Limits
-from file_helpers import file_exists
-from h5_helpers import path_is_valid_wrt_loc
+from file_helpers import validated_file
+from filter_helpers import parse_filter, read_filtered
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from read_helpers import field_subset, read_hyperslab
 from renderer import draw_table
-from type_helpers import excel_dtype, is_supported_h5table_type
+from result_helpers import cache_result, cached_result, result_key
+from table_helpers import ExcelTable
+from type_helpers import is_supported_h5table_type
+from zone_helpers import note_query, read_zones, selected_chunks, \
+    skipped_note
 
 logger = logging.getLogger(__name__)
 
 #==============================================================================
 
 
-def get_table(loc, path, columns=None, first=None, last=None, step=None):
+def get_table(loc, path, columns=None, first=None, last=None, step=None,
+              where=None):
     """
-    Returns a tuple of a list of rows (lists) and an error message.
+    Returns a tuple of an ExcelTable (header + rows) and an error message.
+
+    If 'where' is given, only the rows for which this filter expression
+    holds are returned.
     """
 
     # Is this a valid location?
@@ -35,26 +48,24 @@ def get_table(loc, path, columns=None, first=None, last=None, step=None):
     if not is_valid:
         return (None, 'Invalid location specified.')
 
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
     # Do we have a dataset?
-    if (loc.get(path) is None) or \
-       (loc.get(path, getclass=True) != h5py.Dataset):
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
         return (None, "Can't open HDF5 table '%s'." % (path))
 
-    dset = loc[path]
-
     # Does it have the right shape?
-    dsp = dset.shape
+    dsp = info.shape
     if len(dsp) != 1:
         return (None, 'This is not an HDF5 table.')
 
     # Does it have the right type?
-    file_type = dset.dtype
+    file_type = info.dtype
     if not is_supported_h5table_type(file_type):
         return (None, 'Unsupported HDF5 table type.')
 
-    # upgrade everything to string, int32, or float64
-    mem_type = excel_dtype(file_type)
-
     # Is the column selection meaningful?
 
     col_names = None
@@ -65,11 +76,20 @@ def get_table(loc, path, columns=None, first=None, last=None, step=None):
                 return (None, "Unknown column '%s'." % (c))
         col_names = tuple(flattened)
     else:
-        col_names = tuple([n for n in mem_type.names])
+        col_names = tuple(file_type.names)
 
     if len(col_names) < 1:
         raise ValueError('Invalid column specification.')
 
+    # Is the filter meaningful?
+
+    filt = None
+    if where is not None and where.strip() != '':
+        try:
+            filt = parse_filter(where, file_type)
+        except ValueError, e:
+            return (None, str(e))
+
     # Is the hyperslab selection meaningful?
     # The hyperslab selection is 1-based => Convert it to 0-based notation.
 
@@ -82,40 +102,63 @@ def get_table(loc, path, columns=None, first=None, last=None, step=None):
 
     slc = slice(start, stop, stride)
 
-    # determine the number of rows expected
-    idx = slc.indices(dset.size)
-    if (idx[1]-idx[0])/idx[2] >= Limits.EXCEL_MAX_ROWS:
+    # determine the number of rows expected (with a filter, we'll know
+    # only after reading)
+    idx = slc.indices(dsp[0])
+    if filt is None and (idx[1]-idx[0])/idx[2] >= Limits.EXCEL_MAX_ROWS:
         return (None, 'The requested number of rows exceeds the maximum '
                 'number of rows Excel can display.')
 
-    y = [list(col_names)]
-    with dset.astype(mem_type):
-        if columns is not None:
-            x = dset[col_names][slc]
-        else:
-            x = dset[slc]
+    # Upgrade the selected columns (only) to string, int32, or float64.
+    # (Wide integers are read as they are and narrowed afterwards.) HDF5
+    # gathers just these fields while reading.
+    plan = conversion_plan(field_subset(file_type, col_names))
 
-        if len(col_names) > 1:
-            for r in x:
-                y.append(r)
-        else:
-            for r in x:
-                y.append((r,))
+    note = ''
+    dset = open_dataset(loc, path, (slc,))
+    if filt is None:
+        x = read_hyperslab(dset, (slc,), plan.read_type)
+    else:
+        # the filter may need columns that weren't selected
+        extra = tuple([c for c in filt.columns if c not in col_names])
+        read_type = plan.read_type
+        if len(extra) > 0:
+            read_type = conversion_plan(
+                field_subset(file_type, col_names + extra)).read_type
+
+        # skip the chunks whose zone map summaries rule out a match
+        may = None
+        zones = read_zones(loc, path)
+        if zones is not None:
+            may = filt.chunks(zones)
+            touched = selected_chunks(slc, dsp[0], dset.chunks[0])
+            skipped = int(np.count_nonzero(~may[touched]))
+            note_query(len(touched), skipped)
+            note = skipped_note(len(touched), skipped)
+
+        x = read_filtered(dset, slc, filt, read_type,
+                          Limits.EXCEL_MAX_ROWS - 1, col_names, may)
+        if x is None:
+            return (None, 'The number of matching rows exceeds the maximum '
+                    'number of rows Excel can display.')
+    x, lossy = plan.convert(x)
+    y = ExcelTable(col_names, x)
 
-    return (y, '%d rows' % (len(y)-1))
+    return (y, '%d rows' % (len(y)-1) + note + rounding_note(lossy))
 
 #==============================================================================
 
 
-@xl_func("string filename, string tablename, var columns, var first, var last, var step : string",
+@xl_func("string filename, string tablename, var columns, var first, var last, var step, var where : string",
          category="HDF5",
          thread_safe=False,
          macro=True,
          disable_function_wizard_calc=True)
-def h5readTable(filename, tablename, columns, first=-1, last=-1, step=-1):
+def h5readTable(filename, tablename, columns, first=-1, last=-1, step=-1,
+                where=None):
     """
-    Reads rows from an HDF5 table. Specify a subset of columns or a (strided)
-    subset via 'first' and 'last' ('stride').
+    Reads rows from an HDF5 table. Specify a subset of columns, a (strided)
+    subset via 'first' and 'last' ('stride'), or a filter the rows must match.
 
     :param filename: the name of an HDF5 file
     :param tablename: the name of an HDF5 table
@@ -123,6 +166,7 @@ def h5readTable(filename, tablename, columns, first=-1, last=-1, step=-1):
     :param first: the (1-based) index of the first element to be read (optional)
     :param last: the (1-based) index of the last element to be read (optional)
     :param stride: the read stride in each dimension (optional)
+    :param where: a filter expression, e.g., "Ask > 0.9 AND Bid < 0.95" (optional)
     :returns: A string
     """
 
@@ -134,10 +178,6 @@ def h5readTable(filename, tablename, columns, first=-1, last=-1, step=-1):
 
     if not isinstance(filename, str):
         return "'filename' must be a string."
-    if not file_exists(filename):
-        return "Can't open file '%s' or the file is not an HDF5 file." %  \
-            (filename)
-
     if not isinstance(tablename, str):
         return "'tablename' must be a string."
 
@@ -161,17 +201,37 @@ def h5readTable(filename, tablename, columns, first=-1, last=-1, step=-1):
         if not (isinstance(step, float) and int(step) > 0):
             return "'step' must be a positive integer."
 
-    with h5py.File(filename, 'r') as f:
+    if where is not None:
+        if not isinstance(where, basestring):
+            return "'where' must be a string."
+        if isinstance(where, unicode):
+            where = where.encode('utf-8')
+
+    first = int(first) if first is not None else None
+    last = int(last) if last is not None else None
+    step = int(step) if step is not None else None
+
+    # a recalculation with the same arguments and an unchanged file?
+    key = result_key(filename, 'h5readTable', tablename, columns, first,
+                     last, step, where)
+    result = cached_result(key)
+    if result is not None:
+        draw_table(result[0])
+        return result[1]
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
 
-        x, ret = get_table(f, tablename, columns,
-                           int(first) if first is not None else None,
-                           int(last) if last is not None else None,
-                           int(step) if step is not None else None)
+        x, ret = get_table(f, tablename, columns, first, last, step, where)
 
         # get_table returns None if there was an error
         if x is None:
             return ret
 
+        cache_result(key, f, x, ret)
         draw_table(x)
 
     return ret
@@ -0,0 +1,152 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+import logging
+
+import h5py
+from pyxll import xl_func
+
+from chunk_helpers import open_dataset
+from convert_helpers import conversion_plan, rounding_note
+from config import Limits
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from paging_helpers import dataset_key, read_page
+from read_helpers import field_subset
+from renderer import draw_table
+from table_helpers import ExcelTable
+from type_helpers import is_supported_h5table_type
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def get_table_page(loc, path, page, page_size, columns=None):
+    """
+    Returns a tuple of an ExcelTable (header + the rows of a (1-based) page)
+    and an error message.
+
+    The rows of the pages before and after it are read in the background.
+    """
+
+    # Is this a valid location?
+    is_valid, species = path_is_valid_wrt_loc(loc, path)
+    if not is_valid:
+        return (None, 'Invalid location specified.')
+
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
+    # Do we have a dataset?
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return (None, "Can't open HDF5 table '%s'." % (path))
+
+    # Does it have the right shape?
+    dsp = info.shape
+    if len(dsp) != 1:
+        return (None, 'This is not an HDF5 table.')
+
+    # Does it have the right type?
+    file_type = info.dtype
+    if not is_supported_h5table_type(file_type):
+        return (None, 'Unsupported HDF5 table type.')
+
+    # Is the column selection meaningful?
+    if columns is not None:
+        flattened = [c for cl in columns for c in cl]
+        for c in flattened:
+            if c not in file_type.names:
+                return (None, "Unknown column '%s'." % (c))
+        col_names = tuple(flattened)
+    else:
+        col_names = tuple(file_type.names)
+
+    if len(col_names) < 1:
+        return (None, 'Invalid column specification.')
+
+    if page_size < 1 or page_size >= Limits.EXCEL_MAX_ROWS:
+        return (None, 'Invalid page size.')
+
+    pages = max((dsp[0] + page_size - 1) / page_size, 1)
+    if page < 1 or page > pages:
+        return (None, 'Page %d does not exist.' % (page))
+
+    # only the selected columns are converted, read, and cached
+    plan = conversion_plan(field_subset(file_type, col_names))
+    page_type = plan.read_type
+    dset = open_dataset(loc, path)
+    x = read_page(dset, dataset_key(dset, page_type), page-1, page_size,
+                  page_type)
+
+    x, lossy = plan.convert(x)
+
+    return (ExcelTable(col_names, x),
+            'Page %d of %d' % (page, pages) + rounding_note(lossy))
+
+#==============================================================================
+
+
+@xl_func("string filename, string tablename, int page, int pagesize, var columns : string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5readTablePage(filename, tablename, page, pagesize, columns):
+    """
+    Reads a page of rows of an HDF5 table. The neighboring pages are read in
+    the background.
+
+    :param filename: the name of an HDF5 file
+    :param tablename: the name of an HDF5 table
+    :param page: the (1-based) number of the page to be read
+    :param pagesize: the number of rows per page
+    :param columns: a list of column names to be read (optional)
+    :returns: A string
+    """
+
+#==============================================================================
+
+    # sanity check
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+    if not isinstance(tablename, str):
+        return "'tablename' must be a string."
+    if not isinstance(page, int) or page < 1:
+        return "'page' must be a positive integer."
+    if not isinstance(pagesize, int) or pagesize < 1:
+        return "'pagesize' must be a positive integer."
+
+    if columns is not None:
+        if not isinstance(columns, list):
+            return "'columns' must be a string array."
+        else:
+            for s in columns:
+                if not isinstance(s[0], basestring):
+                    return "'columns' must be a string array."
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        x, ret = get_table_page(f, tablename, page, pagesize, columns)
+
+        if x is None:
+            return ret
+
+        draw_table(x)
+
+    return ret
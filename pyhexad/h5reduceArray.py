@@ -0,0 +1,165 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+import numpy as np
+from pyxll import xl_func
+
+from chunk_helpers import open_dataset
+from config import Limits
+from file_helpers import validated_file
+from h5_helpers import object_info, path_is_valid_wrt_loc, refresh_dataset
+from reduce_helpers import REDUCTIONS, reduce_hyperslab
+import renderer
+from shape_helpers import Selection
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def get_reduction(loc, path, op, axis=None, first=None, last=None,
+                  step=None):
+    """
+    Returns a tuple with the Numpy ndarray of the reduction 'op' of an HDF5
+    array along the (1-based) 'axis' (or the entire array) and an error
+    message.
+
+    A reduction along axis 1 (down the rows) of a two-dimensional array
+    returns a row, a reduction along axis 2 a column.
+    """
+
+    # Is this a valid location?
+    is_valid, species = path_is_valid_wrt_loc(loc, path)
+    if not is_valid:
+        return (None, 'Invalid location specified.')
+
+    # A SWMR writer may have extended the dataset since we last looked.
+    refresh_dataset(loc, path)
+
+    # Do we have a dataset?
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
+        return (None, "Can't open HDF5 array '%s'." % (path))
+
+    # Does it have the right shape?
+    dsp = info.shape
+    rk = len(dsp)
+    if rk < 1 or rk > 2:
+        return (None, 'Unsupported dataset shape.')
+
+    # Does it have the right type?
+    if info.dtype.kind not in 'biuf':
+        return (None, 'Reductions require a numeric HDF5 array.')
+
+    if op not in REDUCTIONS:
+        return (None, "Unknown reduction '%s'." % (op))
+
+    if axis is not None and (axis < 1 or axis > rk):
+        return (None, 'Invalid axis.')
+
+    # Is the hyperslab selection meaningful?
+    try:
+        sel = Selection(dsp, first, last, step)
+    except ValueError, e:
+        return (None, str(e))
+    slc = sel.slices
+
+    if sel.size == 0:
+        return (None, 'Empty hyperslab selection.')
+
+    # axis 1 of a 1D array reduces everything
+    if rk == 1:
+        axis = None
+
+    dst = open_dataset(loc, path)
+    x = reduce_hyperslab(dst, slc, op, None if axis is None else axis-1)
+
+    if axis is None:
+        return (np.asarray([x]), '1 x 1')
+    elif axis == 1:
+        if x.size > Limits.EXCEL_MAX_COLS:
+            return (None, 'The result exceeds the maximum number of columns '
+                    'Excel can display.')
+        return (x.reshape((1, x.size)), '1 x %d' % x.size)
+    else:
+        if x.size >= Limits.EXCEL_MAX_ROWS:
+            return (None, 'The result exceeds the maximum number of rows '
+                    'Excel can display.')
+        return (x, '%d x 1' % x.size)
+
+#==============================================================================
+
+
+@xl_func("string filename, string arrayname, string op, var axis, var first, var last, var step : string",
+         category="HDF5",
+         thread_safe=False,
+         macro=True,
+         disable_function_wizard_calc=True)
+def h5reduceArray(filename, arrayname, op, axis, first, last, step):
+    """
+    Computes the sum, mean, minimum, maximum, or standard deviation of the
+    elements of an HDF5 array along an axis, or of all elements. Specify a
+    rectilinear (strided) subregion via 'first' and 'last' ('stride').
+
+    :param filename: the name of an HDF5 file
+    :param arrayname: the name of an HDF5 array
+    :param op: 'sum', 'mean', 'min', 'max', or 'std'
+    :param axis: the (1-based) axis to reduce along (optional)
+    :param first: the (1-based) index of the first element to be read (optional)
+    :param last: the (1-based) index of the last element to be read (optional)
+    :param stride: the read stride in each dimension
+    :returns: A string
+    """
+
+#==============================================================================
+
+    # sanity check
+
+    if not isinstance(filename, str):
+        return "'filename' must be a string."
+    if not isinstance(arrayname, str):
+        return "'arrayname' must be a string."
+    if not isinstance(op, str):
+        return "'op' must be a string."
+
+    if axis is not None:
+        if not isinstance(axis, (int, float)) or axis != int(axis):
+            return "'axis' must be an integer."
+        axis = int(axis)
+
+    # the hyperslab arguments (Excel ranges) go to Selection as they are,
+    # which converts and validates them once
+
+    if first is not None and not isinstance(first, list):
+        return "'first' must be an integer array."
+
+    if last is not None and not isinstance(last, list):
+        return "'last' must be an integer array."
+
+    if step is not None and not isinstance(step, list):
+        return "'step' must be an integer array."
+
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
+
+        x, ret = get_reduction(f, arrayname, op.strip().lower(), axis,
+                               first, last, step)
+
+        if x is not None:
+            renderer.draw(x)
+
+    return ret
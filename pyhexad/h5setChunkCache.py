@@ -0,0 +1,73 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+from pyxll import xl_func
+
+from file_helpers import chunk_cache_settings, set_chunk_cache_settings
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+@xl_func("var nbytes, var nslots, var w0, string filename: string",
+         category="HDF5",
+         thread_safe=False,
+         disable_function_wizard_calc=True)
+def h5setChunkCache(nbytes, nslots, w0, filename):
+    """
+    Sets the raw data chunk cache of an HDF5 file. If no file name is
+    specified, the default for all files is set. Files PyHexad keeps open
+    will be re-opened with the new settings.
+
+    :param nbytes: the size of the chunk cache in bytes
+    :param nslots: the number of chunk slots in the cache's hash table (optional)
+    :param w0: the chunk preemption policy, a number between 0 and 1 (optional)
+    :param filename: the name of an HDF5 file (optional)
+    :returns: A string
+    """
+
+#==============================================================================
+
+    if filename is None:
+        filename = ''
+
+    if not isinstance(filename, str):
+        raise TypeError("'filename' must be a string.")
+
+    filename = filename if filename.strip() != '' else None
+
+    # missing arguments keep their current values
+    current = chunk_cache_settings(filename)
+
+    if nbytes is None:
+        nbytes = current[0]
+    if nslots is None:
+        nslots = current[1]
+    if w0 is None:
+        w0 = current[2]
+
+    if not isinstance(nbytes, (int, float)) or nbytes < 0:
+        return "'nbytes' must be a non-negative integer."
+    if not isinstance(nslots, (int, float)) or nslots < 1:
+        return "'nslots' must be a positive integer."
+    if not isinstance(w0, (int, float)) or not 0.0 <= w0 <= 1.0:
+        return "'w0' must be a number between 0 and 1."
+
+    try:
+        count = set_chunk_cache_settings(nbytes, nslots, w0, filename)
+    except Exception, e:
+        logger.info(e)
+        return 'Internal error.'
+
+    return '%d files closed.' % (count)
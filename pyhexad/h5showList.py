@@ -23,7 +23,7 @@ import numpy as np
 from pyxll import xl_func
 
 from config import Limits
-from file_helpers import file_exists
+from file_helpers import validated_file
 from h5_helpers import path_is_valid_wrt_loc
 import renderer
 from type_helpers import is_supported_h5array_type, is_supported_h5table_type, \
@@ -202,13 +202,14 @@ def h5showList(filename, location):
         raise TypeError("'filename' must be a string.")
     if not isinstance(location, str):
             raise TypeError("'location' must be a string.")
-    if not file_exists(filename):
-        return "Can't open file '%s' or the file is not an HDF5 file." %  \
-            (filename)
 
     ret = '\0'
 
-    with h5py.File(filename, 'r') as f:
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
 
         ret = f.filename
 
@@ -28,7 +28,7 @@ import numpy as np
 from pyxll import xl_func
 
 from config import Limits
-from file_helpers import file_exists
+from file_helpers import validated_file
 from h5_helpers import path_is_valid_wrt_loc
 import renderer
 
@@ -126,16 +126,17 @@ def h5showTree(filename, location):
         raise TypeError("'filename' must be a string.")
     if not isinstance(location, str):
             raise TypeError("'location' must be a string.")
-    if not file_exists(filename):
-        return "Can't open file '%s' or the file is not an HDF5 file." %  \
-            (filename)
 
     ret = '\0'
 
     # if a location was specified, we'll find out if it's meaningful only
     # after opening the file
 
-    with h5py.File(filename, 'r') as f:
+    with validated_file(filename) as f:
+
+        if f is None:
+            return "Can't open file '%s' or the file is not an HDF5 file." %  \
+                (filename)
 
         ret = f.filename
 
@@ -15,10 +15,11 @@ import h5py
 import numpy as np
 from pyxll import xl_func
 
-from h5_helpers import is_h5_location_handle, path_is_available_for_obj, \
-    resolvable
-from shape_helpers import can_reshape, normalize_first, normalize_last, \
-    normalize_step
+from batch_helpers import batched_file, write_batch
+from h5_helpers import invalidate_object_info, is_h5_location_handle, \
+    object_info, path_is_available_for_obj, resolvable
+from shape_helpers import Selection, can_reshape
+from zone_helpers import invalidate_zones, update_zones
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +60,7 @@ def create_array(loc, path, data):
             file_type = h5py.special_dtype(vlen=unicode)
         loc.create_dataset(path, x.shape, dtype=file_type,
                            data=x.astype(file_type))
+        invalidate_object_info(loc, path)
     except Exception, e:
         logger.info(e)
         ret = 'Array creation faild.'
@@ -68,7 +70,7 @@ def create_array(loc, path, data):
 #==============================================================================
 
 
-def write_array(loc, path, data, slice_tuple):
+def write_array(loc, path, data, selection, batch=None):
     """
     Creates (as needed) and writes data to an HDF5 array, and returns a
     message (string)
@@ -81,8 +83,11 @@ def write_array(loc, path, data, slice_tuple):
         The path of the HDF5 array.
     data: var[]
         The data to be written.
-    slice_tuple: tuple of slices
-        The destination indices to be written.
+    selection: Selection or tuple of slices
+        The destination indices to be written. (Slices must have explicit
+        start, stop, and step.)
+    batch: WriteBatch
+        If not None, the write is queued with this batch (optional).
 
     Comments
     --------
@@ -100,11 +105,16 @@ def write_array(loc, path, data, slice_tuple):
     # is the location valid?
     if not resolvable(loc, path):
         return "HDF5 array at '%s' not found." % (path)
-    if loc.get(path, getclass=True) != h5py.Dataset:
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
         return "The object at '%s' is not an HDF5 array." % (path)
 
+    if not isinstance(selection, Selection):
+        selection = Selection.from_slices(selection)
+    slice_tuple = selection.slices
+
     dset = loc[path]
-    file_type = dset.dtype
+    file_type = info.dtype
     x = None
     try:
         x = np.asarray(data).astype(file_type)
@@ -114,31 +124,42 @@ def write_array(loc, path, data, slice_tuple):
 
     try:
 
-        rk = len(dset.shape)
-        rshape = tuple([(slice_tuple[i].stop-slice_tuple[i].start) /
-                        slice_tuple[i].step for i in range(rk)])
+        rshape = selection.out_shape
 
         # degenerate?
         if not np.greater(rshape, 0).all():
             return 'Degenerate hyperslab found.'
 
         # do the counts match?
-        if not np.prod(rshape) == np.prod(x.shape):
+        if not selection.size == x.size:
             return 'Count mismatch between source and destination ranges.'
 
         # do we need to extend the dataset?
-        rmaxshape = tuple([slice_tuple[i].stop for i in range(rk)])
-        if np.greater(rmaxshape, dset.shape).any():  # we need to extend
-            if can_reshape(rmaxshape, dset.maxshape):
-                dset.resize(np.maximum(rmaxshape, dset.shape))
+        rmaxshape = selection.stop
+        if np.greater(rmaxshape, info.shape).any():  # we need to extend
+            if can_reshape(rmaxshape, info.maxshape):
+                dset.resize(np.maximum(rmaxshape, info.shape))
+                invalidate_object_info(loc, path)
             else:
                 return "Can't extend the dataset to accomodate the data range."
 
-        dset[slice_tuple] = x.reshape(rshape)
+        # keep the zone map (if any) up to date, before the data is
+        # written or queued
+        update_zones(loc, path, info.shape, slice_tuple, x.reshape(rshape))
+
+        if batch is None:
+            dset[slice_tuple] = x.reshape(rshape)
+        else:
+            batch.add(loc, path, slice_tuple, x.reshape(rshape))
 
     except Exception, e:
         print e
         logger.info(e)
+        # the zone map may describe data never written
+        try:
+            invalidate_zones(loc, path)
+        except Exception, e:
+            logger.info(e)
         ret = 'Write failed.'
 
     return ret
@@ -178,7 +199,7 @@ def h5writeArray(filename, arrayname, data, first, last, step):
 
     try:
 
-        with h5py.File(filename, 'a') as f:
+        with batched_file(filename) as f:
 
             # does the array exist?
             create = False
@@ -188,10 +209,9 @@ def h5writeArray(filename, arrayname, data, first, last, step):
                         (arrayname)
                 else:
                     create = True
-            else:
-                if f.get(arrayname, getclass=True) != h5py.Dataset:
-                    return "The object at '%s' is not an HDF5 array." % \
-                        (arrayname)
+            elif object_info(f, arrayname).cls != h5py.Dataset:
+                return "The object at '%s' is not an HDF5 array." % \
+                    (arrayname)
 
             # if the array doesn't exist, we can ignore the optional parameters
             # and are ready to roll
@@ -200,18 +220,19 @@ def h5writeArray(filename, arrayname, data, first, last, step):
 
             else:  # more checking needed...
 
-                dset = f[arrayname]
+                shape = object_info(f, arrayname).shape
 
                 # normalize the optional parameters and try to write
 
-                start = normalize_first(first, dset.shape)
-                stop = normalize_last(last, dset.shape)
-                stride = normalize_step(step, dset.shape)
+                try:
+                    sel = Selection(shape, first, last, step, extend=True)
+                except ValueError, e:
+                    return str(e)
 
-                slc = [slice(start[i], stop[i], stride[i])
-                       for i in range(len(start))]
+                ret = write_array(f, arrayname, data, sel,
+                                  batch=write_batch)
 
-                ret = write_array(f, arrayname, data, tuple(slc))
+            ret += write_batch.failure_note(filename)
 
     except IOError, e:
         logger.info(e)
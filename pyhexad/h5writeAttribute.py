@@ -14,6 +14,7 @@ import logging
 import h5py
 from pyxll import xl_func
 
+from file_helpers import pooled_file
 from h5_helpers import is_h5_location_handle, resolvable
 
 logger = logging.getLogger(__name__)
@@ -113,7 +114,7 @@ def h5writeAttribute(filename, path, attname, attvalue):
         return 'Missing file name.'
 
     try:
-        with h5py.File(filename, 'a') as f:
+        with pooled_file(filename, 'a') as f:
             ret = set_attribute(f, path, attname, attvalue)
 
     except IOError, e:
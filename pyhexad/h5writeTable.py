@@ -15,15 +15,19 @@ import h5py
 import numpy as np
 from pyxll import xl_func
 
-from h5_helpers import is_h5_location_handle, resolvable
+from batch_helpers import batched_file, write_batch
+from h5_helpers import invalidate_object_info, is_h5_location_handle, \
+    object_info, resolvable
+from index_helpers import invalidate_indexes, update_indexes
 from table_helpers import parse_col_names
+from zone_helpers import invalidate_zones, update_zones
 
 logger = logging.getLogger(__name__)
 
 #=============================================================================
 
 
-def write_rows(loc, path, rows, columns):
+def write_rows(loc, path, rows, columns, batch=None):
     """
     Write rows to an existing table and return the number of rows written.
 
@@ -37,6 +41,8 @@ def write_rows(loc, path, rows, columns):
         The rows to be appended.
     columns: string
         A comma-separated list of column names (optional)
+    batch: WriteBatch
+        If not None, the write is queued with this batch (optional).
     """
 
     ret = path
@@ -56,11 +62,12 @@ def write_rows(loc, path, rows, columns):
     # is the location valid?
     if not resolvable(loc, path):
         return "HDF5 table at '%s' not found." % (path)
-    if loc.get(path, getclass=True) != h5py.Dataset:
+    info = object_info(loc, path)
+    if info.cls != h5py.Dataset:
         return "The object at '%s' is not an HDF5 table." % (path)
 
     dset = loc[path]
-    file_type = dset.dtype
+    file_type = info.dtype
 
     # check for column names
     col_names = ()
@@ -100,12 +107,20 @@ def write_rows(loc, path, rows, columns):
     # (if needed) extend the table and write the rows
     try:
 
-        curr_rows = dset.shape[0]
+        curr_rows = info.shape[0]
         new_rows = len(rows)
         if new_rows > curr_rows:
             dset.resize((new_rows,))
+            invalidate_object_info(loc, path)
 
-        if len(col_names) > 0:
+        # keep the column indexes and the zone map (if any) up to date,
+        # before the rows are written or queued
+        update_indexes(loc, path, curr_rows, 0, a)
+        update_zones(loc, path, (curr_rows,), (slice(0, new_rows, 1),), a)
+
+        if batch is not None:
+            batch.add(loc, path, (slice(0, new_rows, 1),), a, col_names)
+        elif len(col_names) > 0:
             idx = col_names + (slice(0, new_rows),)
             dset[idx] = a
         else:
@@ -116,6 +131,12 @@ def write_rows(loc, path, rows, columns):
     except Exception, e:
         print e
         logger.info(e)
+        # the indexes and the zone map may describe rows never written
+        try:
+            invalidate_indexes(loc, path)
+            invalidate_zones(loc, path)
+        except Exception, e:
+            logger.info(e)
         ret = 'Write failed.'
 
     return ret
@@ -156,29 +177,30 @@ def h5writeTable(filename, tablename, rows, columns):
 
     try:
 
-        with h5py.File(filename, 'a') as f:
+        with batched_file(filename) as f:
 
             # does the table exist?
             if not resolvable(f, tablename):
                 return 'Table not found.'
 
             # is it a dataset?
-            if f.get(tablename, getclass=True) != h5py.Dataset:
+            info = object_info(f, tablename)
+            if info.cls != h5py.Dataset:
                 return "The object at '%s' is not an HDF5 table." % \
                     (tablename)
 
             # is it a table shape?
-            dset = f[tablename]
-            if len(dset.shape) != 1 or dset.maxshape != (None,):
+            if len(info.shape) != 1 or info.maxshape != (None,):
                 return "The object at '%s' is not an HDF5 table." % \
                     (tablename)
 
             # is it a table type?
-            if dset.dtype.names is None:
+            if info.dtype.names is None:
                 return "The object at '%s' is not an HDF5 table." % \
                     (tablename)
 
-            ret = write_rows(f, tablename, rows, columns)
+            ret = write_rows(f, tablename, rows, columns, batch=write_batch)
+            ret += write_batch.failure_note(filename)
 
     except IOError, e:
         logger.info(e)
@@ -0,0 +1,260 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+import numpy as np
+
+from config import Tuning
+from h5_helpers import invalidate_object_info
+
+logger = logging.getLogger(__name__)
+
+# The index of column C of the table T is kept in the group T_index/C next to
+# the table: 'keys' holds the column's values in ascending order, 'rows' the
+# (0-based) positions of the rows they come from, and the scalar 'nrows' the
+# number of table rows indexed (which tells a stale index). (Updates write to
+# datasets only: a SWMR writer can't create or modify attributes.)
+
+INDEX_SUFFIX = '_index'
+
+#==============================================================================
+
+
+def index_path(path, column):
+    """
+    Returns the path of the group holding the index of 'column' of the
+    table at 'path'.
+    """
+    return path.rstrip('/') + INDEX_SUFFIX + '/' + column
+
+#==============================================================================
+
+
+def indexed_columns(loc, path):
+    """
+    Returns the names of the columns of the table at 'path' that have an
+    index.
+    """
+
+    g = loc.get(path.rstrip('/') + INDEX_SUFFIX)
+    if not isinstance(g, h5py.Group):
+        return []
+    return [str(c) for c in g
+            if isinstance(g[c], h5py.Group) and 'keys' in g[c]]
+
+#==============================================================================
+
+
+def sort_keys(keys, rows):
+    """
+    Returns the keys in ascending order and the row positions permuted
+    alike. Equal keys keep their order.
+    """
+    order = np.argsort(keys, kind='mergesort')
+    return keys[order], rows[order]
+
+#==============================================================================
+
+
+def build_index(loc, path, column):
+    """
+    Builds (or rebuilds) the index of 'column' of the table at 'path' and
+    returns the number of rows indexed.
+    """
+
+    dset = loc[path]
+    n = dset.shape[0]
+    key_type = dset.dtype.fields[column][0]
+
+    keys = dset[column] if n > 0 else np.empty((0,), dtype=key_type)
+    keys, rows = sort_keys(np.asarray(keys), np.arange(n, dtype=np.int64))
+
+    ipath = index_path(path, column)
+    if ipath in loc:
+        del loc[ipath]
+        invalidate_object_info(loc, ipath)
+    g = loc.require_group(ipath)
+    chunks = (Tuning.INDEX_CHUNK_ROWS,)
+    g.create_dataset('keys', data=keys, dtype=key_type, maxshape=(None,),
+                     chunks=chunks)
+    g.create_dataset('rows', data=rows, maxshape=(None,), chunks=chunks)
+    g.create_dataset('nrows', data=np.int64(n))
+
+    return n
+
+#==============================================================================
+
+
+def bisect(keys, value, side='left', lo=0, hi=None):
+    """
+    Returns the position at which 'value' would be inserted into the sorted
+    h5py dataset 'keys' (on the given side of equal keys), like
+    np.searchsorted.
+
+    The search probes single keys until the range fits into a chunk, which
+    is then read and searched in memory, i.e., it reads O(log n) keys.
+    """
+
+    if hi is None:
+        hi = keys.shape[0]
+    block = keys.chunks[0] if keys.chunks is not None else 1024
+    while hi - lo > block:
+        mid = (lo + hi) / 2
+        k = keys[mid]
+        if k < value or (side == 'right' and k == value):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo + int(np.searchsorted(keys[lo:hi], value, side=side))
+
+#==============================================================================
+
+
+def indexed_rows(g):
+    """
+    Returns the number of table rows the index group 'g' covers, or -1.
+    """
+
+    if not isinstance(g.get('nrows'), h5py.Dataset):
+        return -1
+    return int(g['nrows'][()])
+
+#==============================================================================
+
+
+def index_is_current(loc, path, column):
+    """
+    Returns True if the table at 'path' has an index of 'column' that
+    covers all of its rows.
+    """
+
+    ipath = index_path(path, column)
+    g = loc.get(ipath)
+    if not isinstance(g, h5py.Group) or 'keys' not in g:
+        return False
+    return indexed_rows(g) == loc[path].shape[0]
+
+#==============================================================================
+
+
+def lookup(loc, path, column, low, high=None):
+    """
+    Returns the (0-based) positions of the rows of the table at 'path' whose
+    'column' value is between low and high (inclusive), or equals low, if
+    high is None. The positions are in key order.
+    """
+
+    g = loc[index_path(path, column)]
+    keys = g['keys']
+    first = bisect(keys, low, 'left')
+    last = bisect(keys, low if high is None else high, 'right', first)
+    if last <= first:
+        return np.empty((0,), dtype=np.int64)
+    return g['rows'][first:last]
+
+#==============================================================================
+
+
+def update_index(loc, path, column, first, keys):
+    """
+    Updates the index of 'column' of the table at 'path' after the rows
+    first, first+1, ... were set to values with the column values 'keys'.
+
+    Appended rows (first equals the number of rows indexed) are merged into
+    the index from the position of their smallest key on, i.e., appending
+    keys larger than the indexed ones only appends to the index.
+    Overwritten rows are dropped from the index first, which rewrites it.
+    """
+
+    g = loc[index_path(path, column)]
+    kds = g['keys']
+    rds = g['rows']
+    n = kds.shape[0]
+    indexed = indexed_rows(g)
+    if first > indexed:
+        raise ValueError('Rows %d to %d are not indexed.' % (indexed, first))
+
+    keys = np.asarray(keys, dtype=kds.dtype)
+    new_keys, new_rows = sort_keys(keys, np.arange(first, first + len(keys),
+                                                   dtype=np.int64))
+
+    if first == indexed:
+        # appended rows: merge from the first key that goes after them
+        pos = n if len(new_keys) == 0 else bisect(kds, new_keys[0], 'right')
+        old_keys = kds[pos:] if pos < n else new_keys[:0]
+        old_rows = rds[pos:] if pos < n else new_rows[:0]
+    else:
+        # overwritten rows: drop them
+        pos = 0
+        old_keys = kds[:] if n > 0 else new_keys[:0]
+        old_rows = rds[:] if n > 0 else new_rows[:0]
+        keep = (old_rows < first) | (old_rows >= first + len(keys))
+        old_keys = old_keys[keep]
+        old_rows = old_rows[keep]
+
+    # the old keys go first, i.e., equal keys stay in row order (mostly)
+    k, r = sort_keys(np.concatenate((old_keys, new_keys)),
+                     np.concatenate((old_rows, new_rows)))
+
+    # (the index is stale until it's complete again)
+    g['nrows'][()] = -1
+    kds.resize((pos + len(k),))
+    rds.resize((pos + len(r),))
+    if len(k) > 0:
+        kds[pos:] = k
+        rds[pos:] = r
+    g['nrows'][()] = max(indexed, first + len(keys))
+
+#==============================================================================
+
+
+def invalidate_indexes(loc, path):
+    """
+    Marks the indexes of the table at 'path' stale, e.g., after a write
+    they were updated for failed.
+    """
+
+    for c in indexed_columns(loc, path):
+        g = loc[index_path(path, c)]
+        if isinstance(g.get('nrows'), h5py.Dataset):
+            g['nrows'][()] = -1
+
+#==============================================================================
+
+
+def update_indexes(loc, path, nrows, first, a):
+    """
+    Updates the indexes of the table at 'path', which had 'nrows' rows,
+    after the records 'a' were written to the rows first, first+1, ...
+    (first <= nrows).
+
+    Indexed columns that 'a' doesn't have are only updated for the rows
+    appended, which took the fill value. Indexes that were stale already
+    are left alone (lookups will report them).
+    """
+
+    fillvalue = loc[path].fillvalue
+    for c in indexed_columns(loc, path):
+        g = loc[index_path(path, c)]
+        if indexed_rows(g) != nrows:
+            logger.info("Index '%s' is out of date." % (index_path(path, c)))
+            continue
+        if c in a.dtype.names:
+            update_index(loc, path, c, first, a[c])
+        elif first + len(a) > nrows:
+            # (a variable-length string's fill value reads as '')
+            fill = fillvalue[c]
+            if fill is None:
+                fill = ''
+            update_index(loc, path, c, nrows,
+                         np.repeat(fill, first + len(a) - nrows))
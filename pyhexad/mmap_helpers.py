@@ -0,0 +1,126 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+import numpy as np
+
+from cache_helpers import LRUCache
+from config import Tuning
+from h5_helpers import object_info, object_info_key
+
+logger = logging.getLogger(__name__)
+
+# memory maps keyed by (file number, absolute path)
+
+_memmaps = LRUCache(Tuning.MAX_MEMMAPS)
+
+#==============================================================================
+
+
+def is_mappable(loc, info):
+    """
+    Returns True if the dataset described by the ObjectInfo 'info' can be
+    read via a memory map of its file: the dataset must be contiguous,
+    unfiltered, and of a numeric type, and the file must be opened
+    read-only (and not as a SWMR reader) with the default (sec2) driver.
+
+    (Data written through a writable handle may still sit in HDF5's sieve
+    buffer, and a SWMR writer may move things around.)
+    """
+
+    if info is None or info.cls != h5py.Dataset:
+        return False
+    if info.chunks is not None or len(info.filters) > 0:
+        return False
+    if len(info.shape) == 0 or info.dtype.kind not in 'biuf':
+        return False
+
+    f = loc.file
+    if f.driver != 'sec2':
+        return False
+    if f.id.get_intent() != h5py.h5f.ACC_RDONLY:
+        return False
+
+    return True
+
+#==============================================================================
+
+
+def mapped_array(loc, path):
+    """
+    Returns a read-only np.memmap of the dataset at (loc, path), or None,
+    if the dataset can't be mapped, e.g., because no storage has been
+    allocated, or the data lives in external files.
+    """
+
+    info = object_info(loc, path)
+    if not is_mappable(loc, info):
+        return None
+
+    key = object_info_key(loc, path)
+    a = _memmaps.get(key)
+    if a is not None:
+        return a
+
+    try:
+        offset = loc[path].id.get_offset()
+        if offset is None:  # not allocated, compact, or external
+            return None
+        a = np.memmap(loc.file.filename, dtype=info.dtype, mode='r',
+                      offset=offset, shape=info.shape)
+    except Exception, e:
+        logger.info(e)
+        return None
+
+    _memmaps.put(key, a)
+    return a
+
+#==============================================================================
+
+
+def read_mapped(loc, path, slices, mem_type):
+    """
+    Returns the hyperslab 'slices' of the dataset at (loc, path) as an array
+    of type mem_type, or None, if the dataset can't be mapped.
+
+    If mem_type is the file type, the result is a view of the memory map
+    (no copy). Otherwise, only the selected elements are converted.
+    """
+
+    a = mapped_array(loc, path)
+    if a is None:
+        return None
+
+    x = a[slices]
+    if x.dtype != mem_type:
+        x = x.astype(mem_type)
+    return x
+
+#==============================================================================
+
+
+def memmap_stats():
+    """
+    Returns a list of (key, value) pairs describing the memory maps.
+    """
+    return _memmaps.info()
+
+#==============================================================================
+
+
+def release_memmaps():
+    """
+    Drops all memory maps. (On Windows, a mapped file can't be deleted or
+    renamed.)
+    """
+    _memmaps.clear()
@@ -0,0 +1,295 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+import Queue
+import threading
+
+import h5py
+import numpy as np
+
+from cache_helpers import SizedLRUCache
+from config import Tuning
+from file_helpers import _pool, file_stamp, is_memory_file, pool_key
+from read_helpers import read_hyperslab
+from result_helpers import array_nbytes
+
+logger = logging.getLogger(__name__)
+
+# blocks of rows keyed by (dataset key, block number), where the dataset key
+# is (file key, file stamp, path, memory type)
+
+_blocks = SizedLRUCache(Tuning.MAX_CACHED_BLOCKS, Tuning.PAGE_CACHE_BYTES,
+                        array_nbytes)
+
+# the number of times the blocks of a file were invalidated, keyed by file
+# key; a block read before an invalidation is not cached after it
+
+_invalidations = {}
+_invalidations_lock = threading.Lock()
+
+#==============================================================================
+
+
+def dataset_key(dset, mem_type):
+    """
+    Returns the key of the rows of type mem_type of the h5py dataset 'dset',
+    or None, if its blocks must not be cached: the file can't be stat'ed,
+    or it's opened by a SWMR reader (the data may grow any time).
+    """
+
+    if dset.file.id.get_intent() & h5py.h5f.ACC_SWMR_READ:
+        return None
+    # (the key the pool's write hooks get; for an in-memory file, that's
+    # not the name of its backing store)
+    key = pool_key(dset)
+    stamp = None
+    if not is_memory_file(key):
+        stamp = file_stamp(key)
+        if stamp is None:
+            return None
+    return (key, stamp, dset.name, mem_type.str if
+            mem_type.names is None else str(mem_type.descr))
+
+#==============================================================================
+
+
+def invalidation_count(dkey):
+    """
+    Returns the number of times the blocks of the file of the dataset key
+    dkey were invalidated.
+    """
+
+    with _invalidations_lock:
+        return _invalidations.get(dkey[0], 0)
+
+#==============================================================================
+
+
+def block_rows(dset, mem_type):
+    """
+    Returns the number of rows of the blocks in which the dataset 'dset' is
+    read and cached: about Tuning.PAGE_BLOCK_BYTES (in memory), and a
+    multiple of the chunk's rows, so that no chunk is read for two blocks.
+    """
+
+    row_bytes = mem_type.itemsize * int(np.prod(dset.shape[1:]))
+    rows = max(Tuning.PAGE_BLOCK_BYTES / max(row_bytes, 1), 1)
+    if dset.chunks is not None:
+        c = dset.chunks[0]
+        rows = max(rows / c, 1) * c
+    return rows
+
+#==============================================================================
+
+
+def read_block(dset, dkey, b, rows, mem_type, count):
+    """
+    Returns block b (of 'rows' rows) of 'dset' from the cache, or reads it.
+
+    A block read is cached only if the file's blocks haven't been
+    invalidated since the caller looked up their invalidation_count(),
+    'count'. (Deferred writes don't change the file stamp until they are
+    committed, i.e., a block read in the meantime would be kept.)
+    """
+
+    block = _blocks.get((dkey, b))
+    if block is None:
+        slc = (slice(b*rows, min((b+1)*rows, dset.shape[0])),) + \
+            tuple([slice(0, n) for n in dset.shape[1:]])
+        block = read_hyperslab(dset, slc, mem_type)
+        with _invalidations_lock:
+            if _invalidations.get(dkey[0], 0) == count:
+                _blocks.put((dkey, b), block)
+    return block
+
+#==============================================================================
+
+
+def page_blocks(page, page_size, rows, nrows):
+    """
+    Returns the (0-based) rows [start, stop) of (0-based) page 'page' and
+    the numbers of the blocks they fall into.
+    """
+
+    start = min(page * page_size, nrows)
+    stop = min(start + page_size, nrows)
+    if start == stop:
+        return start, stop, []
+    return start, stop, range(start / rows, (stop-1) / rows + 1)
+
+#==============================================================================
+
+
+class Prefetcher(object):
+    """
+    A background thread that reads blocks into the block cache.
+
+    Requests are tagged with the dataset and a generation. Moving to a page
+    that isn't next to the previous one starts a new generation, and
+    pending requests of older generations are dropped.
+    """
+
+    def __init__(self):
+        self.prefetched = 0
+        self.cancelled = 0
+        self._queue = Queue.Queue()
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._generations = {}
+        self._thread = None
+
+    def visit(self, dkey, page):
+        """
+        Records a visit of page of the dataset dkey, and returns the
+        current generation.
+        """
+
+        with self._lock:
+            last = self._pages.get(dkey)
+            self._pages[dkey] = page
+            generation = self._generations.get(dkey, 0)
+            if last is not None and abs(page - last) > 1:
+                generation += 1
+                self._generations[dkey] = generation
+            return generation
+
+    def submit(self, dkey, generation, read):
+        """
+        Schedules 'read()' unless a newer generation exists by the time
+        it's due.
+        """
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run,
+                                                name='PyHexad prefetch')
+                self._thread.daemon = True
+                self._thread.start()
+        self._queue.put((dkey, generation, read))
+
+    def wait(self):
+        """
+        Blocks until all requests are done.
+        """
+        self._queue.join()
+
+    def info(self):
+        return [('Blocks prefetched:', self.prefetched),
+                ('Requests cancelled:', self.cancelled)]
+
+    def _run(self):
+        while True:
+            dkey, generation, read = self._queue.get()
+            try:
+                with self._lock:
+                    current = self._generations.get(dkey, 0)
+                if generation != current:
+                    self.cancelled += 1
+                else:
+                    read()
+                    self.prefetched += 1
+            except Exception, e:  # e.g., the file was closed
+                logger.info(e)
+            finally:
+                self._queue.task_done()
+
+_prefetcher = Prefetcher()
+
+#==============================================================================
+
+
+def read_page(dset, dkey, page, page_size, mem_type):
+    """
+    Returns the rows of (0-based) page 'page' of 'dset' as an array of type
+    mem_type, and schedules reading the pages before and after it. 'dkey'
+    is the dataset's key (see dataset_key).
+
+    Pages are assembled from cached, chunk-aligned blocks of rows. The
+    blocks of the neighboring pages are prefetched, unless they'd take up
+    more than half of the block cache.
+    """
+
+    nrows = dset.shape[0]
+    if dkey is None:  # nothing to cache
+        start = min(page * page_size, nrows)
+        slc = (slice(start, min(start + page_size, nrows)),) + \
+            tuple([slice(0, n) for n in dset.shape[1:]])
+        return read_hyperslab(dset, slc, mem_type)
+
+    rows = block_rows(dset, mem_type)
+    count = invalidation_count(dkey)
+
+    start, stop, blocks = page_blocks(page, page_size, rows, nrows)
+    parts = []
+    for b in blocks:
+        block = read_block(dset, dkey, b, rows, mem_type, count)
+        lo = max(start - b*rows, 0)
+        hi = min(stop - b*rows, len(block))
+        parts.append(block[lo:hi])
+    if len(parts) == 1:
+        x = parts[0].copy()
+    elif len(parts) > 1:
+        x = np.concatenate(parts)
+    else:
+        x = np.empty((0,) + dset.shape[1:], dtype=mem_type)
+
+    # read ahead (and behind)
+    generation = _prefetcher.visit(dkey, page)
+    ahead = []
+    for p in (page+1, page-1):
+        if p >= 0:
+            ahead.extend([b for b in page_blocks(p, page_size, rows,
+                                                 nrows)[2]
+                          if b not in blocks and b not in ahead])
+    row_bytes = mem_type.itemsize * int(np.prod(dset.shape[1:]))
+    if len(ahead) * rows * row_bytes <= _blocks.max_bytes / 2:
+        for b in ahead:
+            if (dkey, b) not in _blocks:
+                _prefetcher.submit(dkey, generation,
+                                   lambda b=b: read_block(dset, dkey, b,
+                                                          rows, mem_type,
+                                                          count))
+
+    return x
+
+#==============================================================================
+
+
+def invalidate_blocks(key):
+    """
+    Drops the cached blocks of the file known to the file pool as key.
+    """
+
+    with _invalidations_lock:
+        _invalidations[key] = _invalidations.get(key, 0) + 1
+        return _blocks.discard(lambda k: k[0][0] == key)
+
+# our own writes go through the file pool
+
+_pool.write_hooks.append(invalidate_blocks)
+
+#==============================================================================
+
+
+def page_cache_info():
+    """
+    Returns a list of (key, value) pairs describing the block cache and the
+    prefetcher.
+    """
+    return _blocks.info() + _prefetcher.info()
+
+
+def wait_for_prefetch():
+    """
+    Blocks until the prefetcher is idle.
+    """
+    _prefetcher.wait()
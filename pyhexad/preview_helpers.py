@@ -0,0 +1,243 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import collections
+import logging
+
+import numpy as np
+
+from config import Tuning
+from read_helpers import read_hyperslab, selection_shape
+from reduce_helpers import block_shape, iter_blocks
+
+logger = logging.getLogger(__name__)
+
+# the supported decimation methods
+
+DECIMATIONS = ('minmax', 'lttb')
+
+#==============================================================================
+
+
+def iter_selection(dset, slices):
+    """
+    Reads the hyperslab 'slices' of the h5py dataset 'dset' in chunk-aligned
+    blocks (as float64) and yields (offsets, block) pairs, where 'offsets'
+    is the position of the block in the hyperslab.
+    """
+
+    shape = dset.shape
+    chunks = dset.chunks
+    if chunks is None:
+        chunks = (1,) * len(shape)
+    block = block_shape(shape, chunks, Tuning.REDUCE_BLOCK_BYTES)
+
+    for block_slices, offsets in iter_blocks(slices, shape, block):
+        yield (offsets, read_hyperslab(dset, block_slices, np.float64))
+
+#==============================================================================
+
+
+def bucket_starts(first, count, n, buckets):
+    """
+    Returns the bucket numbers of the positions first, ..., first+count-1
+    (of n positions in 'buckets' equal buckets) and the indices (relative to
+    'first') where a new bucket begins.
+    """
+
+    ids = (np.arange(first, first + count) * buckets) / n
+    starts = np.flatnonzero(np.diff(ids)) + 1
+    return ids, np.concatenate(([0], starts))
+
+#==============================================================================
+
+
+def segment_extrema(x, starts):
+    """
+    Returns the minima, maxima, and the (relative) positions of the first
+    minimum and maximum of the segments of the 1D array 'x' that begin at
+    'starts'. NaNs are ignored.
+    """
+
+    seg = np.zeros(len(x), dtype=np.intp)
+    seg[starts[1:]] = 1
+    seg = np.cumsum(seg)
+
+    mins = np.fmin.reduceat(x, starts)
+    maxs = np.fmax.reduceat(x, starts)
+
+    def first_match(values):
+        pos = starts.copy()  # all NaN segments
+        hits = np.flatnonzero(x == values[seg])
+        found, first = np.unique(seg[hits], return_index=True)
+        pos[found] = hits[first]
+        return pos
+
+    return mins, maxs, first_match(mins), first_match(maxs)
+
+#==============================================================================
+
+
+def minmax_1d(dset, slc, size):
+    """
+    Decimates the hyperslab 'slc' (a 1-tuple) of a 1D dataset to at most
+    'size' points by keeping the minimum and the maximum of each of size/2
+    buckets (in the order they occur).
+
+    Returns the (0-based) positions in the hyperslab and the values.
+    """
+
+    n = selection_shape(dset.shape, slc)[0]
+    buckets = min(n, max(size / 2, 1))
+
+    mins = np.full(buckets, np.nan)
+    maxs = np.full(buckets, np.nan)
+    min_pos = np.zeros(buckets, dtype=np.intp)
+    max_pos = np.zeros(buckets, dtype=np.intp)
+
+    for offsets, x in iter_selection(dset, slc):
+        ids, starts = bucket_starts(offsets[0], len(x), n, buckets)
+        bmin, bmax, bmin_pos, bmax_pos = segment_extrema(x, starts)
+        b = ids[starts]
+
+        # keep the first occurrence across blocks
+        with np.errstate(invalid='ignore'):
+            lower = (bmin < mins[b]) | np.isnan(mins[b])
+            higher = (bmax > maxs[b]) | np.isnan(maxs[b])
+        mins[b[lower]] = bmin[lower]
+        min_pos[b[lower]] = offsets[0] + bmin_pos[lower]
+        maxs[b[higher]] = bmax[higher]
+        max_pos[b[higher]] = offsets[0] + bmax_pos[higher]
+
+    # interleave min and max in the order they occur, drop duplicates
+    pos = np.column_stack((np.minimum(min_pos, max_pos),
+                           np.maximum(min_pos, max_pos))).ravel()
+    keep = np.concatenate(([True], np.diff(pos) != 0))
+    pos = pos[keep]
+    first_is_min = (min_pos <= max_pos)
+    val = np.column_stack((np.where(first_is_min, mins, maxs),
+                           np.where(first_is_min, maxs, mins))).ravel()
+    return pos, val[keep]
+
+#==============================================================================
+
+
+def minmax_2d(dset, slices, size):
+    """
+    Decimates the hyperslab 'slices' of a 2D dataset to at most
+    size[0] x size[1] elements. The hyperslab is divided into
+    (size[0]/2) x size[1] tiles, and each tile contributes its minimum and
+    maximum to two consecutive rows of the result.
+    """
+
+    n = selection_shape(dset.shape, slices)
+    br = min(n[0], max(size[0] / 2, 1))
+    bc = min(n[1], max(size[1], 1))
+
+    mins = np.full((br, bc), np.inf)
+    maxs = np.full((br, bc), -np.inf)
+
+    for offsets, x in iter_selection(dset, slices):
+        rids, rstarts = bucket_starts(offsets[0], x.shape[0], n[0], br)
+        cids, cstarts = bucket_starts(offsets[1], x.shape[1], n[1], bc)
+        tile = np.ix_(rids[rstarts], cids[cstarts])
+
+        t = np.fmin.reduceat(np.fmin.reduceat(x, rstarts, axis=0),
+                             cstarts, axis=1)
+        mins[tile] = np.fmin(mins[tile], t)
+        t = np.fmax.reduceat(np.fmax.reduceat(x, rstarts, axis=0),
+                             cstarts, axis=1)
+        maxs[tile] = np.fmax(maxs[tile], t)
+
+    y = np.empty((2*br, bc))
+    y[0::2] = mins
+    y[1::2] = maxs
+    return y
+
+#==============================================================================
+
+
+def lttb_1d(dset, slc, size):
+    """
+    Decimates the hyperslab 'slc' (a 1-tuple) of a 1D dataset to 'size'
+    points with the Largest-Triangle-Three-Buckets algorithm (Steinarsson,
+    2013). The first and the last point are always kept.
+
+    The data are streamed. Only the bucket being decided and the one after
+    it are kept in memory.
+
+    Returns the (0-based) positions in the hyperslab and the values.
+    """
+
+    n = selection_shape(dset.shape, slc)[0]
+    if size < 3 or n <= size:
+        raise ValueError('Nothing to decimate.')
+
+    buckets = size - 2
+    pos = []
+    val = []
+
+    # complete buckets (positions, values), and the one being filled
+    done = collections.deque()
+    filling = ([], [])
+    current = 0
+
+    def select(a, b, c):
+        """ the point of bucket b forming the largest triangle with a, c """
+        bx, by = b
+        area = np.abs((a[0] - c[0]) * (by - a[1]) -
+                      (a[0] - bx) * (c[1] - a[1]))
+        i = np.argmax(area)
+        return (bx[i], by[i])
+
+    for offsets, x in iter_selection(dset, slc):
+        p = np.arange(offsets[0], offsets[0] + len(x))
+        if offsets[0] == 0:
+            pos.append(0)
+            val.append(x[0])
+        last = (p[-1], x[-1])
+
+        # the interior points 1, ..., n-2 go into buckets
+        inner = (p >= 1) & (p <= n-2)
+        p, x = p[inner], x[inner]
+        if len(p) == 0:
+            continue
+        ids = ((p - 1) * buckets) / (n - 2)
+        starts = np.flatnonzero(np.diff(ids)) + 1
+        for b, bp, bx in zip(ids[np.concatenate(([0], starts))],
+                             np.split(p, starts), np.split(x, starts)):
+            if b != current:
+                done.append((np.concatenate(filling[0]),
+                             np.concatenate(filling[1])))
+                filling = ([], [])
+                current = b
+            filling[0].append(bp.astype(np.float64))
+            filling[1].append(bx)
+
+        while len(done) >= 2:
+            b0 = done.popleft()
+            c = (done[0][0].mean(), done[0][1].mean())
+            a = select((pos[-1], val[-1]), b0, c)
+            pos.append(a[0])
+            val.append(a[1])
+
+    done.append((np.concatenate(filling[0]), np.concatenate(filling[1])))
+    while len(done) > 0:
+        b0 = done.popleft()
+        c = (done[0][0].mean(), done[0][1].mean()) if len(done) > 0 \
+            else last
+        a = select((pos[-1], val[-1]), b0, c)
+        pos.append(a[0])
+        val.append(a[1])
+
+    pos.append(last[0])
+    val.append(last[1])
+    return np.asarray(pos, dtype=np.intp), np.asarray(val)
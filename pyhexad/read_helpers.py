@@ -0,0 +1,133 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import h5py
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def selection_shape(shape, slices):
+    """
+    Returns the shape of the hyperslab 'slices' (a tuple of slices, one
+    per dimension) of an array of shape 'shape'.
+    """
+
+    if len(slices) != len(shape):
+        raise ValueError('One slice per dimension expected.')
+
+    return tuple([len(xrange(*s.indices(n))) for s, n in zip(slices, shape)])
+
+#==============================================================================
+
+
+def field_subset(dty, names):
+    """
+    Returns the compound type made of the fields 'names' of 'dty'
+    (in that order).
+    """
+    return np.dtype([(n, dty.fields[n][0]) for n in names])
+
+#==============================================================================
+
+
+def read_hyperslab(dset, slices, mem_type):
+    """
+    Reads the hyperslab 'slices' of the h5py dataset 'dset' into a freshly
+    allocated array of type mem_type and returns that array.
+
+    The buffer is allocated once, in its final shape and type, and HDF5
+    converts the elements while filling it. There are no intermediate
+    copies. (HDF5 can't convert fixed- to variable-length strings. For those,
+    we read the elements as they are and let Numpy convert them.)
+    """
+
+    out = np.empty(selection_shape(dset.shape, slices), dtype=mem_type)
+    if out.size == 0:
+        return out
+
+    try:
+        dset.read_direct(out, source_sel=slices)
+    except (TypeError, IOError), e:
+        logger.debug(e)
+        # read the fields as they are, but only those selected
+        names = out.dtype.names
+        out = dset[tuple(slices) + (names or ())].astype(mem_type)
+    return out
+
+#==============================================================================
+
+
+def read_selection(dset, fspace, shape, mem_type):
+    """
+    Reads the elements of the file dataspace selection 'fspace' of the h5py
+    dataset 'dset' (in the order HDF5 iterates over them) into a freshly
+    allocated array of the given shape and type mem_type.
+    """
+
+    out = np.empty(shape, dtype=mem_type)
+    if out.size == 0:
+        return out
+
+    mspace = h5py.h5s.create_simple(shape)
+    try:
+        dset.id.read(mspace, fspace, out)
+    except (TypeError, IOError), e:  # fixed- to variable-length strings
+        logger.debug(e)
+        names = out.dtype.names
+        raw = np.empty(shape, dtype=dset.dtype if names is None else
+                       field_subset(dset.dtype, names))
+        dset.id.read(mspace, fspace, raw)
+        out = raw.astype(mem_type)
+    return out
+
+#==============================================================================
+
+
+def read_blocks(dset, start, stride, count, block, mem_type):
+    """
+    Reads a regular pattern of blocks of the h5py dataset 'dset': in each
+    dimension, 'count' blocks of 'block' elements, the first beginning at
+    'start' and each following 'stride' elements after the previous one.
+    (All 0-based, one value per dimension.)
+
+    Only the blocks are read (not their bounding box). The result has
+    count*block elements in each dimension.
+    """
+
+    fspace = dset.id.get_space()
+    fspace.select_hyperslab(tuple(start), tuple(count), tuple(stride),
+                            tuple(block))
+    shape = tuple([c*b for c, b in zip(count, block)])
+    return read_selection(dset, fspace, shape, mem_type)
+
+#==============================================================================
+
+
+def read_points(dset, coords, mem_type):
+    """
+    Reads the elements of the h5py dataset 'dset' at the (0-based)
+    coordinates 'coords' (an n x rank array) into a one-dimensional array
+    of type mem_type, in the order given.
+    """
+
+    coords = np.asarray(coords, dtype=np.uint64).reshape(
+        (-1, len(dset.shape)))
+    if len(coords) == 0:
+        return np.empty((0,), dtype=mem_type)
+
+    fspace = dset.id.get_space()
+    fspace.select_elements(coords)
+    return read_selection(dset, fspace, (len(coords),), mem_type)
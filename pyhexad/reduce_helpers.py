@@ -0,0 +1,184 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+
+import numpy as np
+
+from config import Tuning
+from read_helpers import read_hyperslab, selection_shape
+
+logger = logging.getLogger(__name__)
+
+# the supported reductions
+
+REDUCTIONS = ('sum', 'mean', 'min', 'max', 'std')
+
+#==============================================================================
+
+
+def block_shape(shape, chunks, nbytes):
+    """
+    Returns the shape of the blocks in which an array of shape 'shape' and
+    chunk shape 'chunks' is read, if a block may take up to 'nbytes' bytes
+    (as float64).
+
+    Blocks are whole multiples of chunks, growing the fastest-varying
+    dimension first. For contiguous arrays, pass all ones as 'chunks'.
+    """
+
+    n = max(nbytes / 8, 1)
+    block = list(chunks)
+    for i in reversed(range(len(shape))):
+        other = int(np.prod(block[:i] + block[i+1:]))
+        k = max(n / (other * chunks[i]), 1)
+        extent = -(-shape[i] / chunks[i]) * chunks[i]
+        block[i] = min(k * chunks[i], extent)
+    return tuple(block)
+
+#==============================================================================
+
+
+def iter_blocks(slices, shape, block):
+    """
+    Splits the hyperslab 'slices' of an array of shape 'shape' along the
+    (dataset) block boundaries 'block'.
+
+    Yields (block_slices, offsets) pairs, where 'block_slices' selects the
+    part of the hyperslab that falls into one block and 'offsets' is the
+    position of its first element in the hyperslab.
+    """
+
+    dims = []
+    for s, n, b in zip(slices, shape, block):
+        start, stop, step = s.indices(n)
+        parts = []
+        i = 0
+        while start < stop:
+            # the first block boundary after start
+            hi = min((start / b + 1) * b, stop)
+            count = len(xrange(start, hi, step))
+            parts.append((slice(start, hi, step), i))
+            i += count
+            start += count * step
+        dims.append(parts)
+
+    def product(d):
+        if d == len(dims):
+            yield ((), ())
+            return
+        for s, i in dims[d]:
+            for rest, offsets in product(d+1):
+                yield ((s,) + rest, (i,) + offsets)
+
+    return product(0)
+
+#==============================================================================
+
+
+class RunningStats(object):
+    """
+    Running count, sum, mean, sum of squared deviations, minimum, and
+    maximum of the elements of an array, reduced along one axis or all.
+
+    Blocks are merged with the pairwise update of Chan, Golub, and LeVeque,
+    which doesn't suffer from the cancellation of the textbook
+    (sum of squares) formula.
+    """
+
+    def __init__(self, shape):
+        self.count = np.zeros(shape, dtype=np.float64)
+        self.sum = np.zeros(shape, dtype=np.float64)
+        self.mean = np.zeros(shape, dtype=np.float64)
+        self.m2 = np.zeros(shape, dtype=np.float64)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    def update(self, x, axis=None, where=()):
+        """
+        Merges the statistics of the float64 block 'x', reduced along 'axis'
+        (or all axes), into the statistics at 'where'.
+        """
+
+        if x.size == 0:
+            return
+
+        nb = x.size if axis is None else x.shape[axis]
+        mb = x.mean(axis=axis)
+        m2b = np.square(x - (mb if axis is None else
+                             np.expand_dims(mb, axis))).sum(axis=axis)
+
+        na = self.count[where]
+        n = na + nb
+        delta = mb - self.mean[where]
+        self.mean[where] += delta * nb / n
+        self.m2[where] += m2b + np.square(delta) * na * nb / n
+        self.count[where] = n
+        self.sum[where] += x.sum(axis=axis)
+        self.min[where] = np.minimum(self.min[where], x.min(axis=axis))
+        self.max[where] = np.maximum(self.max[where], x.max(axis=axis))
+
+    def result(self, op):
+        """
+        Returns the reduction 'op' (one of REDUCTIONS).
+        """
+
+        if op == 'sum':
+            return self.sum
+        elif op == 'mean':
+            return self.mean
+        elif op == 'min':
+            return self.min
+        elif op == 'max':
+            return self.max
+        elif op == 'std':
+            return np.sqrt(self.m2 / self.count)
+        else:
+            raise ValueError("Unknown reduction '%s'." % (op))
+
+#==============================================================================
+
+
+def reduce_hyperslab(dset, slices, op, axis=None):
+    """
+    Returns the reduction 'op' of the hyperslab 'slices' of the h5py dataset
+    'dset' along 'axis' (or all axes) as a float64 array.
+
+    The hyperslab is read in chunk-aligned blocks of at most
+    Tuning.REDUCE_BLOCK_BYTES bytes, i.e., memory use doesn't depend on the
+    size of the hyperslab.
+    """
+
+    if op not in REDUCTIONS:
+        raise ValueError("Unknown reduction '%s'." % (op))
+
+    shape = dset.shape
+    chunks = dset.chunks
+    if chunks is None:
+        chunks = (1,) * len(shape)
+    block = block_shape(shape, chunks, Tuning.REDUCE_BLOCK_BYTES)
+
+    sel = selection_shape(shape, slices)
+    if axis is None:
+        stats = RunningStats(())
+    else:
+        stats = RunningStats(sel[:axis] + sel[axis+1:])
+
+    for block_slices, offsets in iter_blocks(slices, shape, block):
+        x = read_hyperslab(dset, block_slices, np.float64)
+        if axis is None:
+            where = ()
+        else:
+            where = tuple([slice(o, o + c) for i, (o, c) in
+                           enumerate(zip(offsets, x.shape)) if i != axis])
+        stats.update(x, axis, where)
+
+    return stats.result(op)
@@ -23,6 +23,8 @@ except ImportError:
 import numpy as np
 import pyxll
 
+from table_helpers import ExcelTable
+
 #==============================================================================
 
 def xl_app():
@@ -89,14 +91,14 @@ def draw(arr):
 
 def draw_table(tbl):
     """
-    Renders a table = list of rows = list of lists.
+    Renders a table = list of rows = list of lists, or an ExcelTable.
 
     We assume the CALLER did the proper type conversions!!!
     (We can handle strings, int32, and float64 colums.)
     """
 
-    if not isinstance(tbl, list):
-        raise TypeError('List expected.')
+    if not isinstance(tbl, (list, ExcelTable)):
+        raise TypeError('List or ExcelTable expected.')
 
     # get the address of the calling cell using xlfCaller
     caller = pyxll.xlfCaller()
@@ -127,5 +129,9 @@ def draw_table(tbl):
     #
     #=======================================================================
 
+    # whole columns at a time rather than record by record
+    if isinstance(tbl, ExcelTable):
+        tbl = tbl.to_matrix()
+
     # kick off the asynchronous call to the update function
     pyxll.async_call(update_func, tbl)
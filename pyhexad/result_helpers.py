@@ -0,0 +1,165 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+import sys
+
+import h5py
+import numpy as np
+
+from cache_helpers import SizedLRUCache
+from config import Tuning
+from file_helpers import _pool, file_key, file_stamp, is_memory_file
+from table_helpers import ExcelTable
+
+logger = logging.getLogger(__name__)
+
+#==============================================================================
+
+
+def array_nbytes(a):
+    """
+    Returns the memory used by the ndarray 'a', including the objects
+    (e.g., variable-length strings) it refers to.
+    """
+
+    n = a.nbytes
+    if a.dtype.hasobject:
+        if a.dtype.names is None:
+            fields = [a]
+        else:
+            fields = [a[k] for k in a.dtype.names if a.dtype[k].hasobject]
+        for f in fields:
+            n += sum([sys.getsizeof(v) for v in f.flat])
+    return n
+
+#==============================================================================
+
+
+def result_nbytes(result):
+    """
+    Returns the memory used by a cached (value, message) pair.
+    """
+
+    x = result[0]
+    if isinstance(x, ExcelTable):
+        return array_nbytes(x.records)
+    return array_nbytes(x)
+
+# (value, message) pairs keyed by (file key, file stamp, function, args...)
+
+_results = SizedLRUCache(Tuning.MAX_CACHED_RESULTS, Tuning.RESULT_CACHE_BYTES,
+                         result_nbytes)
+
+#==============================================================================
+
+
+def freeze(arg):
+    """
+    Returns a hashable version of a worksheet function argument.
+    """
+
+    if isinstance(arg, np.ndarray):
+        return tuple(arg.tolist())
+    if isinstance(arg, (list, tuple)):
+        return tuple([freeze(a) for a in arg])
+    return arg
+
+#==============================================================================
+
+
+def result_key(filename, function, *args):
+    """
+    Returns the result cache key for calling 'function' with 'args' on
+    filename, or None, if the file can't be stat'ed.
+
+    The key includes the file's size, modification time, and inode, i.e.,
+    changes made by other programs make the entries unreachable.
+    """
+
+    if is_memory_file(filename):
+        stamp = None
+    else:
+        stamp = file_stamp(filename)
+        if stamp is None:
+            return None
+
+    return (file_key(filename), stamp, function) + \
+        tuple([freeze(a) for a in args])
+
+#==============================================================================
+
+
+def is_mapped(x):
+    """
+    Returns True if the ndarray 'x' is (a view of) a memory map.
+    """
+
+    while isinstance(x, np.ndarray):
+        if isinstance(x, np.memmap):
+            return True
+        x = x.base
+    return False
+
+#==============================================================================
+
+
+def cached_result(key):
+    """
+    Returns the (value, message) pair cached under key or None.
+    """
+
+    if key is None:
+        return None
+    return _results.get(key)
+
+#==============================================================================
+
+
+def cache_result(key, loc, x, msg):
+    """
+    Caches the (value, message) pair of a read from the file loc belongs to.
+
+    Memory-mapped results (cheap to recreate and keeping the file mapped)
+    and results read by a SWMR reader (the data may grow any time) are not
+    cached.
+    """
+
+    if key is None or x is None:
+        return
+    if loc.file.id.get_intent() & h5py.h5f.ACC_SWMR_READ:
+        return
+    if is_mapped(x if not isinstance(x, ExcelTable) else x.records):
+        return
+    _results.put(key, (x, msg))
+
+#==============================================================================
+
+
+def invalidate_results(key):
+    """
+    Drops the cached results for the file known to the file pool as key.
+    Returns the number of results dropped.
+    """
+    return _results.discard(lambda k: k[0] == key)
+
+# our own writes go through the file pool
+
+_pool.write_hooks.append(invalidate_results)
+
+#==============================================================================
+
+
+def result_cache_info():
+    """
+    Returns a list of (key, value) pairs describing the result cache.
+    """
+    return _results.info()
@@ -9,6 +9,9 @@
 # request a copy from help@hdfgroup.org.                                     #
 ##############################################################################
 
+import itertools
+import numbers
+
 import numpy as np
 
 #==============================================================================
@@ -230,105 +233,209 @@ def lol_2_ndarray(lol):
 #==============================================================================
 
 
-def try_intarray(x):
-    """
-    Converts a float or list or list of lists into an ndarray of int32.
-
-    Returns a tuple with the ndarray and an error message.
-    """
-
-    if x is None or not isinstance(x, (float, list)):
-        raise TypeError('Invalid argument type. Expected float or list.')
-
-    a = None
-    ret = '\0'
-
-    try:
-        a = np.asarray(x, dtype=np.int32).flatten()
-    except:
-        ret = 'Unable to convert the argment to an integer array.'
-
-    return (a, ret)
-
-#==============================================================================
-
-
-def normalize_first(first, shape):
+def as_int_tuple(x):
     """
-    FIRST must be a non-negative array of the same length as SHAPE.
+    Converts an integer, a float, a (nested) list or tuple, or an ndarray
+    into a tuple of Python ints. Raises ValueError if that's not possible.
 
-    Switch from 1-based to 0-based indexing as part of the normalization
+    Worksheet ranges arrive as lists of lists of floats, and are converted
+    element by element, without a detour through Numpy.
     """
 
-    if not isinstance(shape, tuple) and len(shape) > 0 and len(shape) < 32:
-        raise TypeError("Invalid 'shape' found.")
+    if isinstance(x, np.ndarray):
+        x = x.tolist()
+    if not isinstance(x, (list, tuple)):
+        x = (x,)
 
-    if first is None:  # the default is (0,...,0)
-        return tuple([0 for i in shape])
-    elif not isinstance(first, (float, list)):
-        raise TypeError("'first' must be an integer or integer array.")
-    else:
-        npfirst, ret = try_intarray(first)
-        if npfirst is None:
-            raise TypeError("'first' must be an integer or integer array.")
+    values = []
+    for v in x:
+        if isinstance(v, (list, tuple)):
+            values.extend(as_int_tuple(v))
+        elif isinstance(v, numbers.Real):
+            try:
+                values.append(int(v))
+            except (ValueError, OverflowError):  # NaN, inf
+                raise ValueError('Not an integer array.')
         else:
-            if len(npfirst) != len(shape):
-                raise TypeError("Invalid 'first' position.")
-            elif np.greater_equal(npfirst, 1).all():  # Excel positions are 1+
-                return tuple([i-1 for i in npfirst])
-            else:
-                raise TypeError("'first' must be a non-negative array.")
+            raise ValueError('Not an integer array.')
+    return tuple(values)
 
 #==============================================================================
 
 
-def normalize_last(last, shape):
+class Selection(object):
     """
-    LAST must be a positive array of the same length as SHAPE.
+    A hyperslab selection of an array of shape 'shape', validated and
+    converted to 0-based positions once.
+
+    'first', 'last', and 'step' are the (1-based) worksheet arguments, one
+    value per dimension, and may be None. In each dimension, the positions
+    start, start+step, ... before stop are selected or, if 'block' is given,
+    'count' blocks of 'block' positions that begin there and fit before
+    stop. Readers clip 'last' to the shape. Writers pass extend=True, and
+    the selection may reach beyond the shape.
+
+    Raises ValueError (with a message for the worksheet) if the arguments
+    don't describe a valid selection.
     """
 
-    if not isinstance(shape, tuple) and len(shape) > 0 and len(shape) < 32:
-        raise TypeError("Invalid 'shape' found.")
-
-    if last is None:  # the default is shape
-        return tuple([shape[i] for i in range(len(shape))])
-    elif not isinstance(last, (float, list)):
-        raise TypeError("'last' must be an integer or integer array.")
-    else:
-        nplast, ret = try_intarray(last)
-        if nplast is None:
-            raise TypeError("'last' must be an integer or integer array.")
-        else:
-            if len(nplast) != len(shape):
-                raise TypeError("Invalid 'last' position.")
-            elif np.greater_equal(nplast, 1).all():
-                return tuple([i for i in nplast])
-            else:
-                raise TypeError("'last' must be a positive array.")
-
-#==============================================================================
-
-
-def normalize_step(step, shape):
-
-    if not isinstance(shape, tuple) and len(shape) > 0 and len(shape) < 32:
-        raise TypeError("Invalid 'shape' found.")
-
-    if step is None:  # the default is (1,...,1)
-        return tuple([1 for i in shape])
-    elif not isinstance(step, (float, list)):
-        raise TypeError("'step' must be an integer or integer array.")
-    else:
-        npstep, ret = try_intarray(step)
-        if npstep is None:
-            raise TypeError("'step' must be an integer or integer array.")
+    __slots__ = ('shape', 'start', 'stop', 'step', 'block', 'count')
+
+    def __init__(self, shape, first=None, last=None, step=None, block=None,
+                 extend=False):
+
+        self.shape = tuple([int(n) for n in shape])
+        rk = len(self.shape)
+
+        try:
+            first = None if first is None else as_int_tuple(first)
+            last = None if last is None else as_int_tuple(last)
+            step = None if step is None else as_int_tuple(step)
+        except ValueError:
+            raise ValueError('Invalid hyperslab specification.')
+
+        # (the rules of is_valid_hyperslab_spec, on tuples)
+        for a in (first, last, step):
+            if a is not None and (len(a) != rk or min(a + (1,)) < 1):
+                raise ValueError('Invalid hyperslab specification.')
+        if not extend:
+            if rk == 0 or rk > 32 or min(self.shape) < 1:
+                raise ValueError('Invalid hyperslab specification.')
+            if first is not None and last is not None and \
+               [f for f, l in zip(first, last) if l < f]:
+                raise ValueError('Invalid hyperslab specification.')
+            if step is not None and last is not None and \
+               not [s for s, l in zip(step, last) if s < l]:
+                raise ValueError('Invalid hyperslab specification.')
+
+        # The selection is 1-based => Convert it to 0-based notation.
+        self.start = (0,) * rk if first is None else \
+            tuple([i-1 for i in first])
+        if last is None:
+            self.stop = self.shape
+        elif extend:
+            self.stop = last
         else:
-            if len(npstep) != len(shape):
-                raise TypeError("Invalid 'step' found.")
-            elif np.greater_equal(npstep, 1).all():
-                return tuple([i for i in npstep])
+            self.stop = tuple([min(l, n) for l, n in zip(last, self.shape)])
+
+        self.block = None
+        if block is None:
+            self.step = (1,) * rk if step is None else step
+            self.count = tuple([len(xrange(b, e, s)) for b, e, s in
+                                zip(self.start, self.stop, self.step)])
+            return
+
+        try:
+            self.block = as_int_tuple(block)
+        except ValueError:
+            raise ValueError('Invalid block specification.')
+        if len(self.block) != rk or min(self.block + (1,)) < 1:
+            raise ValueError('Invalid block specification.')
+
+        self.step = self.block if step is None else step
+        if [s for s, b in zip(self.step, self.block) if s < b]:
+            raise ValueError('The step must not be smaller than the block.')
+
+        # the number of blocks that fit into [start, stop)
+        self.count = tuple([max((e - b - k) / s + 1, 0) for b, e, s, k in
+                            zip(self.start, self.stop, self.step,
+                                self.block)])
+        if min(self.count + (1,)) < 1:
+            raise ValueError('Empty hyperslab selection.')
+
+    @classmethod
+    def from_slices(cls, slices):
+        """
+        Returns the selection of the (0-based) slices with explicit start,
+        stop, and step. Its extent is the bounding box.
+        """
+
+        sel = cls.__new__(cls)
+        sel.block = None
+        sel.shape = tuple([s.stop for s in slices])
+        sel.start = tuple([s.start for s in slices])
+        sel.stop = sel.shape
+        sel.step = tuple([s.step for s in slices])
+        sel.count = tuple([len(xrange(s.start, s.stop, s.step))
+                           for s in slices])
+        return sel
+
+    @property
+    def slices(self):
+        """
+        The selection as a tuple of slices (unless there are blocks).
+        """
+
+        if self.block is not None:
+            raise ValueError('A block selection is not a hyperslab.')
+        return tuple([slice(b, e, s) for b, e, s in
+                      zip(self.start, self.stop, self.step)])
+
+    @property
+    def out_shape(self):
+        """
+        The shape of the selected elements.
+        """
+
+        if self.block is None:
+            return self.count
+        return tuple([c*k for c, k in zip(self.count, self.block)])
+
+    @property
+    def size(self):
+        """
+        The number of selected elements.
+        """
+        return int(np.prod(self.out_shape))
+
+    def positions(self, i):
+        """
+        Returns the selected positions in dimension i.
+        """
+
+        if self.block is None:
+            return xrange(self.start[i], self.stop[i], self.step[i])
+        return [p + j for p in xrange(self.start[i], self.start[i] +
+                                      self.count[i] * self.step[i],
+                                      self.step[i])
+                for j in xrange(self.block[i])]
+
+    def chunk_indices(self, chunks):
+        """
+        Returns, for each dimension, the sorted indices of the chunks (of
+        shape 'chunks') that contain selected positions.
+        """
+
+        dims = []
+        for i, c in enumerate(chunks):
+            if self.block is None and self.step[i] <= c:
+                # contiguous runs of chunks
+                n = self.count[i]
+                if n == 0:
+                    dims.append([])
+                    continue
+                last = self.start[i] + (n-1) * self.step[i]
+                dims.append(range(self.start[i] / c, last / c + 1))
             else:
-                raise TypeError("'step' must be a positive array.")
+                dims.append(sorted(set([p / c for p in self.positions(i)])))
+        return dims
+
+    def chunk_count(self, chunks):
+        """
+        Returns the number of chunks (of shape 'chunks') the selection
+        intersects.
+        """
+        return int(np.prod([len(d) for d in self.chunk_indices(chunks)]))
+
+    def intersecting_chunks(self, chunks):
+        """
+        Returns the (0-based) offsets of the chunks (of shape 'chunks') the
+        selection intersects.
+        """
+
+        dims = self.chunk_indices(chunks)
+        return [tuple([k * c for k, c in zip(idx, chunks)])
+                for idx in itertools.product(*dims)]
 
 #==============================================================================
 
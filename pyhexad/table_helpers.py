@@ -138,3 +138,60 @@ def dtype_from_heading(s):
     return np.dtype(descr)
 
 #==============================================================================
+
+
+class ExcelTable(object):
+    """
+    A table as the renderer sees it: a header row followed by the rows of
+    a record array. Row i (i > 0) is a view of record i-1, nothing is copied.
+    """
+
+    def __init__(self, header, records):
+        self.header = tuple(header)
+        self.records = records
+
+    def __len__(self):
+        return len(self.records) + 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i == 0:
+            return self.header
+        if i < 0 or i >= len(self):
+            raise IndexError('Row index out of range.')
+        return self.records[i-1]
+
+    def to_matrix(self):
+        """
+        Returns the header and the records as one 2D object array of Python
+        scalars, which is what Excel's COM interface consumes.
+
+        The array is built column by column: the numeric columns of each
+        type are gathered into one matrix and converted at once, and string
+        columns are converted in bulk. There is no per-record Python loop.
+        """
+
+        x = self.records
+        names = x.dtype.names
+        y = np.empty((len(x) + 1, len(names)), dtype=object)
+        y[0] = self.header
+
+        # the columns by type
+        groups = {}
+        for j, n in enumerate(names):
+            t = x.dtype[n]
+            if t.kind in 'biuf':
+                groups.setdefault(t, []).append(j)
+            elif t.char == 'S' and bytes is not str:  # Python 3
+                y[1:, j] = np.char.decode(x[n], 'utf-8')
+            else:
+                y[1:, j] = x[n]
+
+        for t, cols in groups.items():
+            block = np.empty((len(x), len(cols)), dtype=t)
+            for k, j in enumerate(cols):
+                block[:, k] = x[names[j]]
+            y[1:, cols] = block
+
+        return y
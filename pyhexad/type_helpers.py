@@ -66,6 +66,8 @@ scalar_dtypes = {
 }
 
 # Excel subsitution types
+# (Wide integers become float64 here, not int32, which would wrap large
+# values. Readers narrow them to int32 when they fit, see convert_helpers.)
 
 dtype_excel_substitute = {
     np.dtype(np.double):  np.dtype(np.float64),
@@ -74,12 +76,12 @@ dtype_excel_substitute = {
     np.dtype(np.int8):    np.dtype(np.int32),
     np.dtype(np.int16):   np.dtype(np.int32),
     np.dtype(np.int32):   np.dtype(np.int32),
-    np.dtype(np.int64):   np.dtype(np.int32),
+    np.dtype(np.int64):   np.dtype(np.float64),
     np.dtype(np.single):  np.dtype(np.float64),
     np.dtype(np.uint8):   np.dtype(np.int32),
     np.dtype(np.uint16):  np.dtype(np.int32),
-    np.dtype(np.uint32):  np.dtype(np.int32),
-    np.dtype(np.uint64):  np.dtype(np.int32)
+    np.dtype(np.uint32):  np.dtype(np.float64),
+    np.dtype(np.uint64):  np.dtype(np.float64)
 }
 
 #==============================================================================
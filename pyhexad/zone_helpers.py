@@ -0,0 +1,462 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+import logging
+import threading
+
+import h5py
+import numpy as np
+
+from config import Tuning
+from h5_helpers import invalidate_object_info
+from read_helpers import read_hyperslab
+from reduce_helpers import block_shape, iter_blocks
+
+logger = logging.getLogger(__name__)
+
+# The zone map of the chunked dataset D is kept in the group D_zones next to
+# it. The dataset 'zones' has an element per chunk (the same rank as D), with
+# the minimum, maximum, element count, and NaN and fill value counts of the
+# chunk's elements. For tables, there's such a record for each numeric
+# column. A count of -1 means unknown. The dataset 'shape' holds the shape of
+# D summarized, which tells a stale map. (Updates write to datasets only: a
+# SWMR writer can't create or modify attributes.)
+
+ZONE_SUFFIX = '_zones'
+
+# how many chunks the queries using zone maps touched and skipped
+
+_queries = {'queries': 0, 'chunks': 0, 'skipped': 0}
+_queries_lock = threading.Lock()
+
+#==============================================================================
+
+
+def zone_path(path):
+    """
+    Returns the path of the zone map of the dataset at 'path'.
+    """
+    return path.rstrip('/') + ZONE_SUFFIX
+
+#==============================================================================
+
+
+def zone_dtype(dty):
+    """
+    Returns the type of the zone map elements of a dataset of type 'dty',
+    or None, if it has no numeric values (columns).
+    """
+
+    def stats(t):
+        return [('min', t), ('max', t), ('count', np.int64),
+                ('nans', np.int64), ('fills', np.int64)]
+
+    if dty.names is None:
+        return np.dtype(stats(dty)) if dty.kind in 'biuf' else None
+    spec = [(n, stats(dty.fields[n][0])) for n in dty.names
+            if dty.fields[n][0].kind in 'biuf']
+    return np.dtype(spec) if len(spec) > 0 else None
+
+#==============================================================================
+
+
+def axis_counts(chunk, extent, idx, lo, hi):
+    """
+    Returns, for the chunks lo, lo+1, ..., hi-1 of 'chunk' positions along
+    an axis, the number of positions in [0, extent) and the number of
+    positions of the (sorted) index array 'idx' that fall into each chunk.
+    """
+
+    first = np.arange(lo, hi) * chunk
+    ext = np.clip(np.minimum(first + chunk, extent) - first, 0, None)
+    if idx is None:
+        return ext, np.zeros(hi - lo, dtype=np.int64)
+    return ext, np.bincount(idx / chunk - lo, minlength=hi - lo)[:hi - lo]
+
+#==============================================================================
+
+
+def outer(counts):
+    """
+    Returns the outer product of the per-axis counts 'counts'.
+    """
+    result = np.asarray(counts[0], dtype=np.int64)
+    for c in counts[1:]:
+        result = np.multiply.outer(result, c)
+    return result
+
+#==============================================================================
+
+
+def chunk_stats(x, idx, chunks, fill):
+    """
+    Returns the per-chunk statistics of the values 'x' at the (sorted) index
+    arrays 'idx' (one per axis): the chunk indices per axis, and the
+    minimum, maximum, NaN count, and fill value count of each chunk that
+    holds values, as arrays of the shape of the chunk index grid.
+    """
+
+    ids = []
+    starts = []
+    for i, c in zip(idx, chunks):
+        cid = i / c
+        first = np.flatnonzero(np.r_[True, cid[1:] != cid[:-1]])
+        ids.append(cid[first])
+        starts.append(first)
+
+    nans = (x != x).astype(np.int64)
+    fills = (x == fill).astype(np.int64)
+    mn = x
+    mx = x
+    for axis, s in enumerate(starts):
+        mn = np.fmin.reduceat(mn, s, axis=axis)
+        mx = np.fmax.reduceat(mx, s, axis=axis)
+        nans = np.add.reduceat(nans, s, axis=axis)
+        fills = np.add.reduceat(fills, s, axis=axis)
+    return ids, mn, mx, nans, fills
+
+#==============================================================================
+
+
+def update_grid(z, chunks, old_shape, new_shape, idx, x, fill, lo):
+    """
+    Updates the part 'z' (from the chunk 'lo' on, with the fields min, max,
+    count, nans, and fills) of the zone map of a dataset that had the shape
+    'old_shape', after the values 'x' were written at the index arrays
+    'idx' (one per axis). If x is None, nothing was written. The part must
+    hold the chunks written and those the dataset grew into.
+
+    Chunks whose elements were all written are summarized exactly. Other
+    chunks get their bounds widened: by the values written, and by the
+    fill value, if the dataset grew into them. Their counts become unknown
+    if values in them were overwritten.
+    """
+
+    ext_new = []
+    ext_old = []
+    written = []
+    written_old = []
+    for d in range(z.ndim):
+        i = None if x is None else idx[d]
+        hi = lo[d] + z.shape[d]
+        e, w = axis_counts(chunks[d], new_shape[d], i, lo[d], hi)
+        ext_new.append(e)
+        written.append(w)
+        e, w = axis_counts(chunks[d], old_shape[d],
+                           None if i is None else i[i < old_shape[d]],
+                           lo[d], hi)
+        ext_old.append(e)
+        written_old.append(w)
+
+    ext_new = outer(ext_new)
+    ext_old = outer(ext_old)
+    written = outer(written)
+    written_old = outer(written_old)
+    # the elements the dataset grew by which weren't written hold the fill
+    exposed = (ext_new - ext_old) - (written - written_old)
+
+    empty = z['count'] == 0
+    known = (z['nans'] >= 0) & (z['fills'] >= 0)
+
+    e = exposed > 0
+    if e.any():
+        z['min'][e] = np.where(empty[e], fill, np.fmin(z['min'][e], fill))
+        z['max'][e] = np.where(empty[e], fill, np.fmax(z['max'][e], fill))
+        k = e & known
+        if fill != fill:
+            z['nans'][k] += exposed[k]
+        else:
+            z['fills'][k] += exposed[k]
+        empty &= ~e
+
+    if x is not None and x.size > 0:
+        ids, mn, mx, nans, fills = chunk_stats(x, idx, chunks, fill)
+        sel = np.ix_(*[i - l for i, l in zip(ids, lo)])
+        zs = z[sel]
+        full = written[sel] == ext_new[sel]
+        partial_old = (written_old[sel] > 0) & ~full
+        keep = ~empty[sel] & ~full
+        zs['min'] = np.where(keep, np.fmin(zs['min'], mn), mn)
+        zs['max'] = np.where(keep, np.fmax(zs['max'], mx), mx)
+        k = known[sel] | full
+        base = np.where(full, 0, 1)
+        zs['nans'] = np.where(partial_old | ~k, -1, base * zs['nans'] + nans)
+        zs['fills'] = np.where(partial_old | ~k, -1,
+                               base * zs['fills'] + fills)
+        z[sel] = zs
+
+    z['count'] = ext_new
+
+#==============================================================================
+
+
+def chunk_grid(shape, chunks):
+    """
+    Returns the shape of the chunk grid of a dataset.
+    """
+    return tuple([-(-n / c) for n, c in zip(shape, chunks)])
+
+#==============================================================================
+
+
+def changed_chunks(chunks, old_shape, new_shape, idx):
+    """
+    Returns the first and the last + 1 chunk index per axis of the part of
+    the chunk grid (of 'new_shape') that holds the chunks written at the
+    index arrays 'idx', and those the dataset grew into.
+
+    If the dataset grew along one axis, the part spans the others; if it
+    grew along several, it's the whole grid.
+    """
+
+    grid = chunk_grid(new_shape, chunks)
+    grew = [n > o for n, o in zip(new_shape, old_shape)]
+    lo = []
+    hi = []
+    for d in range(len(grid)):
+        if sum(grew) - grew[d] > 0:
+            lo.append(0)
+            hi.append(grid[d])
+        elif grew[d]:
+            lo.append(min(idx[d][0] / chunks[d], old_shape[d] / chunks[d]))
+            hi.append(grid[d])
+        else:
+            lo.append(idx[d][0] / chunks[d])
+            hi.append(idx[d][-1] / chunks[d] + 1)
+    return lo, hi
+
+#==============================================================================
+
+
+def summarize(z, dset, x, idx, old_shape, lo=None):
+    """
+    Updates the zone map 'z' (or its part from the chunk 'lo' on) of the
+    dataset 'dset' (all columns, for a table) after the values 'x' were
+    written at the index arrays 'idx'.
+    """
+
+    if lo is None:
+        lo = (0,) * z.ndim
+    fill = dset.fillvalue
+    if dset.dtype.names is not None:
+        for c in z.dtype.names:
+            xc = None
+            if x is not None and c in x.dtype.names:
+                xc = x[c]
+            zc = z[c]
+            update_grid(zc, dset.chunks, old_shape, dset.shape, idx, xc,
+                        fill[c], lo)
+            z[c] = zc
+    else:
+        update_grid(z, dset.chunks, old_shape, dset.shape, idx, x, fill, lo)
+
+#==============================================================================
+
+
+def build_zone_map(loc, path):
+    """
+    Builds (or rebuilds) the zone map of the chunked dataset at 'path' and
+    returns the number of chunks summarized.
+    """
+
+    dset = loc[path]
+    zty = zone_dtype(dset.dtype)
+    shape = dset.shape
+    chunks = dset.chunks
+    grid = chunk_grid(shape, chunks)
+    z = np.zeros(grid, dtype=zty)
+
+    # read whole chunks, a block at a time
+    rk = len(shape)
+    if dset.dtype.names is not None:
+        names = [n for n in dset.dtype.names if n in zty.names]
+        mem_type = np.dtype([(n, dset.dtype.fields[n][0]) for n in names])
+    else:
+        mem_type = dset.dtype
+    nbytes = Tuning.REDUCE_BLOCK_BYTES * 8 / max(mem_type.itemsize, 1)
+    block = block_shape(shape, chunks, nbytes)
+    for bs, offsets in iter_blocks(tuple([slice(0, n) for n in shape]),
+                                   shape, block):
+        x = read_hyperslab(dset, bs, mem_type)
+        idx = [np.arange(s.start, s.stop) for s in bs]
+        # (blocks are made of whole chunks: nothing is widened)
+        summarize(z, dset, x, idx, shape)
+
+    zpath = zone_path(path)
+    if zpath in loc:
+        del loc[zpath]
+        invalidate_object_info(loc, zpath)
+    g = loc.require_group(zpath)
+    g.create_dataset('zones', data=z, maxshape=(None,) * rk, chunks=True)
+    g.create_dataset('shape', data=np.asarray(shape, dtype=np.int64))
+
+    return z.size
+
+#==============================================================================
+
+
+def zone_group(loc, path):
+    """
+    Returns the group holding the zone map of the dataset at 'path', or
+    None, if it has none.
+    """
+
+    g = loc.get(zone_path(path))
+    if not isinstance(g, h5py.Group) or 'zones' not in g or \
+       'shape' not in g:
+        return None
+    return g
+
+#==============================================================================
+
+
+def summarized_shape(g, shape, chunks):
+    """
+    Returns True if the zone map group 'g' summarizes a dataset of the
+    given shape and chunks.
+    """
+    return tuple(g['shape'][()]) == tuple(shape) and \
+        g['zones'].shape == chunk_grid(shape, chunks)
+
+#==============================================================================
+
+
+def zones_are_current(g, dset):
+    """
+    Returns True if the zone map group 'g' summarizes the dataset 'dset'
+    as it is.
+    """
+    return summarized_shape(g, dset.shape, dset.chunks)
+
+#==============================================================================
+
+
+def read_zones(loc, path):
+    """
+    Returns the zone map of the dataset at 'path', or None, if it has none,
+    or the map is out of date.
+    """
+
+    g = zone_group(loc, path)
+    if g is None:
+        return None
+    dset = loc[path]
+    if dset.chunks is None or not zones_are_current(g, dset):
+        logger.info("Zone map '%s' is out of date." % (zone_path(path)))
+        return None
+    return g['zones'][()]
+
+#==============================================================================
+
+
+def invalidate_zones(loc, path):
+    """
+    Marks the zone map (if any) of the dataset at 'path' stale, e.g., after
+    a write it was updated for failed.
+    """
+
+    g = zone_group(loc, path)
+    if g is not None:
+        g['shape'][...] = -1
+
+#==============================================================================
+
+
+def update_zones(loc, path, old_shape, slices, x):
+    """
+    Updates the zone map (if any) of the dataset at 'path', which had the
+    shape 'old_shape', after the values 'x' (of the selection's shape; for
+    tables, records with some of the columns) were written to the
+    hyperslab 'slices'. Maps that were stale already are left alone.
+
+    Only the zones of the chunks written, and of those the dataset grew
+    into, are read and written. The recorded shape is written last, i.e.,
+    a failed update leaves a stale map behind.
+    """
+
+    g = zone_group(loc, path)
+    if g is None:
+        return
+    dset = loc[path]
+    if not summarized_shape(g, old_shape, dset.chunks):
+        logger.info("Zone map '%s' is out of date." % (zone_path(path)))
+        return
+    zds = g['zones']
+
+    grid = chunk_grid(dset.shape, dset.chunks)
+    idx = [np.arange(*s.indices(n)) for s, n in zip(slices, dset.shape)]
+    if min([len(i) for i in idx]) == 0:
+        return
+    lo, hi = changed_chunks(dset.chunks, old_shape, dset.shape, idx)
+
+    # (the zones of new chunks are empty, count 0)
+    if zds.shape != grid:
+        zds.resize(grid)
+    part = tuple([slice(l, h) for l, h in zip(lo, hi)])
+    z = zds[part]
+    summarize(z, dset, np.asarray(x).reshape([len(i) for i in idx]), idx,
+              old_shape, lo)
+    zds[part] = z
+    g['shape'][...] = np.asarray(dset.shape, dtype=np.int64)
+
+#==============================================================================
+
+
+def selected_chunks(slc, nrows, chunk):
+    """
+    Returns the indices of the chunks of 'chunk' rows that hold rows of
+    the row selection 'slc' of a table with nrows rows.
+    """
+
+    start, stop, step = slc.indices(nrows)
+    if start >= stop:
+        return np.empty((0,), dtype=np.int64)
+    if step <= chunk:
+        return np.arange(start / chunk, (stop - 1) / chunk + 1)
+    return np.arange(start, stop, step) / chunk
+
+#==============================================================================
+
+
+def note_query(chunks, skipped):
+    """
+    Records that a query touched 'chunks' chunks and skipped 'skipped' of
+    them, thanks to a zone map.
+    """
+
+    with _queries_lock:
+        _queries['queries'] += 1
+        _queries['chunks'] += chunks
+        _queries['skipped'] += skipped
+
+#==============================================================================
+
+
+def zone_map_stats():
+    """
+    Returns a list of (key, value) pairs describing the queries that used
+    zone maps.
+    """
+
+    with _queries_lock:
+        return [('Queries:', _queries['queries']),
+                ('Chunks:', _queries['chunks']),
+                ('Skipped:', _queries['skipped'])]
+
+#==============================================================================
+
+
+def skipped_note(chunks, skipped):
+    """
+    Returns the note appended to a result message of a query that used a
+    zone map.
+    """
+    return ' (%d of %d chunks skipped)' % (skipped, chunks)
@@ -0,0 +1,72 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+"""
+Micro-benchmark for path resolution on deep (20-level) hierarchies.
+
+Compares the prefix-by-prefix lookups PyHexad used to do ('in', plus
+get(getclass=True) per prefix, O(depth^2) link traversals) with the
+single-pass resolver in h5_helpers.
+
+    python test/benchmark/bench_h5_helpers.py
+"""
+
+import tempfile
+import timeit
+
+import h5py
+
+from pyhexad.h5_helpers import path_is_available_for_obj, resolve_path
+
+DEPTH = 20
+REPEAT = 200
+
+
+def prefix_lookups(loc, path):
+    """ The old way: one 'in' and one get() for every prefix. """
+    a = path[1:].split('/')
+    ppath = '/'
+    for i in range(len(a)):
+        ppath += a[i]
+        if ppath not in loc:
+            return True
+        if loc.get(ppath, getclass=True) != h5py.Group:
+            return False
+        ppath += '/'
+    return False
+
+
+def main():
+    file_name = tempfile.mktemp('.h5')
+    path = '/' + '/'.join(['level%02d' % i for i in range(DEPTH)])
+
+    with h5py.File(file_name, 'w') as f:
+        f.create_group(path)
+
+    with h5py.File(file_name, 'r') as f:
+
+        new_path = path + '/dataset'
+
+        cases = (
+            ('prefix lookups', lambda: prefix_lookups(f, new_path)),
+            ('resolve_path', lambda: resolve_path(f, new_path)),
+            ('path_is_available_for_obj',
+             lambda: path_is_available_for_obj(f, new_path, h5py.Dataset)),
+        )
+
+        print 'depth %d, %d repetitions' % (DEPTH, REPEAT)
+        for name, fn in cases:
+            t = min(timeit.repeat(fn, number=REPEAT, repeat=3))
+            print '%-28s %8.1f us/call' % (name, 1e6 * t / REPEAT)
+
+
+if __name__ == '__main__':
+    main()
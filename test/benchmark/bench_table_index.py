@@ -0,0 +1,60 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+"""
+Benchmark for finding the rows of a large HDF5 table with a given key, with
+a filter (a full scan) and with the column's index (a binary search).
+
+    python test/benchmark/bench_table_index.py
+"""
+
+import tempfile
+import timeit
+
+import h5py
+import numpy as np
+
+from pyhexad.h5lookupRows import get_rows
+from pyhexad.h5newIndex import new_index
+from pyhexad.h5readTable import get_table
+
+ROWS = 2000000
+KEYS = 100000
+REPEAT = 3
+
+
+def main():
+    file_name = tempfile.mktemp('.h5')
+    data = np.zeros(ROWS, dtype=[('id', 'i4'), ('x', 'f8'), ('y', 'f8')])
+    data['id'] = np.random.RandomState(0).randint(0, KEYS, ROWS)
+    data['x'] = np.arange(ROWS)
+    with h5py.File(file_name, 'w') as f:
+        f.create_dataset('T', data=data, maxshape=(None,), chunks=(8192,))
+        t = timeit.default_timer()
+        print new_index(f, 'T', 'id'), '(%.3f s)' % \
+            (timeit.default_timer() - t)
+
+    key = int(data['id'][ROWS / 2])
+    with h5py.File(file_name, 'r') as f:
+        runs = [
+            ('scan ', lambda: get_table(f, 'T', None, None, None, None,
+                                        'id = %d' % key)),
+            ('index', lambda: get_rows(f, 'T', 'id', float(key)))
+        ]
+        for name, run in runs:
+            t = min(timeit.repeat(run, number=1, repeat=REPEAT))
+            y, msg = run()
+            print '  %s: %8.4f s, %s' % (name, t, msg)
+
+
+if __name__ == '__main__':
+    main()
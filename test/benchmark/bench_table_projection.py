@@ -0,0 +1,57 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+"""
+Benchmark for reading all columns of a wide HDF5 table, and only a few.
+Only the requested fields are converted and kept in memory.
+
+    python test/benchmark/bench_table_projection.py
+"""
+
+import tempfile
+import timeit
+
+import h5py
+import numpy as np
+
+from pyhexad.h5readTable import get_table
+
+ROWS = 50000
+COLUMNS = 200
+SELECTED = [['c7'], ['c99'], ['c150']]
+REPEAT = 3
+
+
+def main():
+    file_name = tempfile.mktemp('.h5')
+    spec = [('c%d' % k, np.float32 if k % 2 else np.int16)
+            for k in range(COLUMNS)]
+    data = np.zeros(ROWS, dtype=spec)
+    for n in data.dtype.names:
+        data[n] = np.arange(ROWS) % 1000
+    with h5py.File(file_name, 'w') as f:
+        f.create_dataset('T', data=data, chunks=(1024,))
+
+    print '%d rows x %d columns, %d bytes per record' % \
+        (ROWS, COLUMNS, data.dtype.itemsize)
+
+    with h5py.File(file_name, 'r') as f:
+        for columns in (None, SELECTED):
+            t = min(timeit.repeat(lambda: get_table(f, 'T', columns),
+                                  number=1, repeat=REPEAT))
+            y, msg = get_table(f, 'T', columns)
+            print '  %3d columns: %8.3f s, %10d bytes' % \
+                (len(y.header), t, y.records.nbytes)
+
+
+if __name__ == '__main__':
+    main()
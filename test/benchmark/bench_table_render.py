@@ -0,0 +1,70 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+"""
+Benchmark for turning an HDF5 table into the 2D array of Python scalars
+that Excel's COM interface consumes: record by record (what iterating an
+ExcelTable yields), and column by column (ExcelTable.to_matrix).
+
+    python test/benchmark/bench_table_render.py
+"""
+
+import timeit
+
+import numpy as np
+
+from pyhexad.table_helpers import ExcelTable
+
+REPEAT = 3
+
+# (rows, int32 columns, float64 columns, string columns)
+TABLES = [(1000000, 2, 2, 1),
+          (20000, 100, 100, 10)]
+
+
+def make_table(rows, ints, floats, strings):
+    spec = [('i%d' % k, np.int32) for k in range(ints)] + \
+        [('f%d' % k, np.float64) for k in range(floats)] + \
+        [('s%d' % k, 'S8') for k in range(strings)]
+    x = np.zeros(rows, dtype=spec)
+    rs = np.random.RandomState(0)
+    for n in x.dtype.names:
+        if n[0] == 'i':
+            x[n] = rs.randint(0, 1000, rows)
+        elif n[0] == 'f':
+            x[n] = rs.randn(rows)
+        else:
+            x[n] = 'abc'
+    return ExcelTable(x.dtype.names, x)
+
+
+def by_record(tbl):
+    return [tuple(tbl.header)] + [tuple([v.item() for v in r])
+                                  for r in tbl.records]
+
+
+def main():
+    for shape in TABLES:
+        tbl = make_table(*shape)
+        print '%d rows x %d columns' % (shape[0], sum(shape[1:]))
+
+        t = min(timeit.repeat(lambda: by_record(tbl), number=1,
+                              repeat=REPEAT))
+        print '  by record: %8.3f s' % t
+
+        t = min(timeit.repeat(lambda: tbl.to_matrix(), number=1,
+                              repeat=REPEAT))
+        print '  by column: %8.3f s' % t
+
+
+if __name__ == '__main__':
+    main()
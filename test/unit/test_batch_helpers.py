@@ -0,0 +1,142 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import numpy as np
+import h5py
+
+# Local imports
+from pyhexad.batch_helpers import WriteBatch, batched_file, commit_writes, \
+    write_batch
+from pyhexad.file_helpers import close_files, file_key, pooled_file
+from pyhexad.h5appendRows import append_rows
+from pyhexad.h5newIndex import new_index
+from pyhexad.h5newZoneMap import new_zone_map
+from pyhexad.h5writeArray import write_array
+from pyhexad.index_helpers import index_is_current
+from pyhexad.zone_helpers import read_zones
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class WriteBatchTest(unittest.TestCase):
+
+    def test_merge_hyperslabs(self):
+        file_name = get_temp_file()
+
+        with h5py.File(file_name) as loc:
+
+            loc.create_dataset('A', (10, 8), dtype='f8')
+            batch = WriteBatch()
+
+            # rows 0..9, one at a time -> one write
+            for i in range(10):
+                b = np.empty((1, 8))
+                b[:] = i
+                msg = write_array(loc, 'A', b, (slice(i, i+1, 1),
+                                                slice(0, 8, 1)), batch)
+                self.assertEqual(msg, 'A')
+            self.assertEqual(len(batch), 1)
+
+            # not adjacent -> a second write
+            msg = write_array(loc, 'A', np.ones((2, 2)), (slice(0, 2, 1),
+                                                          slice(4, 6, 1)),
+                              batch)
+            self.assertEqual(len(batch), 2)
+
+            # nothing has been written, yet
+            self.assertEqual(loc['A'][9, 0], 0.0)
+
+            self.assertEqual(batch.commit(file_key(file_name), loc), 2)
+            self.assertEqual(len(batch), 0)
+            self.assertEqual(loc['A'][9, 0], 9.0)
+            self.assertEqual(loc['A'][1, 5], 1.0)
+            self.assertEqual(loc['A'][1, 6], 1.0)
+
+    def test_merge_appends(self):
+        file_name = get_temp_file()
+
+        with h5py.File(file_name) as loc:
+
+            dty = np.dtype([('a', 'i4'), ('b', 'f8')])
+            loc.create_dataset('T', (0,), dtype=dty, maxshape=(None,))
+            batch = WriteBatch()
+
+            for i in range(5):
+                msg = append_rows(loc, 'T', [[i, 0.5*i], [i, 0.5*i]], batch)
+                self.assertEqual(msg, '2 rows appended.')
+            self.assertEqual(len(batch), 1)
+            self.assertEqual(loc['T'].shape, (10,))
+
+            batch.commit(file_key(file_name), loc)
+            self.assertEqual(list(loc['T']['a']),
+                             [0, 0, 1, 1, 2, 2, 3, 3, 4, 4])
+
+    def test_commit_failure(self):
+        file_name = get_temp_file()
+
+        with h5py.File(file_name) as loc:
+
+            dty = np.dtype([('a', 'i4'), ('b', 'f8')])
+            loc.create_dataset('T', (10,), dtype=dty, maxshape=(None,),
+                               chunks=(4,))
+            new_index(loc, 'T', 'a')
+            new_zone_map(loc, 'T')
+            batch = WriteBatch()
+
+            msg = append_rows(loc, 'T', [[1, 0.5]] * 3, batch)
+            self.assertEqual(msg, '3 rows appended.')
+            self.assertTrue(index_is_current(loc, 'T', 'a'))
+            self.assertIsNotNone(read_zones(loc, 'T'))
+
+            # spoil the queued write
+            key = file_key(file_name)
+            w = batch._pending[key]['/T'][0]
+            w.data = w.data[:2]
+
+            self.assertEqual(batch.commit(key, loc), 0)
+            self.assertEqual(batch.failures, 1)
+            # the index and the zone map would describe rows not written
+            self.assertFalse(index_is_current(loc, 'T', 'a'))
+            self.assertIsNone(read_zones(loc, 'T'))
+            self.assertEqual(batch.failure_note(file_name),
+                             " (Earlier writes to '/T' failed.)")
+            self.assertEqual(batch.failure_note(file_name), '')
+
+    def test_commit_on_read(self):
+        file_name = get_temp_file()
+
+        with batched_file(file_name) as f:
+            f.create_dataset('A', (4,), dtype='i4')
+            self.assertEqual(write_array(f, 'A', [1, 2, 3, 4],
+                                         (slice(0, 4, 1),), write_batch), 'A')
+
+        # the pool commits pending writes before handing out the file
+        with pooled_file(file_name) as f:
+            self.assertEqual(list(f['A'][:]), [1, 2, 3, 4])
+
+        self.assertTrue(commit_writes() >= 1)
+        close_files(file_name)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
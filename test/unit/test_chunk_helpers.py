@@ -0,0 +1,168 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.chunk_helpers import chunks_touched, next_prime, open_dataset
+from pyhexad.config import Tuning
+from pyhexad.file_helpers import chunk_cache_settings, close_files, \
+    pooled_file, set_chunk_cache_settings
+from pyhexad.h5readArray import get_ndarray
+from pyhexad.h5readTable import get_table
+
+logger = logging.getLogger(__name__)
+
+# a SWMR writer, which appends three elements to 'A' and 'T' when told to
+
+SWMR_WRITER = '''
+import sys
+import h5py
+import numpy as np
+f = h5py.File(sys.argv[1], 'a', libver='latest')
+f.swmr_mode = True
+print 'ready'
+sys.stdout.flush()
+sys.stdin.readline()
+for name in ('A', 'T'):
+    d = f[name]
+    d.resize((6,))
+    d[3:] = np.array([4, 5, 6]).astype(d.dtype)
+f.flush()
+print 'done'
+sys.stdout.flush()
+sys.stdin.readline()
+f.close()
+'''
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class ChunkHelpersTest(unittest.TestCase):
+
+    def test_next_prime(self):
+        self.assertEqual(next_prime(0), 2)
+        self.assertEqual(next_prime(521), 521)
+        self.assertEqual(next_prime(522), 523)
+
+    def test_chunks_touched(self):
+        chunks = (10, 10)
+        shape = (100, 100)
+        self.assertEqual(chunks_touched(chunks, shape, ()), 100)
+        self.assertEqual(chunks_touched(chunks, shape, (slice(0, 10),)), 10)
+        self.assertEqual(chunks_touched(chunks, shape, (slice(5, 15),
+                                                        slice(0, 1))), 2)
+        # every 50th row
+        self.assertEqual(chunks_touched(chunks, shape, (slice(0, 100, 50),
+                                                        slice(0, 100))), 20)
+        self.assertEqual(chunks_touched(chunks, shape, (slice(3, 3),)), 0)
+
+    def test_open_dataset(self):
+        file_name = get_temp_file()
+
+        with h5py.File(file_name) as loc:
+
+            # 2 MiB chunks
+            loc.create_dataset('A', (1024, 1024), dtype='f8',
+                               chunks=(256, 1024), compression='gzip')
+            loc.create_dataset('B', (16,), dtype='f8')
+
+            # the default cache is too small for one chunk
+            d = open_dataset(loc, 'A', (slice(0, 1),))
+            self.assertEqual(d.id.get_access_plist().get_chunk_cache()[1],
+                             2*1024*1024)
+            self.assertTrue(open_dataset(loc, 'A', (slice(0, 1),)) is d)
+
+            # four chunks need a larger cache
+            e = open_dataset(loc, 'A', (slice(0, 1024),))
+            self.assertFalse(e is d)
+            nslots, nbytes, w0 = e.id.get_access_plist().get_chunk_cache()
+            self.assertEqual(nbytes, 4*2*1024*1024)
+            self.assertTrue(nslots >= 400)
+            self.assertEqual(list(e[0:2, 0]), [0.0, 0.0])
+            self.assertTrue(open_dataset(loc, 'A', (slice(0, 1),)) is e)
+
+            # contiguous datasets don't need a chunk cache
+            b = open_dataset(loc, 'B', (slice(0, 16),))
+            self.assertTrue(open_dataset(loc, 'B', (slice(0, 16),)) is b)
+
+            self.assertRaises(KeyError, open_dataset, loc, 'C')
+
+    def test_swmr_read(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w', libver='latest') as f:
+            f.create_dataset('A', data=[1, 2, 3], maxshape=(None,),
+                             chunks=(2,))
+            t = np.array([(1,), (2,), (3,)], dtype=[('x', 'i4')])
+            f.create_dataset('T', data=t, maxshape=(None,), chunks=(2,))
+
+        writer = subprocess.Popen([sys.executable, '-c', SWMR_WRITER,
+                                   file_name],
+                                  stdin=subprocess.PIPE,
+                                  stdout=subprocess.PIPE)
+        try:
+            self.assertEqual(writer.stdout.readline().strip(), 'ready')
+
+            with h5py.File(file_name, 'r', libver='latest', swmr=True) as f:
+                # the first reads keep the dataset handles open
+                self.assertEqual(list(get_ndarray(f, 'A')[0].ravel()),
+                                 [1, 2, 3])
+                self.assertEqual(list(get_table(f, 'T')[0].records['x']),
+                                 [1, 2, 3])
+
+                writer.stdin.write('\n')
+                self.assertEqual(writer.stdout.readline().strip(), 'done')
+
+                # ... and must see the appended elements
+                self.assertEqual(list(get_ndarray(f, 'A')[0].ravel()),
+                                 [1, 2, 3, 4, 5, 6])
+                self.assertEqual(list(get_table(f, 'T')[0].records['x']),
+                                 [1, 2, 3, 4, 5, 6])
+        finally:
+            writer.stdin.write('\n')
+            writer.wait()
+
+    def test_chunk_cache_settings(self):
+        file_name = get_temp_file()
+        defaults = chunk_cache_settings()
+
+        with pooled_file(file_name, 'a') as f:
+            self.assertEqual(f.id.get_access_plist().get_cache()[2],
+                             Tuning.RDCC_NBYTES)
+
+        self.assertEqual(set_chunk_cache_settings(4*1024*1024, 1031, 1.0,
+                                                  file_name), 1)
+        with pooled_file(file_name, 'a') as f:
+            self.assertEqual(f.id.get_access_plist().get_cache()[1:],
+                             (1031, 4*1024*1024, 1.0))
+        self.assertEqual(chunk_cache_settings(), defaults)
+
+        # no change, no re-open
+        self.assertEqual(set_chunk_cache_settings(4*1024*1024, 1031, 1.0,
+                                                  file_name), 0)
+        close_files(file_name)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
@@ -0,0 +1,130 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.convert_helpers import conversion_plan, convert_ints
+from pyhexad.h5readArray import get_ndarray
+from pyhexad.h5readTable import get_table
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class ConvertHelpersTest(unittest.TestCase):
+
+    def test_convert_ints(self):
+        x, lossy = convert_ints(np.array([-5, 2**31-1], dtype=np.int64))
+        self.assertEqual(x.dtype, np.int32)
+        self.assertEqual(list(x), [-5, 2**31-1])
+
+        # no wrapping
+        x, lossy = convert_ints(np.array([1, 2**31], dtype=np.int64))
+        self.assertEqual(x.dtype, np.float64)
+        self.assertEqual(list(x), [1.0, 2.0**31])
+        self.assertEqual(lossy, 0)
+
+        x, lossy = convert_ints(np.array([2**53+1, 2**64-1, 7],
+                                         dtype=np.uint64))
+        self.assertEqual(lossy, 2)
+        # (just past 2**53, where float64 comparisons can't tell)
+        for t in (np.uint64, np.int64):
+            x, lossy = convert_ints(np.array([2**53+1, 5], dtype=t))
+            self.assertEqual(lossy, 1)
+        x, lossy = convert_ints(np.array([-2**53-1, 5], dtype=np.int64))
+        self.assertEqual(lossy, 1)
+        x, lossy = convert_ints(np.array([2**53, 2**32], dtype=np.uint64))
+        self.assertEqual(lossy, 0)
+
+        x, lossy = convert_ints(np.array([], dtype=np.uint32))
+        self.assertEqual(x.dtype, np.int32)
+
+        # in place, if the new type is as wide as the old
+        a = np.array([[1, 2**40], [2**53+1, 3]], dtype=np.int64)
+        x, lossy = convert_ints(a, True)
+        self.assertTrue(np.may_share_memory(x, a))
+        self.assertEqual(x.tolist(), [[1.0, 2.0**40], [2.0**53, 3.0]])
+        self.assertEqual(lossy, 1)
+        a = np.array([1, 2], dtype=np.uint32)
+        x, lossy = convert_ints(a, True)
+        self.assertTrue(np.may_share_memory(x, a))
+        self.assertEqual((x.dtype, x.tolist()), (np.int32, [1, 2]))
+        a = np.array([1, 2**31], dtype=np.uint32)
+        x, lossy = convert_ints(a, True)
+        self.assertFalse(np.may_share_memory(x, a))
+        self.assertEqual(x.tolist(), [1.0, 2.0**31])
+
+    def test_plans(self):
+        t = np.dtype([('a', 'i8'), ('b', 'f4'), ('c', 'S3'), ('d', 'u1')])
+        plan = conversion_plan(t)
+        self.assertTrue(conversion_plan(np.dtype(t.descr)) is plan)
+        self.assertEqual(plan.checked, ['a'])
+        self.assertEqual(plan.read_type, np.dtype([('a', 'i8'), ('b', 'f8'),
+                                                   ('c', 'S3'), ('d', 'i4')]))
+
+        x = np.zeros(3, dtype=plan.read_type)
+        x['a'] = (1, 2, 3)
+        y, lossy = plan.convert(x)
+        self.assertEqual(y.dtype['a'], np.int32)
+        self.assertEqual(y.dtype['c'], np.dtype('S3'))
+
+        # a subset of the fields
+        x = np.zeros(3, dtype=[('d', 'i4'), ('b', 'f8')])
+        y, lossy = plan.convert(x)
+        self.assertTrue(y is x)
+
+        plan = conversion_plan(np.dtype('u2'))
+        self.assertEqual(plan.read_type, np.int32)
+        self.assertEqual(plan.checked, [])
+
+    def test_readers(self):
+        file_name = get_temp_file()
+        big = np.array([1, -2, 2**40], dtype=np.int64)
+        t = np.zeros(3, dtype=[('n', 'u8'), ('m', 'u4')])
+        t['n'] = (1, 2, 2**60 + 1)
+        t['m'] = (1, 2, 3)
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('small', data=np.arange(3, dtype=np.uint32))
+            f.create_dataset('big', data=big)
+            f.create_dataset('T', data=t, chunks=(2,))
+
+        with h5py.File(file_name, 'r') as loc:
+            x, msg = get_ndarray(loc, 'small')
+            self.assertEqual(x.dtype, np.int32)
+
+            x, msg = get_ndarray(loc, 'big')
+            self.assertEqual(x.dtype, np.float64)
+            self.assertEqual(list(x), [1.0, -2.0, 2.0**40])
+            self.assertEqual(msg, '3 x 1')
+
+            y, msg = get_table(loc, 'T')
+            self.assertEqual(y.records.dtype['n'], np.float64)
+            self.assertEqual(y.records.dtype['m'], np.int32)
+            self.assertEqual(msg, '3 rows (1 integers beyond 2^53 may be '
+                             'rounded)')
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
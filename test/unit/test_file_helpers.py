@@ -0,0 +1,235 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+
+# Local imports
+from pyhexad.file_helpers import FilePool, close_files, file_exists, \
+    new_memory_file, pooled_file, validated_file
+from pyhexad.h5_helpers import object_info, refresh_dataset
+
+logger = logging.getLogger(__name__)
+
+# a SWMR writer, which appends three elements to '/T' when told to
+SWMR_WRITER = '''
+import sys
+import h5py
+f = h5py.File(sys.argv[1], 'a', libver='latest')
+f.swmr_mode = True
+print 'ready'
+sys.stdout.flush()
+sys.stdin.readline()
+d = f['T']
+d.resize((3,))
+d[:] = [1, 2, 3]
+f.flush()
+print 'done'
+sys.stdout.flush()
+sys.stdin.readline()
+f.close()
+'''
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class FilePoolTest(unittest.TestCase):
+
+    def test_reuse(self):
+        file_name = get_temp_file()
+        h5py.File(file_name, 'w').close()
+
+        pool = FilePool(4)
+        f = pool.acquire(file_name)
+        g = pool.acquire(file_name)
+        self.assertTrue(f is g)
+        self.assertEqual(pool.hits, 1)
+        self.assertEqual(pool.misses, 1)
+        self.assertEqual(pool.close(), 1)
+
+    def test_upgrade(self):
+        file_name = get_temp_file()
+        h5py.File(file_name, 'w').close()
+
+        pool = FilePool(4)
+        f = pool.acquire(file_name, 'r')
+        self.assertEqual(f.mode, 'r')
+        g = pool.acquire(file_name, 'a')
+        self.assertEqual(g.mode, 'r+')
+        self.assertFalse(f.id.valid)
+
+        # a writable handle serves readers, too
+        h = pool.acquire(file_name, 'r')
+        self.assertTrue(g is h)
+        pool.close()
+
+    def test_eviction(self):
+        pool = FilePool(2)
+        handles = []
+        for i in range(3):
+            file_name = get_temp_file()
+            h5py.File(file_name, 'w').close()
+            handles.append(pool.acquire(file_name))
+
+        self.assertFalse(handles[0].id.valid)
+        self.assertTrue(handles[1].id.valid)
+        self.assertTrue(handles[2].id.valid)
+        self.assertEqual(pool.close(), 2)
+
+    def test_invalidation(self):
+        file_name = get_temp_file()
+        h5py.File(file_name, 'w').close()
+
+        pool = FilePool(4)
+        f = pool.acquire(file_name)
+
+        # the file changes behind our back
+        st = os.stat(file_name)
+        os.utime(file_name, (st.st_atime, st.st_mtime + 10))
+
+        g = pool.acquire(file_name)
+        self.assertFalse(f is g)
+        self.assertFalse(f.id.valid)
+        self.assertEqual(pool.misses, 2)
+        pool.close()
+
+    def test_pooled_file(self):
+        file_name = get_temp_file()
+
+        with pooled_file(file_name, 'a') as f:
+            f.create_group('A')
+        with pooled_file(file_name) as f:
+            self.assertTrue('A' in f)
+            self.assertTrue(f.id.valid)
+
+        self.assertEqual(close_files(file_name), 1)
+        self.assertEqual(close_files(file_name), 0)
+
+    def test_validated_file(self):
+        file_name = get_temp_file()
+        h5py.File(file_name, 'w').close()
+
+        with validated_file(file_name) as f:
+            self.assertTrue(f is not None)
+        self.assertTrue(file_exists(file_name))
+        close_files(file_name)
+
+        not_hdf5 = tempfile.mktemp('.txt')
+        with open(not_hdf5, 'w') as f:
+            f.write('Not an HDF5 file.')
+        with validated_file(not_hdf5) as f:
+            self.assertTrue(f is None)
+        self.assertFalse(file_exists(not_hdf5))
+        os.remove(not_hdf5)
+
+        with validated_file(not_hdf5) as f:
+            self.assertTrue(f is None)
+
+    def test_swmr(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w', libver='latest') as f:
+            f.create_dataset('T', (0,), dtype='i4', maxshape=(None,))
+
+        pool = FilePool(4)
+        f = pool.acquire(file_name, 'a', swmr=True)
+        self.assertTrue(f.swmr_mode)
+        pool.close()
+
+        writer = subprocess.Popen([sys.executable, '-c', SWMR_WRITER,
+                                   file_name],
+                                  stdin=subprocess.PIPE,
+                                  stdout=subprocess.PIPE)
+        try:
+            self.assertEqual(writer.stdout.readline().strip(), 'ready')
+
+            # the writer holds the file, we fall back to a SWMR reader
+            f = pool.acquire(file_name)
+            self.assertTrue(f.swmr_mode)
+            self.assertEqual(object_info(f, 'T').shape, (0,))
+
+            writer.stdin.write('\n')
+            self.assertEqual(writer.stdout.readline().strip(), 'done')
+
+            # the file changed, but there's no need to re-open it
+            self.assertTrue(pool.acquire(file_name) is f)
+            self.assertTrue(refresh_dataset(f, 'T'))
+            self.assertEqual(object_info(f, 'T').shape, (3,))
+            self.assertEqual(list(f['T'][:]), [1, 2, 3])
+            pool.close()
+        finally:
+            writer.stdin.write('\n')
+            writer.wait()
+
+    def test_swmr_old_format(self):
+        file_name = get_temp_file()
+        h5py.File(file_name, 'w').close()
+
+        pool = FilePool(4)
+        self.assertRaises(IOError, pool.acquire, file_name, 'a', swmr=True)
+
+    def test_memory_file(self):
+        file_name = 'mem://test_memory_file.h5'
+
+        self.assertFalse(file_exists(file_name))
+        new_memory_file(file_name, 65536)
+        self.assertTrue(file_exists(file_name))
+        self.assertRaises(IOError, new_memory_file, file_name)
+
+        with pooled_file(file_name, 'a') as f:
+            f.create_dataset('A', data=[1, 2, 3])
+        with validated_file(file_name) as f:
+            self.assertEqual(list(f['A'][:]), [1, 2, 3])
+
+        self.assertEqual(close_files(file_name), 1)
+        self.assertFalse(file_exists(file_name))
+        with validated_file(file_name) as f:
+            self.assertTrue(f is None)
+
+    def test_memory_file_eviction(self):
+        pool = FilePool(1)
+        f = pool.acquire('mem://test_memory_file_eviction.h5', 'w-',
+                         driver='core', backing_store=False)
+        for i in range(2):
+            file_name = get_temp_file()
+            h5py.File(file_name, 'w').close()
+            pool.acquire(file_name)
+
+        # in-memory files are never evicted
+        self.assertTrue(f.id.valid)
+        self.assertEqual(pool.close(), 2)
+
+    def test_memory_file_backing_store(self):
+        file_name = 'mem://test_memory_file_backing_store.h5'
+        backing_file = get_temp_file()
+
+        new_memory_file(file_name, backing_file=backing_file)
+        with pooled_file(file_name, 'a') as f:
+            f.create_dataset('A', data=[1, 2, 3])
+        close_files(file_name)
+
+        with h5py.File(backing_file, 'r') as f:
+            self.assertEqual(list(f['A'][:]), [1, 2, 3])
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
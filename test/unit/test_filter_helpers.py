@@ -0,0 +1,142 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.config import Tuning
+from pyhexad.filter_helpers import iter_row_blocks, parse_filter, \
+    read_filtered, tokenize
+from pyhexad.h5readTable import get_table
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class FilterHelpersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dty = np.dtype([('a', 'i8'), ('b', 'f4'), ('c', 'S4'),
+                             ('d', h5py.special_dtype(vlen=str))])
+        self.t = np.zeros(1000, dtype=self.dty)
+        self.t['a'] = np.arange(1000) + 2**40
+        self.t['b'] = np.arange(1000) / 4.0
+        self.t['c'] = ['x%d' % (i % 7) for i in range(1000)]
+        self.t['d'] = ['item %d' % (i) for i in range(1000)]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("b>=-1.5 and \"c\" In ('it''s', 'x')"),
+                         [('name', 'b'), ('op', '>='), ('number', -1.5),
+                          ('keyword', 'AND'), ('name', 'c'),
+                          ('keyword', 'IN'), ('op', '('),
+                          ('string', "it's"), ('op', ','),
+                          ('string', 'x'), ('op', ')')])
+        self.assertEqual(tokenize('a<>3'), [('name', 'a'), ('op', '<>'),
+                                            ('number', 3)])
+        self.assertRaises(ValueError, tokenize, 'a ~ 3')
+
+    def test_evaluate(self):
+        t = self.t
+        cases = [
+            ('a = 1099511627786', t['a'] == 2**40 + 10),
+            ('b < 10 AND NOT c = \'x0\'', (t['b'] < 10) & (t['c'] != 'x0')),
+            ('(b > 200 OR b <= 1) and a != 1099511627776',
+             ((t['b'] > 200) | (t['b'] <= 1)) & (t['a'] != 2**40)),
+            ("c in ('x1', 'x3')", (t['c'] == 'x1') | (t['c'] == 'x3')),
+            ("d startswith 'item 99'",
+             np.array([s.startswith('item 99') for s in t['d']])),
+            ("c STARTSWITH 'x2' or d = 'item 5'",
+             (t['c'] == 'x2') | (t['d'] == 'item 5'))
+        ]
+        for s, expected in cases:
+            filt = parse_filter(s, self.dty)
+            mask = filt(t)
+            self.assertEqual(mask.dtype, np.bool_)
+            self.assertTrue(np.array_equal(mask, expected), s)
+
+        self.assertEqual(parse_filter("d = 'x' or b > 1 and d < 'y'",
+                                      self.dty).columns, ['d', 'b'])
+
+    def test_invalid(self):
+        for s in ('', 'e > 1', "b > 'x'", 'c = 1', 'b >', '(b > 1',
+                  'b > 1)', 'b IN ()', "b STARTSWITH 'x'", 'b > 1 c'):
+            self.assertRaises(ValueError, parse_filter, s, self.dty)
+
+    def test_iter_row_blocks(self):
+        self.assertEqual([(s.start, s.stop, s.step) for s in
+                          iter_row_blocks(slice(3, 25, 4), 100, 10)],
+                         [(3, 10, 4), (11, 20, 4), (23, 25, 4)])
+        self.assertEqual(list(iter_row_blocks(slice(5, 5), 100, 10)), [])
+        # no selected row in the second block
+        self.assertEqual([s.start for s in
+                          iter_row_blocks(slice(0, 40, 25), 40, 10)],
+                         [0, 25])
+
+    def test_read_filtered(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            d = f.create_dataset('T', data=self.t, chunks=(16,))
+            filt = parse_filter("b >= 100 and c = 'x3'", self.dty)
+
+            saved = Tuning.FILTER_BLOCK_BYTES
+            Tuning.FILTER_BLOCK_BYTES = 100 * self.dty.itemsize
+            try:
+                x = read_filtered(d, slice(2, 1000, 3), filt, d.dtype, 1000,
+                                  ('a',))
+                y = self.t[2::3]
+                y = y[(y['b'] >= 100) & (y['c'] == 'x3')]
+                self.assertEqual(x.dtype.names, ('a',))
+                self.assertTrue(np.array_equal(x['a'], y['a']))
+
+                self.assertEqual(read_filtered(d, slice(0, 1000), filt,
+                                               d.dtype, len(y) - 1), None)
+            finally:
+                Tuning.FILTER_BLOCK_BYTES = saved
+
+    def test_get_table(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('T', data=self.t, chunks=(16,))
+
+            y, msg = get_table(f, 'T', [['d']], None, None, None,
+                               "a < 1099511627786 and b > 1")
+            self.assertEqual(msg, '5 rows')
+            self.assertEqual(y[0], ('d',))
+            self.assertEqual(list(y.records['d']),
+                             ['item %d' % (i) for i in range(5, 10)])
+
+            # the wide integers are still narrowed
+            y, msg = get_table(f, 'T', [['a'], ['b']], None, None, None,
+                               'b < 1')
+            self.assertEqual(y.records.dtype['a'], np.float64)
+
+            y, msg = get_table(f, 'T', None, None, None, None, "c = 'x'")
+            self.assertEqual(len(y), 1)
+
+            y, msg = get_table(f, 'T', None, None, None, None, 'e = 1')
+            self.assertEqual(y, None)
+            self.assertEqual(msg, "Unknown column 'e'.")
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    unittest.main()
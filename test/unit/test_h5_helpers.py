@@ -0,0 +1,136 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+
+# Local imports
+from pyhexad.h5_helpers import invalidate_object_info, object_info, \
+    object_info_stats, path_is_available_for_obj, path_is_valid_wrt_loc, \
+    resolvable, resolve_path
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+def get_stat(name):
+    """ Return a metadata cache counter. """
+    return dict(object_info_stats())[name]
+
+class H5helpersTest(unittest.TestCase):
+
+    def test_object_info(self):
+        file_name = get_temp_file()
+
+        with h5py.File(file_name, 'w') as loc:
+
+            loc.create_dataset('A/B', (10,), maxshape=(None,), chunks=(5,),
+                               compression=4)
+            loc['S'] = h5py.SoftLink('/A/B')
+
+            info = object_info(loc, '/A/B')
+            self.assertEqual(info.cls, h5py.Dataset)
+            self.assertEqual(info.shape, (10,))
+            self.assertEqual(info.maxshape, (None,))
+            self.assertEqual(info.chunks, (5,))
+            self.assertTrue(h5py.h5z.FILTER_DEFLATE in info.filters)
+
+            info = object_info(loc['A'], 'B')
+            self.assertEqual(info.shape, (10,))
+
+            is_valid, link = path_is_valid_wrt_loc(loc, 'S')
+            self.assertTrue(is_valid)
+            self.assertTrue(isinstance(link, h5py.SoftLink))
+
+            self.assertEqual(object_info(loc, '/X'), None)
+            self.assertFalse(resolvable(loc, '/X'))
+
+    def test_hits_and_invalidation(self):
+        file_name = get_temp_file()
+
+        with h5py.File(file_name, 'w') as loc:
+
+            dset = loc.create_dataset('A', (10,), maxshape=(None,))
+
+            object_info(loc, 'A')
+            hits = get_stat('Hits:')
+            for i in range(10):
+                self.assertTrue(resolvable(loc, 'A'))
+            self.assertEqual(get_stat('Hits:'), hits + 10)
+
+            dset.resize((20,))
+            invalidate_object_info(loc, '/A')
+            self.assertEqual(object_info(loc, 'A').shape, (20,))
+
+    def test_path_is_available_for_obj(self):
+        file_name = get_temp_file()
+
+        with h5py.File(file_name, 'w') as loc:
+
+            loc.create_dataset('A/B', (10,))
+
+            self.assertTrue(path_is_available_for_obj(loc, 'A/C', h5py.Dataset))
+            self.assertTrue(path_is_available_for_obj(loc, 'A', h5py.Group))
+            self.assertFalse(path_is_available_for_obj(loc, 'A/B', h5py.Dataset))
+            self.assertFalse(path_is_available_for_obj(loc, 'A/B/C',
+                                                       h5py.Group))
+
+    def test_resolve_path(self):
+        file_name = get_temp_file()
+
+        with h5py.File(file_name, 'w') as loc:
+
+            path = '/' + '/'.join(['L%d' % i for i in range(20)])
+            loc.create_group(path)
+            loc['S'] = h5py.SoftLink(path)
+            loc['D'] = h5py.SoftLink('/nowhere')
+
+            segments = resolve_path(loc, path)
+            self.assertEqual(len(segments), 21)
+            self.assertEqual(segments[-1].path, path)
+            for seg in segments:
+                self.assertEqual(seg.cls, h5py.Group)
+            self.assertEqual(len(set([seg.token for seg in segments])), 21)
+
+            segments = resolve_path(loc, path + '/X/Y')
+            self.assertEqual(len(segments), 21)
+
+            segments = resolve_path(loc['L0/L1'], 'L2/L3')
+            self.assertEqual(segments[-1].path, '/L0/L1/L2/L3')
+
+            segments = resolve_path(loc, 'S')
+            self.assertTrue(isinstance(segments[-1].link, h5py.SoftLink))
+            self.assertEqual(segments[-1].link.path, path)
+            self.assertEqual(segments[-1].cls, h5py.Group)
+
+            segments = resolve_path(loc, 'D')
+            self.assertEqual(len(segments), 2)
+            self.assertEqual(segments[-1].cls, None)
+            self.assertFalse(resolvable(loc, 'D'))
+
+            self.assertTrue(path_is_available_for_obj(loc['L0'], 'L1/Z',
+                                                      h5py.Group))
+            self.assertFalse(path_is_available_for_obj(loc, 'D/Z',
+                                                       h5py.Group))
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
@@ -0,0 +1,133 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+# Standard library imports
+import csv
+import logging
+import os
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.config import Tuning
+from pyhexad.export_helpers import export_format, export_rows, iter_blocks
+from pyhexad.h5exportDataset import export
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file(suffix='.h5'):
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp(suffix)
+
+class H5exportDatasetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.block_bytes = Tuning.EXPORT_BLOCK_BYTES
+        Tuning.EXPORT_BLOCK_BYTES = 8 * 1000  # many small blocks
+
+        self.file_name = get_temp_file()
+        self.data = np.arange(60000.0).reshape((20000, 3))
+        dty = np.dtype([('a', 'i4'), ('b', 'f8'), ('c', 'S4')])
+        self.table = np.zeros(2500, dtype=dty)
+        self.table['a'] = np.arange(2500)
+        self.table['b'] = np.arange(2500) / 4.0
+        self.table['c'] = 'x'
+        with h5py.File(self.file_name, 'w') as f:
+            f.create_dataset('A', data=self.data, chunks=(100, 3),
+                             compression='gzip')
+            f.create_dataset('C', data=self.data.reshape((200, 100, 3)))
+            f.create_dataset('T', data=self.table, chunks=(64,))
+            f.create_dataset('V', data=np.array(['a', 'bc'], dtype=object),
+                             dtype=h5py.special_dtype(vlen=str))
+            f.create_dataset('U', data=np.array([u'\xe9t\xe9', u'a'],
+                                                dtype=object),
+                             dtype=h5py.special_dtype(vlen=unicode))
+
+    def tearDown(self):
+        Tuning.EXPORT_BLOCK_BYTES = self.block_bytes
+
+    def test_format(self):
+        self.assertEqual(export_format('x.CSV'), 'csv')
+        self.assertEqual(export_format('x.dat'), 'raw')
+        self.assertEqual(export_format('x.csv', ' NPY'), 'npy')
+
+    def test_blocks(self):
+        with h5py.File(self.file_name, 'r') as f:
+            rows = export_rows(f['A'])
+            self.assertEqual(rows % 100, 0)
+            blocks = [x.copy() for x in iter_blocks(f['A'], rows)]
+            self.assertTrue(len(blocks) > 2)
+            self.assertTrue(np.array_equal(np.concatenate(blocks),
+                                           self.data))
+
+    def test_npy_raw(self):
+        with h5py.File(self.file_name, 'r') as f:
+            out = get_temp_file('.npy')
+            self.assertEqual(export(f, 'A', out, 'npy'),
+                             "20000 rows exported to '%s'." % (out))
+            self.assertTrue(np.array_equal(np.load(out), self.data))
+            os.remove(out)
+
+            out = get_temp_file('.npy')
+            export(f, 'T', out, 'npy')
+            self.assertTrue(np.array_equal(np.load(out), self.table))
+            os.remove(out)
+
+            out = get_temp_file('.dat')
+            export(f, 'C', out, 'raw')
+            x = np.fromfile(out, dtype=np.float64).reshape((200, 100, 3))
+            self.assertTrue(np.array_equal(x, self.data.reshape(x.shape)))
+            os.remove(out)
+
+            self.assertEqual(export(f, 'V', out, 'raw'),
+                             'Variable-length data can only be exported '
+                             'to CSV.')
+
+    def test_csv(self):
+        with h5py.File(self.file_name, 'r') as f:
+            out = get_temp_file('.csv')
+            export(f, 'T', out, 'csv')
+            with open(out, 'rb') as g:
+                lines = list(csv.reader(g))
+            self.assertEqual(lines[0], ['a', 'b', 'c'])
+            self.assertEqual(len(lines), 2501)
+            self.assertEqual(lines[-1], ['2499', '624.75', 'x'])
+            os.remove(out)
+
+            export(f, 'V', out, 'csv')
+            with open(out, 'rb') as g:
+                self.assertEqual(g.read(), 'a\nbc\n')
+            os.remove(out)
+
+            # non-ASCII strings are written as UTF-8
+            self.assertEqual(export(f, 'U', out, 'csv'),
+                             "2 rows exported to '%s'." % (out))
+            with open(out, 'rb') as g:
+                self.assertEqual(g.read(), '\xc3\xa9t\xc3\xa9\na\n')
+            os.remove(out)
+
+            self.assertEqual(export(f, 'C', out, 'csv'),
+                             'Only arrays of rank 1 or 2 and tables can be '
+                             'exported to CSV.')
+            self.assertEqual(export(f, 'A', '/no/such/dir/x.csv', 'csv'),
+                             "Can't write file '/no/such/dir/x.csv'.")
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
@@ -0,0 +1,132 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import os
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.config import Tuning
+from pyhexad.h5previewArray import get_preview
+from .config import TEST_FILES_DIRECTORY
+
+logger = logging.getLogger(__name__)
+
+def get_test_file(name):
+    """ Return the absolute path to the given test file. """
+    return os.path.join(TEST_FILES_DIRECTORY, name)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class H5previewArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.block_bytes = Tuning.REDUCE_BLOCK_BYTES
+
+    def tearDown(self):
+        Tuning.REDUCE_BLOCK_BYTES = self.block_bytes
+
+    def test_waveform(self):
+        file_name = get_test_file('Example.tpc5')
+        path = '/measurements/00000001/channels/00000001/blocks/00000001/raw'
+
+        with h5py.File(file_name, 'r') as loc:
+            y = loc[path][...]
+
+            a, msg = get_preview(loc, path, np.asarray((1000,)))
+            self.assertEqual(msg, '%d x 2' % len(a))
+            self.assertTrue(len(a) <= 1000)
+            pos = a[:, 0].astype(int) - 1
+            self.assertTrue(np.all(np.diff(pos) > 0))
+            self.assertTrue(np.array_equal(a[:, 1], y[pos]))
+            # the peaks survive
+            self.assertEqual(a[:, 1].min(), y.min())
+            self.assertEqual(a[:, 1].max(), y.max())
+
+            a, msg = get_preview(loc, path, np.asarray((500,)), 'lttb')
+            self.assertEqual(msg, '500 x 2')
+            self.assertEqual(a[0, 0], 1)
+            self.assertEqual(a[-1, 0], len(y))
+
+            # a subrange
+            a, msg = get_preview(loc, path, np.asarray((100,)), 'minmax',
+                                 np.asarray((1001,)), np.asarray((2000,)))
+            self.assertTrue(a[0, 0] >= 1001 and a[-1, 0] <= 2000)
+            self.assertEqual(a[:, 1].max(), y[1000:2000].max())
+
+    def test_lttb(self):
+        file_name = get_temp_file()
+        x = np.random.RandomState(1).randn(10007).cumsum()
+
+        def lttb(m):
+            # the textbook version (same bucket boundaries)
+            n = len(x)
+            b = [-(-i*(n-2)//(m-2)) + 1 for i in range(m-1)] + [n-1]
+            out = [0]
+            for i in range(m-2):
+                a = out[-1]
+                if i == m-3:
+                    c = (n-1, x[n-1])
+                else:
+                    c = (np.arange(b[i+1], b[i+2]).mean(),
+                         x[b[i+1]:b[i+2]].mean())
+                p = np.arange(b[i], b[i+1])
+                area = np.abs((a - c[0]) * (x[p] - x[a]) -
+                              (a - p) * (c[1] - x[a]))
+                out.append(p[np.argmax(area)])
+            return out + [n-1]
+
+        with h5py.File(file_name, 'w') as loc:
+            loc.create_dataset('A', data=x, chunks=(37,))
+
+            # many blocks, buckets span blocks
+            Tuning.REDUCE_BLOCK_BYTES = 800
+            a, msg = get_preview(loc, 'A', np.asarray((150,)), 'lttb')
+            self.assertEqual(list(a[:, 0].astype(int) - 1), lttb(150))
+
+    def test_image(self):
+        file_name = get_temp_file()
+        x = np.random.RandomState(2).randn(301, 203)
+
+        with h5py.File(file_name, 'w') as loc:
+            loc.create_dataset('A', data=x, chunks=(17, 19))
+
+            Tuning.REDUCE_BLOCK_BYTES = 8*17*19
+            a, msg = get_preview(loc, 'A', np.asarray((40, 30)))
+            self.assertEqual(msg, '40 x 30')
+            rows = np.arange(301) * 20 / 301
+            cols = np.arange(203) * 30 / 203
+            for i, j in ((0, 0), (3, 5), (19, 29)):
+                tile = x[rows == i][:, cols == j]
+                self.assertEqual(a[2*i, j], tile.min())
+                self.assertEqual(a[2*i+1, j], tile.max())
+
+            # small enough => unchanged
+            a, msg = get_preview(loc, 'A', np.asarray((400, 300)))
+            self.assertTrue(np.array_equal(a, x))
+
+            a, msg = get_preview(loc, 'A', None, 'lttb')
+            self.assertTrue(a is None)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
@@ -0,0 +1,84 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.h5readArray import get_ndarray
+from pyhexad.h5readPoints import get_points
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class H5readPointsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.file_name = get_temp_file()
+        self.data = np.arange(10000.0).reshape((100, 100))
+        with h5py.File(self.file_name, 'w') as f:
+            f.create_dataset('A', data=self.data, chunks=(10, 10))
+            f.create_dataset('B', data=np.arange(50))
+
+    def test_points(self):
+        with h5py.File(self.file_name, 'r') as loc:
+            x, msg = get_points(loc, 'A', np.asarray([[1, 1], [100, 100],
+                                                      [42, 7]]))
+            self.assertEqual(msg, '3 x 1')
+            self.assertEqual(list(x), [0.0, 9999.0, 4106.0])
+
+            # a row of positions of a 1D array
+            x, msg = get_points(loc, 'B', np.asarray([[50, 1, 1]]))
+            self.assertEqual(list(x), [49, 0, 0])
+
+            x, msg = get_points(loc, 'A', np.asarray([[0, 1]]))
+            self.assertTrue(x is None)
+            x, msg = get_points(loc, 'A', np.asarray([[101, 1]]))
+            self.assertTrue(x is None)
+            x, msg = get_points(loc, 'A', np.asarray([[1, 1, 1]]))
+            self.assertTrue(x is None)
+
+    def test_blocks(self):
+        with h5py.File(self.file_name, 'r') as loc:
+            # columns 1, 2, 11, 12, ..., 91, 92 of rows 5 to 8
+            x, msg = get_ndarray(loc, 'A', np.asarray((5, 1)),
+                                 np.asarray((8, 100)), np.asarray((4, 10)),
+                                 np.asarray((4, 2)))
+            self.assertEqual(msg, '4 x 20')
+            cols = np.sort(np.concatenate((np.arange(0, 100, 10),
+                                           np.arange(1, 100, 10))))
+            self.assertTrue(np.array_equal(x, self.data[4:8][:, cols]))
+
+            # adjacent blocks that don't fit are left out
+            x, msg = get_ndarray(loc, 'B', None, np.asarray((47,)), None,
+                                 np.asarray((5,)))
+            self.assertEqual(list(x), range(45))
+
+            x, msg = get_ndarray(loc, 'B', None, None, np.asarray((2,)),
+                                 np.asarray((3,)))
+            self.assertTrue(x is None)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
@@ -46,6 +46,18 @@ class H5readTableTest(unittest.TestCase):
             a, msg = get_table(loc, '/22-09-2011', [['Time'], ['Ask']])
             self.assertEqual(len(a), 23537)
 
+    def test_column_projection(self):
+
+        file_name = get_test_file('cadchftickdata.h5')
+
+        with h5py.File(file_name) as loc:
+            a, msg = get_table(loc, '/22-09-2011', [['Ask'], ['Time']])
+            # only the requested fields are read and kept
+            self.assertEqual(a.records.dtype.names, ('Ask', 'Time'))
+            self.assertEqual(a.records.dtype.itemsize,
+                             sum([a.records.dtype[n].itemsize
+                                  for n in ('Ask', 'Time')]))
+
     def test_single_column(self):
         
         file_name = get_test_file('cadchftickdata.h5')
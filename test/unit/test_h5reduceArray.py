@@ -0,0 +1,118 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.config import Tuning
+from pyhexad.h5reduceArray import get_reduction
+from pyhexad.reduce_helpers import block_shape, iter_blocks
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class H5reduceArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.random.RandomState(0).randn(97, 53) + 1.0e6
+        self.block_bytes = Tuning.REDUCE_BLOCK_BYTES
+        # force many blocks
+        Tuning.REDUCE_BLOCK_BYTES = 512
+
+    def tearDown(self):
+        Tuning.REDUCE_BLOCK_BYTES = self.block_bytes
+
+    def test_blocks(self):
+        self.assertEqual(block_shape((97, 53), (10, 7), 512), (10, 7))
+        self.assertEqual(block_shape((97, 53), (1, 1), 512), (1, 53))
+        self.assertEqual(block_shape((97, 53), (10, 7), 8*100*56), (100, 56))
+
+        blocks = list(iter_blocks((slice(5, 25, 3),), (30,), (10,)))
+        self.assertEqual(blocks, [((slice(5, 10, 3),), (0,)),
+                                  ((slice(11, 20, 3),), (2,)),
+                                  ((slice(20, 25, 3),), (5,))])
+
+    def test_reductions(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as loc:
+            loc.create_dataset('chunked', data=self.data, chunks=(10, 7))
+            loc.create_dataset('contiguous', data=self.data)
+
+            first = np.asarray((3, 2))
+            last = np.asarray((90, 50))
+            step = np.asarray((4, 3))
+            y = self.data[2:90:4, 1:50:3]
+
+            for path in ('chunked', 'contiguous'):
+                for op in ('sum', 'mean', 'min', 'max', 'std'):
+                    ref = getattr(np, op)
+
+                    x, msg = get_reduction(loc, path, op, None,
+                                           first, last, step)
+                    self.assertEqual(msg, '1 x 1')
+                    self.assertTrue(np.allclose(x, ref(y), rtol=1e-12))
+
+                    x, msg = get_reduction(loc, path, op, 1,
+                                           first, last, step)
+                    self.assertEqual(msg, '1 x 17')
+                    self.assertTrue(np.allclose(x, ref(y, axis=0),
+                                                rtol=1e-12))
+
+                    x, msg = get_reduction(loc, path, op, 2,
+                                           first, last, step)
+                    self.assertEqual(msg, '22 x 1')
+                    self.assertTrue(np.allclose(x, ref(y, axis=1),
+                                                rtol=1e-12))
+
+    def test_stability(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as loc:
+            # a large offset and a tiny spread (two-pass accuracy)
+            data = 1.0e9 + np.tile([0.0, 1.0e-3], 5000)
+            loc.create_dataset('A', data=data, chunks=(100,))
+
+            x, msg = get_reduction(loc, 'A', 'std')
+            self.assertAlmostEqual(x[0], np.std(data), places=10)
+
+    def test_errors(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as loc:
+            loc.create_dataset('A', data=np.arange(10))
+            loc.create_dataset('S', data=np.array(['a', 'b']))
+
+            x, msg = get_reduction(loc, 'A', 'median')
+            self.assertTrue(x is None)
+            x, msg = get_reduction(loc, 'A', 'sum', 2)
+            self.assertTrue(x is None)
+            x, msg = get_reduction(loc, 'S', 'sum')
+            self.assertTrue(x is None)
+            x, msg = get_reduction(loc, 'B', 'sum')
+            self.assertTrue(x is None)
+
+            x, msg = get_reduction(loc, 'A', 'max', 1)
+            self.assertEqual(x[0], 9)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
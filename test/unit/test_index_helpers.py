@@ -0,0 +1,147 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.config import Tuning
+from pyhexad.h5appendRows import append_rows
+from pyhexad.h5lookupRows import get_rows
+from pyhexad.h5newIndex import new_index
+from pyhexad.h5writeTable import write_rows
+from pyhexad.index_helpers import bisect, index_is_current, lookup
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class IndexHelpersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = Tuning.INDEX_CHUNK_ROWS
+        Tuning.INDEX_CHUNK_ROWS = 16
+
+        self.dty = np.dtype([('id', 'i4'),
+                             ('name', h5py.special_dtype(vlen=str)),
+                             ('v', 'f8')])
+        self.t = np.zeros(300, dtype=self.dty)
+        self.t['id'] = np.random.RandomState(7).randint(0, 40, 300)
+        self.t['name'] = ['n%03d' % (i) for i in range(300)]
+        self.t['v'] = np.arange(300)
+
+        self.file_name = get_temp_file()
+        with h5py.File(self.file_name, 'w') as f:
+            f.create_dataset('T', data=self.t, maxshape=(None,), chunks=(32,))
+
+    def tearDown(self):
+        Tuning.INDEX_CHUNK_ROWS = self.saved
+
+    def check_index(self, f, column, t):
+        keys = f['T_index/%s/keys' % (column)][:]
+        rows = f['T_index/%s/rows' % (column)][:]
+        self.assertEqual(list(keys),
+                         list(np.sort(t[column], kind='mergesort')))
+        self.assertEqual(list(keys), list(t[column][rows]))
+        self.assertEqual(sorted(rows), range(len(t)))
+        self.assertTrue(index_is_current(f, 'T', column))
+
+    def test_bisect(self):
+        with h5py.File(self.file_name, 'a') as f:
+            keys = np.sort(self.t['id'])
+            d = f.create_dataset('K', data=keys, chunks=(8,))
+            for v in (-1, 0, 5, 17, 39, 40):
+                for side in ('left', 'right'):
+                    self.assertEqual(bisect(d, v, side),
+                                     np.searchsorted(keys, v, side=side))
+
+    def test_lookup(self):
+        with h5py.File(self.file_name, 'a') as f:
+            self.assertEqual(new_index(f, 'T', 'id'), '300 rows indexed.')
+            self.assertEqual(new_index(f, 'T', 'name'), '300 rows indexed.')
+            self.assertEqual(new_index(f, 'T', 'x'), "Unknown column 'x'.")
+            self.check_index(f, 'id', self.t)
+            self.check_index(f, 'name', self.t)
+
+            rows = lookup(f, 'T', 'id', 12)
+            self.assertEqual(sorted(rows),
+                             list(np.where(self.t['id'] == 12)[0]))
+            rows = lookup(f, 'T', 'id', 10, 20)
+            self.assertEqual(sorted(rows), list(np.where(
+                (self.t['id'] >= 10) & (self.t['id'] <= 20))[0]))
+            self.assertEqual(len(lookup(f, 'T', 'id', 20, 10)), 0)
+
+            y, msg = get_rows(f, 'T', 'name', 'n100', 'n102', [['v']])
+            self.assertEqual(msg, '3 rows')
+            self.assertEqual(y[0], ('v',))
+            self.assertEqual(list(y.records['v']), [100, 101, 102])
+
+            self.assertEqual(get_rows(f, 'T', 'name', 5.0)[1],
+                             "Column 'name' has string keys.")
+            self.assertEqual(get_rows(f, 'T', 'v', 5.0)[1],
+                             "Column 'v' has no index.")
+
+    def test_update(self):
+        with h5py.File(self.file_name, 'a') as f:
+            new_index(f, 'T', 'id')
+            new_index(f, 'T', 'name')
+
+            # appends
+            self.assertEqual(append_rows(f, 'T', [[7, 'x1', 300.0],
+                                                  [99, 'a2', 301.0]]),
+                             '2 rows appended.')
+            t = f['T'][:]
+            self.check_index(f, 'id', t)
+            self.check_index(f, 'name', t)
+            y, msg = get_rows(f, 'T', 'id', 99.0)
+            self.assertEqual(list(y.records['v']), [301])
+
+            # overwrites, of an indexed column and of another one
+            self.assertEqual(write_rows(f, 'T', [[-1, 0.5], [-2, 1.5]],
+                                        'id,v'), '2 rows written.')
+            self.assertEqual(write_rows(f, 'T', [[3.5]], 'v'),
+                             '1 rows written.')
+            t = f['T'][:]
+            self.check_index(f, 'id', t)
+            self.check_index(f, 'name', t)
+            y, msg = get_rows(f, 'T', 'id', -2.0, -1.0)
+            self.assertEqual(sorted(y.records['v']), [1.5, 3.5])
+
+            # rows appended without the indexed column take the fill value
+            dty = np.dtype([('id', 'i4'), ('v', 'f8')])
+            f.create_dataset('U', (2,), dtype=dty, maxshape=(None,),
+                             fillvalue=np.array((-1, 0.0), dtype=dty))
+            new_index(f, 'U', 'id')
+            self.assertEqual(write_rows(f, 'U', [[1.0]] * 5, 'v'),
+                             '5 rows written.')
+            self.assertEqual(list(lookup(f, 'U', 'id', -1)), [0, 1, 2, 3, 4])
+            self.assertEqual(len(lookup(f, 'U', 'id', 0)), 0)
+
+            # an index the table has outgrown
+            f['T'].resize((400,))
+            self.assertFalse(index_is_current(f, 'T', 'id'))
+            self.assertEqual(get_rows(f, 'T', 'id', 1.0)[1],
+                             "The index of column 'id' is out of date.")
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    unittest.main()
@@ -0,0 +1,94 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import numpy as np
+import h5py
+
+# Local imports
+from pyhexad.mmap_helpers import mapped_array, read_mapped, release_memmaps
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class MmapHelpersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.arange(600, dtype='<f8').reshape((20, 30))
+
+    def tearDown(self):
+        release_memmaps()
+
+    def test_view(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('A', data=self.data)
+
+        with h5py.File(file_name, 'r') as f:
+            slc = (slice(2, 18, 3), slice(0, 30, 7))
+            x = read_mapped(f, 'A', slc, np.dtype('<f8'))
+            self.assertTrue(np.array_equal(x, self.data[slc]))
+            # no copy
+            self.assertTrue(np.may_share_memory(x, mapped_array(f, 'A')))
+
+    def test_conversion(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('A', data=self.data.astype('>i2'))
+
+        with h5py.File(file_name, 'r') as f:
+            x = read_mapped(f, 'A', (slice(0, 20), slice(5, 6)),
+                            np.dtype('int32'))
+            self.assertEqual(x.dtype, np.dtype('int32'))
+            self.assertTrue(np.array_equal(x, self.data[:, 5:6]))
+
+    def test_userblock(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w', userblock_size=512) as f:
+            f.create_dataset('A', data=self.data)
+
+        with h5py.File(file_name, 'r') as f:
+            x = read_mapped(f, 'A', (slice(0, 20), slice(0, 30)),
+                            np.dtype('<f8'))
+            self.assertTrue(np.array_equal(x, self.data))
+
+    def test_not_mappable(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('chunked', data=self.data, chunks=(10, 10))
+            f.create_dataset('gzip', data=self.data, compression='gzip')
+            f.create_dataset('empty', (20, 30), dtype='f8')
+            f.create_dataset('strings', data=np.array(['a', 'b']))
+            f.create_dataset('scalar', data=1.0)
+            f.create_dataset('A', data=self.data)
+
+        with h5py.File(file_name, 'r') as f:
+            for path in ('chunked', 'gzip', 'empty', 'strings', 'scalar'):
+                self.assertTrue(mapped_array(f, path) is None)
+
+        # writable files aren't mapped
+        with h5py.File(file_name, 'r+') as f:
+            self.assertTrue(mapped_array(f, 'A') is None)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
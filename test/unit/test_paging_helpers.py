@@ -0,0 +1,205 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+# Standard library imports
+import logging
+import tempfile
+import threading
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.config import Tuning
+from pyhexad.file_helpers import close_files, new_memory_file, pooled_file
+from pyhexad.h5readArrayPage import get_array_page
+from pyhexad.h5readTablePage import get_table_page
+from pyhexad.h5writeArray import h5writeArray
+from pyhexad.paging_helpers import Prefetcher, block_rows, dataset_key, \
+    invalidate_blocks, invalidation_count, page_blocks, read_block, \
+    wait_for_prefetch, _blocks, _prefetcher
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class PagingHelpersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.file_name = get_temp_file()
+        with h5py.File(self.file_name, 'w') as f:
+            f.create_dataset('A', data=np.arange(3000.0).reshape(1000, 3),
+                             chunks=(64, 3))
+            dty = np.dtype([('a', 'i4'), ('b', 'f8'), ('c', 'S4')])
+            t = np.zeros(500, dtype=dty)
+            t['a'] = np.arange(500)
+            t['b'] = np.arange(500) / 2.0
+            t['c'] = 'x'
+            f.create_dataset('T', data=t, chunks=(32,))
+
+    def tearDown(self):
+        wait_for_prefetch()
+        close_files(self.file_name)
+        _blocks.clear()
+
+    def test_page_blocks(self):
+        self.assertEqual(page_blocks(0, 10, 64, 1000), (0, 10, [0]))
+        self.assertEqual(page_blocks(6, 10, 64, 1000), (60, 70, [0, 1]))
+        self.assertEqual(page_blocks(99, 10, 64, 1000), (990, 1000, [15]))
+        self.assertEqual(page_blocks(100, 10, 64, 1000), (1000, 1000, []))
+
+    def test_block_rows(self):
+        with pooled_file(self.file_name) as f:
+            rows = block_rows(f['A'], np.dtype('f8'))
+            self.assertEqual(rows % 64, 0)
+            self.assertTrue(rows * 24 <= 1024 * 1024)
+
+    def test_array_pages(self):
+        expected = np.arange(3000.0).reshape(1000, 3)
+        with pooled_file(self.file_name) as f:
+            for page in (1, 2, 7, 34):
+                x, msg = get_array_page(f, 'A', page, 30)
+                self.assertTrue(np.array_equal(
+                    x, expected[(page-1)*30:page*30]))
+                self.assertEqual(msg, 'Page %d of 34' % (page))
+            self.assertEqual(len(x), 10)  # the last page is short
+
+            x, msg = get_array_page(f, 'A', 35, 30)
+            self.assertTrue(x is None)
+            x, msg = get_array_page(f, 'A', 1, 0)
+            self.assertTrue(x is None)
+
+    def test_read_ahead(self):
+        block_bytes = Tuning.PAGE_BLOCK_BYTES
+        Tuning.PAGE_BLOCK_BYTES = 64 * 24  # one chunk per block
+        try:
+            n = _prefetcher.prefetched
+            with pooled_file(self.file_name) as f:
+                x, msg = get_array_page(f, 'A', 1, 64)
+                wait_for_prefetch()
+                # the block of page 2 was read in the background
+                self.assertEqual(len(_blocks), 2)
+                self.assertEqual(_prefetcher.prefetched, n + 1)
+                hits = _blocks.hits
+                x, msg = get_array_page(f, 'A', 2, 64)
+                self.assertEqual(_blocks.hits, hits + 1)
+                self.assertEqual(x[0, 0], 64 * 3)
+        finally:
+            Tuning.PAGE_BLOCK_BYTES = block_bytes
+
+    def test_table_pages(self):
+        with pooled_file(self.file_name) as f:
+            y, msg = get_table_page(f, 'T', 3, 40, [['b'], ['a']])
+            self.assertEqual(msg, 'Page 3 of 13')
+            self.assertEqual(y[0], ('b', 'a'))
+            self.assertEqual(len(y), 41)
+            self.assertEqual(tuple(y[1]), (40.0, 80))
+
+            y, msg = get_table_page(f, 'T', 1, 40, [['d']])
+            self.assertTrue(y is None)
+
+    def test_cancellation(self):
+        p = Prefetcher()
+        started = threading.Event()
+        release = threading.Event()
+        done = []
+
+        def blocked():
+            started.set()
+            release.wait(10)
+
+        g = p.visit('k', 5)
+        p.submit('k', g, blocked)
+        started.wait(10)
+        for i in range(3):
+            p.submit('k', g, lambda i=i: done.append(i))
+        p.visit('k', 6)  # next to 5: keep going
+        p.visit('k', 50)  # jump: cancel the pending reads
+        release.set()
+        p.wait()
+        self.assertEqual(done, [])
+        self.assertEqual(p.cancelled, 3)
+        self.assertEqual(p.prefetched, 1)
+
+    def test_budget(self):
+        max_bytes = _blocks.max_bytes
+        _blocks.max_bytes = 1024
+        try:
+            n = _prefetcher.prefetched
+            with pooled_file(self.file_name) as f:
+                get_array_page(f, 'A', 2, 200)
+            wait_for_prefetch()
+            # the neighbors exceed the budget => no read-ahead
+            self.assertEqual(_prefetcher.prefetched, n)
+        finally:
+            _blocks.max_bytes = max_bytes
+
+    def test_memory_file_writes(self):
+        name = 'mem://paging'
+        new_memory_file(name, None, get_temp_file())
+        try:
+            with pooled_file(name, 'a') as f:
+                f.create_dataset('A', data=np.arange(10.0))
+            with pooled_file(name) as f:
+                x, msg = get_array_page(f, 'A', 1, 5)
+                self.assertEqual(list(x), [0.0, 1.0, 2.0, 3.0, 4.0])
+
+            # a batched write drops the blocks of the in-memory file (not
+            # those of its backing store)
+            self.assertEqual(h5writeArray(name, 'A', [[100.0]] * 10,
+                                          None, None, None), 'A')
+            with pooled_file(name) as f:
+                x, msg = get_array_page(f, 'A', 1, 5)
+                self.assertEqual(list(x), [100.0] * 5)
+        finally:
+            wait_for_prefetch()
+            close_files(name)
+
+    def test_stale_blocks(self):
+        with pooled_file(self.file_name) as f:
+            dset = f['A']
+            mem_type = np.dtype('f8')
+            dkey = dataset_key(dset, mem_type)
+
+            # a block read while the file's blocks are invalidated is
+            # returned, but not cached
+            count = invalidation_count(dkey)
+            invalidate_blocks(dkey[0])
+            x = read_block(dset, dkey, 0, 64, mem_type, count)
+            self.assertEqual(x[1, 0], 3.0)
+            self.assertEqual(len(_blocks), 0)
+
+            read_block(dset, dkey, 0, 64, mem_type, invalidation_count(dkey))
+            self.assertEqual(len(_blocks), 1)
+
+    def test_non_ascii_file_name(self):
+        file_name = get_temp_file()[:-3] + '\xc3\xa4.h5'
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('A', data=np.arange(10.0))
+        try:
+            with pooled_file(file_name) as f:
+                x, msg = get_array_page(f, 'A', 2, 5)
+                self.assertEqual(list(x), [5.0, 6.0, 7.0, 8.0, 9.0])
+        finally:
+            wait_for_prefetch()
+            close_files(file_name)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
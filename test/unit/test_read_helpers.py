@@ -0,0 +1,228 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Third-party imports
+import numpy as np
+import h5py
+
+# Local imports
+from pyhexad.read_helpers import field_subset, read_blocks, \
+    read_hyperslab, read_points, selection_shape
+from pyhexad.table_helpers import ExcelTable
+from pyhexad.type_helpers import excel_dtype
+
+logger = logging.getLogger(__name__)
+
+# reads all of '/A' as float64, with read_hyperslab or get_ndarray, and
+# prints the growth of the peak memory use, and the size and type of the
+# result (VmHWM is the peak of this process image; unlike ru_maxrss, it
+# doesn't start at the peak of the parent, which forked us)
+PEAK_READER = '''
+import os, sys
+sys.path[:0] = sys.argv[2].split(os.pathsep)
+import h5py
+import numpy as np
+from pyhexad.h5readArray import get_ndarray
+from pyhexad.read_helpers import read_hyperslab
+def peak():
+    for line in open('/proc/self/status'):
+        if line.startswith('VmHWM:'):
+            return int(line.split()[1]) * 1024
+f = h5py.File(sys.argv[1], 'r')
+d = f['A']
+before = peak()
+if sys.argv[3] == 'read_hyperslab':
+    x = read_hyperslab(d, tuple([slice(0, n) for n in d.shape]), np.float64)
+else:
+    x = get_ndarray(f, 'A')[0]
+print peak() - before, x.nbytes, x.dtype
+'''
+
+HAVE_PROC = os.path.exists('/proc/self/status')
+
+class ReadRecorder(object):
+    """ A dataset that records read_direct() calls and fails other reads. """
+
+    def __init__(self, dset):
+        self.dset = dset
+        self.dests = []
+
+    def __getattr__(self, name):
+        return getattr(self.dset, name)
+
+    def __getitem__(self, key):
+        raise AssertionError('Intermediate copy read.')
+
+    def read_direct(self, dest, source_sel=None, dest_sel=None):
+        self.dests.append(dest)
+        self.dset.read_direct(dest, source_sel, dest_sel)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class ReadHelpersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.arange(200000, dtype='i2').reshape((1000, 200))
+
+    def test_selection_shape(self):
+        self.assertEqual(selection_shape((10, 20), (slice(0, 10),
+                                                    slice(3, 20, 4))),
+                         (10, 5))
+        self.assertEqual(selection_shape((10,), (slice(5, 5),)), (0,))
+        self.assertRaises(ValueError, selection_shape, (10, 20),
+                          (slice(0, 10),))
+
+    def test_read_hyperslab(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            d = f.create_dataset('A', data=self.data, chunks=(100, 50))
+            f.create_dataset('S', data=np.array(['a', 'bc', 'def']))
+
+            mem_type = excel_dtype(d.dtype)
+            slc = (slice(10, 900, 3), slice(1, 200, 2))
+            x = read_hyperslab(d, slc, mem_type)
+            self.assertEqual(x.dtype, mem_type)
+            self.assertTrue(np.array_equal(x, self.data[slc]))
+            # the buffer is the result, no intermediate arrays
+            self.assertTrue(x.base is None and x.flags.owndata)
+
+            x = read_hyperslab(d, (slice(5, 5), slice(0, 200)), mem_type)
+            self.assertEqual(x.shape, (0, 200))
+
+            # fixed- to variable-length strings
+            s = f['S']
+            x = read_hyperslab(s, (slice(0, 3),), excel_dtype(s.dtype))
+            self.assertEqual(list(x), ['a', 'bc', 'def'])
+
+    def test_read_table(self):
+        file_name = get_temp_file()
+        t = np.dtype([('a', 'i2'), ('b', 'f4'), ('c', 'S3')])
+        data = np.array([(i, i/2., str(i)) for i in range(100)], dtype=t)
+
+        with h5py.File(file_name, 'w') as f:
+            d = f.create_dataset('T', data=data)
+
+            mem_type = field_subset(excel_dtype(t), ('c', 'a'))
+            x = read_hyperslab(d, (slice(10, 20, 5),), mem_type)
+            self.assertEqual(x.dtype.names, ('c', 'a'))
+            self.assertEqual(x.dtype['a'], np.dtype('int32'))
+
+            y = ExcelTable(('c', 'a'), x)
+            self.assertEqual(len(y), 3)
+            self.assertEqual(y[0], ('c', 'a'))
+            self.assertEqual(tuple(y[1]), ('10', 10))
+            self.assertEqual(tuple(y[-1]), ('15', 15))
+            self.assertRaises(IndexError, y.__getitem__, 3)
+            self.assertEqual(len(list(y)), 3)
+
+            m = y.to_matrix()
+            self.assertEqual(m.shape, (3, 2))
+            self.assertEqual(tuple(m[0]), ('c', 'a'))
+            self.assertEqual(tuple(m[2]), ('15', 15))
+            self.assertTrue(type(m[1, 1]) is int)
+
+    def test_read_blocks(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            d = f.create_dataset('A', data=self.data, chunks=(100, 50))
+            f.create_dataset('S', data=np.array(['a', 'bc', 'def', 'gh']))
+
+            # 3 x 4 blocks of 2 x 5 elements
+            x = read_blocks(d, (10, 1), (100, 20), (3, 4), (2, 5),
+                            np.float64)
+            rows = np.concatenate([np.arange(10, 12) + 100*i
+                                   for i in range(3)])
+            cols = np.concatenate([np.arange(1, 6) + 20*j
+                                   for j in range(4)])
+            self.assertEqual(x.shape, (6, 20))
+            self.assertTrue(np.array_equal(x, self.data[np.ix_(rows, cols)]))
+
+            mem_type = excel_dtype(f['S'].dtype)
+            x = read_blocks(f['S'], (1,), (2,), (2,), (1,), mem_type)
+            self.assertEqual(list(x), ['bc', 'gh'])
+
+    def test_read_points(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            d = f.create_dataset('A', data=self.data, chunks=(100, 50))
+
+            coords = [(999, 199), (0, 0), (500, 7), (0, 0)]
+            x = read_points(d, coords, np.int32)
+            self.assertEqual(x.dtype, np.int32)
+            self.assertEqual(list(x), [self.data[c] for c in coords])
+            self.assertEqual(read_points(d, np.empty((0, 2)),
+                                         np.int32).shape, (0,))
+
+    def test_no_copies(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            d = ReadRecorder(f.create_dataset('A', data=self.data,
+                                              chunks=(100, 200)))
+
+            # HDF5 converts the elements into the buffer returned
+            x = read_hyperslab(d, (slice(0, 1000, 2), slice(0, 200)),
+                               excel_dtype(d.dtype))
+            self.assertEqual(len(d.dests), 1)
+            self.assertTrue(d.dests[0] is x)
+            self.assertTrue(np.array_equal(x, self.data[::2]))
+
+    @unittest.skipUnless(HAVE_PROC, '/proc is not available.')
+    def test_peak_memory(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('A', data=np.ones((2000, 2500), dtype='f4'),
+                             chunks=(100, 2500))
+
+        # the result plus conversion buffers, not a float32 copy (+50%)
+        peak, nbytes, dtype = self.peak_memory(file_name, 'read_hyperslab')
+        self.assertEqual(nbytes, 2000*2500*8)
+        self.assertTrue(peak < 1.25 * nbytes)
+
+    @unittest.skipUnless(HAVE_PROC, '/proc is not available.')
+    def test_peak_memory_converted(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            x = np.arange(2000*2500, dtype='i8').reshape((2000, 2500))
+            f.create_dataset('A', data=x + 2**40, chunks=(100, 2500))
+
+        # int64 values beyond int32 are read as they are and converted to
+        # float64 in the same buffer, not into a copy (+100%)
+        peak, nbytes, dtype = self.peak_memory(file_name, 'get_ndarray')
+        self.assertEqual(dtype, 'float64')
+        self.assertEqual(nbytes, 2000*2500*8)
+        self.assertTrue(peak < 1.25 * nbytes)
+
+    def peak_memory(self, file_name, reader):
+        """ Returns the peak memory growth, size, and type of a read. """
+
+        # (in a fresh process, whose peak memory use is the read's)
+        out = subprocess.check_output([sys.executable, '-c', PEAK_READER,
+                                       file_name, os.pathsep.join(sys.path),
+                                       reader])
+        peak, nbytes, dtype = out.split()
+        return int(peak), int(nbytes), dtype
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
@@ -0,0 +1,115 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.cache_helpers import SizedLRUCache
+from pyhexad.file_helpers import close_files, pooled_file
+from pyhexad.h5readArray import get_ndarray
+from pyhexad.mmap_helpers import release_memmaps
+from pyhexad.result_helpers import cache_result, cached_result, \
+    result_key, _results
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class ResultHelpersTest(unittest.TestCase):
+
+    def tearDown(self):
+        _results.clear()
+        release_memmaps()
+
+    def test_sized_cache(self):
+        c = SizedLRUCache(10, 100, len)
+        c.put('a', 'x' * 40)
+        c.put('b', 'x' * 40)
+        c.put('c', 'x' * 40)  # evicts 'a'
+        self.assertEqual(c.nbytes, 80)
+        self.assertTrue(c.get('a') is None)
+        self.assertEqual(c.get('b'), 'x' * 40)
+        c.put('d', 'x' * 101)  # too large
+        self.assertTrue('d' not in c)
+        self.assertEqual(c.discard(lambda k: k in ('b', 'c')), 2)
+        self.assertEqual(c.nbytes, 0)
+
+    def test_result_key(self):
+        file_name = get_temp_file()
+        self.assertTrue(result_key(file_name, 'f') is None)
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('A', data=np.arange(10))
+
+        k1 = result_key(file_name, 'f', 'A', np.asarray((1,)), None,
+                        [['a'], ['b']])
+        k2 = result_key(file_name, 'f', 'A', np.asarray((1,)), None,
+                        [['a'], ['b']])
+        self.assertEqual(k1, k2)
+        hash(k1)
+        self.assertNotEqual(k1, result_key(file_name, 'f', 'A',
+                                           np.asarray((2,)), None,
+                                           [['a'], ['b']]))
+
+    def test_invalidation(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('A', data=np.arange(10), chunks=(5,))
+
+        key = result_key(file_name, 'h5readArray', 'A')
+        with pooled_file(file_name) as f:
+            x, msg = get_ndarray(f, 'A')
+            cache_result(key, f, x, msg)
+        self.assertTrue(cached_result(key)[0] is x)
+        self.assertEqual(_results.info()[1][0], 'Max. entries:')
+
+        # our own writes drop the file's results
+        with pooled_file(file_name, 'a') as f:
+            f['A'][0] = 42
+        self.assertTrue(cached_result(key) is None)
+        close_files(file_name)
+
+        # other writers change the file stamp
+        key = result_key(file_name, 'h5readArray', 'A')
+        with pooled_file(file_name) as f:
+            cache_result(key, f, x, msg)
+        close_files(file_name)
+        with h5py.File(file_name, 'a') as f:
+            f.create_dataset('B', data=np.arange(100))
+        self.assertNotEqual(result_key(file_name, 'h5readArray', 'A'), key)
+
+    def test_not_cached(self):
+        file_name = get_temp_file()
+        with h5py.File(file_name, 'w') as f:
+            f.create_dataset('A', data=np.arange(10.0))
+
+        key = result_key(file_name, 'h5readArray', 'A')
+        with pooled_file(file_name) as f:
+            # memory-mapped
+            x, msg = get_ndarray(f, 'A')
+            cache_result(key, f, x, msg)
+            self.assertTrue(cached_result(key) is None)
+        close_files(file_name)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
@@ -0,0 +1,105 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+# Standard library imports
+import logging
+import unittest
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from pyhexad.chunk_helpers import chunks_touched
+from pyhexad.shape_helpers import Selection, as_int_tuple
+
+logger = logging.getLogger(__name__)
+
+class SelectionTest(unittest.TestCase):
+
+    def test_defaults(self):
+        sel = Selection((10, 20))
+        self.assertEqual(sel.slices, (slice(0, 10, 1), slice(0, 20, 1)))
+        self.assertEqual(sel.out_shape, (10, 20))
+        self.assertEqual(sel.size, 200)
+
+    def test_hyperslab(self):
+        # worksheet arguments arrive as lists of lists or ndarrays
+        sel = Selection((10, 20), [[2.0], [3.0]], np.asarray((9, 50)),
+                        [[3], [4]])
+        self.assertEqual(sel.start, (1, 2))
+        self.assertEqual(sel.stop, (9, 20))
+        self.assertEqual(sel.out_shape, (3, 5))
+        self.assertTrue(isinstance(sel.start[0], int))
+        self.assertRaises(AttributeError, setattr, sel, 'foo', 1)
+
+        for args in [((0, 1),), ((1, 1), (1,)), (None, None, 'x'),
+                     ((5, 5), (4, 5))]:
+            self.assertRaises(ValueError, Selection, (10, 20), *args)
+
+    def test_as_int_tuple(self):
+        self.assertEqual(as_int_tuple([[1.0], [2.9]]), (1, 2))
+        self.assertEqual(as_int_tuple([[1.0, 2.0]]), (1, 2))
+        self.assertEqual(as_int_tuple(np.asarray((3, 4))), (3, 4))
+        self.assertEqual(as_int_tuple(5.0), (5,))
+        self.assertTrue(isinstance(as_int_tuple([[7.0]])[0], int))
+        for x in ([['a']], [[None]], [[float('nan')]], float('inf')):
+            self.assertRaises(ValueError, as_int_tuple, x)
+
+    def test_validation(self):
+        # first after last, every step beyond last
+        self.assertRaises(ValueError, Selection, (10, 20), [[5], [5]],
+                          [[4], [9]])
+        self.assertRaises(ValueError, Selection, (10, 20), None,
+                          [[5], [5]], [[5], [6]])
+        sel = Selection((10, 20), None, [[5], [5]], [[5], [2]])
+        self.assertEqual(sel.out_shape, (1, 3))
+        # empty or zero-sized arrays
+        self.assertRaises(ValueError, Selection, ())
+        self.assertRaises(ValueError, Selection, (0, 5))
+
+    def test_extend(self):
+        sel = Selection((0,), None, [[12]], None, extend=True)
+        self.assertEqual(sel.slices, (slice(0, 12, 1),))
+        sel = Selection((10,), [[1]], [[10]], [[3]], extend=True)
+        self.assertEqual(sel.out_shape, (4,))
+        self.assertRaises(ValueError, Selection, (10,), [[0]], None, None,
+                          None, True)
+
+    def test_blocks(self):
+        sel = Selection((100,), (3,), (50,), (10,), (4,))
+        self.assertEqual(sel.count, (5,))
+        self.assertEqual(sel.out_shape, (20,))
+        self.assertEqual(list(sel.positions(0))[:6], [2, 3, 4, 5, 12, 13])
+        self.assertRaises(ValueError, sel.__getattribute__, 'slices')
+        self.assertRaises(ValueError, Selection, (100,), None, None, (2,),
+                          (3,))
+        self.assertRaises(ValueError, Selection, (100,), (99,), None, None,
+                          (5,))
+
+    def test_chunks(self):
+        sel = Selection((100, 100), (5, 1), (30, 100), (1, 40))
+        self.assertEqual(sel.chunk_indices((10, 10)),
+                         [[0, 1, 2], [0, 4, 8]])
+        self.assertEqual(sel.chunk_count((10, 10)), 9)
+        self.assertEqual(sel.intersecting_chunks((10, 10))[:4],
+                         [(0, 0), (0, 40), (0, 80), (10, 0)])
+        self.assertEqual(chunks_touched((10, 10), (100, 100), sel.slices), 9)
+
+        sel = Selection((100,), (3,), None, (10,), (4,))
+        self.assertEqual(sel.chunk_count((5,)), 20)
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    #setup test files
+    unittest.main()
@@ -0,0 +1,193 @@
+##############################################################################
+# Copyright by The HDF Group.                                                #
+# All rights reserved.                                                       #
+#                                                                            #
+# This file is part of PyHexad. The full PyHexad copyright notice, including #
+# terms governing use, modification, and redistribution, is contained in     #
+# the file COPYING, which can be found at the root of the source code        #
+# distribution tree.  If you do not have access to this file, you may        #
+# request a copy from help@hdfgroup.org.                                     #
+##############################################################################
+
+
+# Standard library imports
+import logging
+import tempfile
+import unittest
+
+# Third-party imports
+import h5py
+import numpy as np
+
+# Local imports
+from pyhexad.batch_helpers import commit_writes
+from pyhexad.file_helpers import close_files
+from pyhexad.filter_helpers import parse_filter
+from pyhexad.h5appendRows import append_rows, h5appendRows
+from pyhexad.h5findValues import find_values
+from pyhexad.h5newIndex import new_index
+from pyhexad.h5newZoneMap import new_zone_map
+from pyhexad.h5readTable import get_table
+from pyhexad.h5writeArray import write_array
+from pyhexad.h5writeTable import write_rows
+from pyhexad.index_helpers import index_is_current
+from pyhexad.zone_helpers import changed_chunks, read_zones
+
+logger = logging.getLogger(__name__)
+
+def get_temp_file():
+    """ Return the absolute path to a temp file. """
+    return tempfile.mktemp('.h5')
+
+class ZoneHelpersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.t = np.zeros(1000, dtype=[('ts', 'i8'), ('s', 'S4'),
+                                       ('v', 'f4')])
+        self.t['ts'] = np.arange(1000)
+        self.t['v'] = np.sin(np.arange(1000))
+
+        self.file_name = get_temp_file()
+        with h5py.File(self.file_name, 'w') as f:
+            f.create_dataset('T', data=self.t, maxshape=(None,),
+                             chunks=(100,))
+            f.create_dataset('A', data=np.arange(400.).reshape(20, 20),
+                             maxshape=(None, None), chunks=(5, 5))
+
+    def check_zones(self, f, path):
+        """ Compare a zone map with the ranges of the chunks' values. """
+        z = read_zones(f, path)
+        self.assertIsNotNone(z)
+        x = f[path][:]
+        c = f[path].chunks
+        for i in np.ndindex(z.shape):
+            block = x[tuple([slice(j*n, (j+1)*n) for j, n in zip(i, c)])]
+            zi = z[i]
+            if x.dtype.names is not None:
+                block = block['ts']
+                zi = zi['ts']
+            self.assertEqual(zi['count'], block.size)
+            self.assertLessEqual(zi['min'], block.min())
+            self.assertGreaterEqual(zi['max'], block.max())
+            # (after partial overwrites, the bounds may be wider)
+            if zi['nans'] >= 0:
+                self.assertEqual(zi['min'], block.min())
+                self.assertEqual(zi['max'], block.max())
+
+    def test_zone_map(self):
+        with h5py.File(self.file_name, 'a') as f:
+            self.assertEqual(new_zone_map(f, 'T'), '10 chunks summarized.')
+            self.assertEqual(new_zone_map(f, 'A'), '16 chunks summarized.')
+            self.assertEqual(new_zone_map(f, 'B'),
+                             "HDF5 dataset at 'B' not found.")
+            self.check_zones(f, 'T')
+            self.check_zones(f, 'A')
+
+            z = read_zones(f, 'T')
+            self.assertEqual(z.dtype.names, ('ts', 'v'))
+            may = parse_filter('ts >= 250 and ts < 420 or v > 2',
+                               f['T'].dtype).chunks(z)
+            self.assertEqual(list(np.where(may)[0]), [2, 3, 4])
+            may = parse_filter('not ts < 950', f['T'].dtype).chunks(z)
+            self.assertEqual(list(np.where(may)[0]), [9])
+
+    def test_pruning(self):
+        with h5py.File(self.file_name, 'a') as f:
+            new_zone_map(f, 'T')
+            new_zone_map(f, 'A')
+
+            y, msg = get_table(f, 'T', [['v']], None, None, None,
+                               'ts >= 250 and ts < 420')
+            self.assertEqual(msg, '170 rows (7 of 10 chunks skipped)')
+            self.assertEqual(list(y.records['v']),
+                             list(self.t['v'][250:420]))
+            y, msg = get_table(f, 'T', [['ts']], 1, 500, 1, 'ts > 450')
+            self.assertEqual(msg, '49 rows (4 of 5 chunks skipped)')
+
+            x, msg = find_values(f, 'A', 123.0, 126.0)
+            self.assertEqual(msg, '4 values (12 of 16 chunks skipped)')
+            self.assertEqual(x.tolist(), [[7, 4], [7, 5], [7, 6], [7, 7]])
+            x, msg = find_values(f, 'A', 1000.0)
+            self.assertEqual(msg, '0 values (16 of 16 chunks skipped)')
+
+    def test_update(self):
+        with h5py.File(self.file_name, 'a') as f:
+            new_zone_map(f, 'T')
+            new_zone_map(f, 'A')
+
+            # appends, into a partially filled and a new chunk
+            self.assertEqual(append_rows(f, 'T', [[5000, 'a', 1.0]] * 150),
+                             '150 rows appended.')
+            self.check_zones(f, 'T')
+            y, msg = get_table(f, 'T', [['ts']], None, None, None,
+                               'ts = 5000')
+            self.assertEqual(msg, '150 rows (10 of 12 chunks skipped)')
+
+            # overwrites
+            self.assertEqual(write_rows(f, 'T', [[-1, 0.5]], 'ts,v'),
+                             '1 rows written.')
+            self.check_zones(f, 'T')
+            self.assertEqual(get_table(f, 'T', [['v']], None, None, None,
+                                       'ts < 0')[1],
+                             '1 rows (11 of 12 chunks skipped)')
+
+            # array writes, including past the current extent
+            write_array(f, 'A', -np.ones((2, 3)),
+                        (slice(19, 21, 1), slice(3, 6, 1)))
+            self.check_zones(f, 'A')
+            x, msg = find_values(f, 'A', -1.0)
+            self.assertEqual(x.tolist(), [[20, 4], [20, 5], [20, 6],
+                                          [21, 4], [21, 5], [21, 6]])
+
+            # a zone map the dataset has outgrown is ignored
+            f['T'].resize((2000,))
+            self.assertIsNone(read_zones(f, 'T'))
+            y, msg = get_table(f, 'T', [['ts']], None, None, None, 'ts < 0')
+            self.assertEqual(msg, '1 rows')
+
+    def test_changed_chunks(self):
+        def idx(*slices):
+            return [np.arange(s.start, s.stop) for s in slices]
+
+        # an append touches the last chunk and the new ones only
+        self.assertEqual(changed_chunks((100,), (1050,), (1200,),
+                                        idx(slice(1050, 1200))),
+                         ([10], [12]))
+        # an overwrite touches the chunks written
+        self.assertEqual(changed_chunks((100,), (1050,), (1050,),
+                                        idx(slice(230, 420))),
+                         ([2], [5]))
+        # growing along one axis touches the new rows of chunks
+        self.assertEqual(changed_chunks((5, 5), (20, 20), (21, 20),
+                                        idx(slice(19, 21), slice(3, 6))),
+                         ([3, 0], [5, 4]))
+        # ... along both, the whole grid
+        self.assertEqual(changed_chunks((5, 5), (20, 20), (21, 21),
+                                        idx(slice(20, 21), slice(20, 21))),
+                         ([0, 0], [5, 5]))
+
+    def test_swmr_append(self):
+        with h5py.File(self.file_name, 'w', libver='latest') as f:
+            f.create_dataset('T', data=self.t, maxshape=(None,),
+                             chunks=(100,))
+            new_zone_map(f, 'T')
+            new_index(f, 'T', 'ts')
+
+        # a SWMR writer can't touch attributes, zone maps and indexes
+        # have none
+        self.assertEqual(h5appendRows(self.file_name, 'T',
+                                      [[5000, 'a', 1.0]] * 50, True),
+                         '50 rows appended.')
+        commit_writes()
+        close_files(self.file_name)
+
+        with h5py.File(self.file_name, 'r') as f:
+            self.assertEqual(f['T'].shape, (1050,))
+            self.check_zones(f, 'T')
+            self.assertTrue(index_is_current(f, 'T', 'ts'))
+
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+    unittest.main()